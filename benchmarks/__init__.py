@@ -0,0 +1 @@
+# Offline benchmarks for py-bingx. Run them with `python -m benchmarks.<name>` from the repository root.
@@ -0,0 +1,309 @@
+"""
+Benchmarks every public BingxAPI method against the local mock server, plus the CPU cost of building query strings,
+signing them and decoding responses. Results are written as JSON so runs on two commits can be diffed or compared.
+
+    python -m benchmarks.bench_api [--count 200] [--latency 0] [--size 100] [--error-rate 0] [--output result.json]
+    python -m benchmarks.bench_api --compare before.json after.json
+
+--size scales the payloads: levels per side of the depth, candles, trades, symbols of the all-symbol snapshots and
+so on. With --error-rate a share of the requests fails with --error-status (or with --error-code in a HTTP 200
+answer); failed calls are counted and left out of the latencies.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+from bingx.api import BingxAPI
+from bingx.decoding import BACKENDS, PREFERENCE
+from bingx.endpoints import ENDPOINTS, RequestSigner, build_query
+from bingx.transport import HTTPTransport
+
+from .mock_server import MockBingxServer
+
+SECRET_KEY = "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
+ORDER = {"symbol": "BTC-USDT", "orderId": 1, "side": "BUY", "positionSide": "LONG", "type": "LIMIT",
+         "clientOrderID": "", "price": "27000.5", "origQty": "0.0100", "status": "NEW"}
+START = 1696118400000
+
+
+def _symbols(size):
+    return ["SYM%d-USDT" % i for i in range(size)]
+
+
+def _one_or_all(row):
+    # Market endpoints answer for one symbol, or for all of them when symbol is left out.
+    def payload(params, size):
+        if "symbol" in params:
+            return row(params["symbol"])
+        return [row(symbol) for symbol in _symbols(size)]
+    return payload
+
+
+def _price(symbol):
+    return {"symbol": symbol, "price": "27000.5", "time": START}
+
+
+def _ticker(symbol):
+    return {"symbol": symbol, "priceChange": "52.5", "priceChangePercent": "0.19", "lastPrice": "27000.5",
+            "lastQty": "0.5", "highPrice": "27100", "lowPrice": "26800", "volume": "81234.5", "quoteVolume": "2.19e9",
+            "openPrice": "26948", "openTime": START, "closeTime": START + 86400000}
+
+
+def _premium_index(symbol):
+    return {"symbol": symbol, "markPrice": "27001.0", "indexPrice": "27000.2", "lastFundingRate": "0.0001",
+            "nextFundingTime": START + 28800000}
+
+
+def _klines(params, size):
+    if "startTime" in params:
+        start, end = int(params["startTime"]), int(params["endTime"])
+        times = range(start, end + 1, 60000)
+    else:
+        times = range(START, START + size * 60000, 60000)
+    return [{"time": t, "open": "27000.5", "high": "27010", "low": "26990", "close": "27005", "volume": "12.5"}
+            for t in times]
+
+
+def _batch_orders(params, size):
+    if "batchOrders" in params:
+        return {"orders": [dict(ORDER, orderId=i) for i, _ in enumerate(json.loads(params["batchOrders"]))]}
+    ids = json.loads(params.get("orderIdList") or params.get("ClientOrderIDList"))
+    return {"success": [{"orderId": order_id} for order_id in ids], "failed": []}
+
+
+PAYLOADS = {
+    "/openApi/swap/v2/server/time": lambda params, size: {"serverTime": int(time.time() * 1000)},
+    "/openApi/swap/v2/quote/contracts": lambda params, size: [
+        {"symbol": symbol, "quantityPrecision": 4, "pricePrecision": 1, "tradeMinQuantity": 0.0001,
+         "tradeMinUSDT": 2, "status": 1} for symbol in _symbols(size)],
+    "/openApi/swap/v2/quote/price": _one_or_all(_price),
+    "/openApi/swap/v2/quote/depth": lambda params, size: {
+        "T": START, "bids": [["%.1f" % (27000 - i * 0.5), "1.5"] for i in range(size)],
+        "asks": [["%.1f" % (27000.5 + i * 0.5), "1.5"] for i in range(size)]},
+    "/openApi/swap/v2/quote/trades": lambda params, size: [
+        {"time": START + i, "isBuyerMaker": i % 2 == 0, "price": "27000.5", "qty": "0.01", "quoteQty": "270.0"}
+        for i in range(size)],
+    "/openApi/swap/v2/quote/premiumIndex": _one_or_all(_premium_index),
+    "/openApi/swap/v2/quote/fundingRate": lambda params, size: [
+        {"symbol": params.get("symbol"), "fundingRate": "0.0001", "fundingTime": START - i * 28800000}
+        for i in range(size)],
+    "/openApi/swap/v3/quote/klines": _klines,
+    "/openApi/swap/v2/quote/openInterest": lambda params, size: {"openInterest": "1234567.8",
+                                                                 "symbol": params.get("symbol"), "time": START},
+    "/openApi/swap/v2/quote/ticker": _one_or_all(_ticker),
+    "/openApi/swap/v2/quote/bookTicker": lambda params, size: {
+        "book_ticker": {"symbol": params.get("symbol"), "bid_price": 27000.0, "bid_qty": 1.5, "ask_price": 27000.5,
+                        "ask_qty": 2.5}},
+    "/openApi/swap/v2/user/balance": lambda params, size: {
+        "balance": {"asset": "USDT", "balance": "1000.0", "equity": "1012.5", "availableMargin": "900.0"}},
+    "/openApi/swap/v2/user/positions": lambda params, size: [
+        {"symbol": symbol, "positionSide": "LONG", "positionAmt": "0.5", "avgPrice": "26000", "leverage": 10}
+        for symbol in _symbols(size)],
+    "/openApi/swap/v2/user/commissionRate": lambda params, size: {
+        "commission": {"takerCommissionRate": 0.0005, "makerCommissionRate": 0.0002}},
+    "/openApi/swap/v2/trade/order": lambda params, size: {"order": ORDER},
+    "/openApi/swap/v2/trade/order/test": lambda params, size: {"order": ORDER},
+    "/openApi/swap/v2/trade/batchOrders": _batch_orders,
+    "/openApi/swap/v2/trade/closeAllPositions": lambda params, size: {"success": [1, 2], "failed": []},
+    "/openApi/swap/v2/trade/allOpenOrders": lambda params, size: {"success": [1, 2], "failed": []},
+    "/openApi/swap/v2/trade/openOrders": lambda params, size: {"orders": [dict(ORDER, orderId=i) for i in range(size)]},
+    "/openApi/swap/v2/trade/marginType": lambda params, size: {"marginType": "CROSSED"},
+    "/openApi/swap/v2/trade/leverage": lambda params, size: {"longLeverage": 10, "shortLeverage": 10},
+    "/openApi/swap/v2/trade/forceOrders": lambda params, size: {"orders": [dict(ORDER, orderId=i)
+                                                                           for i in range(size)]},
+    "/openApi/swap/v2/trade/allOrders": lambda params, size: {"orders": [dict(ORDER, orderId=i) for i in range(size)]},
+}
+
+BULK_ORDERS = [{"symbol": "BTC-USDT", "type": "LIMIT", "side": "BUY", "positionSide": "LONG", "price": 26000 + i,
+                "quantity": 0.01} for i in range(12)]
+
+# One call of every public BingxAPI method that sends requests. get_kline_history spans three windows of candles,
+# place_bulk_order and cancel_batch_orders three chunks each.
+CALLS = {
+    "get_all_contracts": lambda api: api.get_all_contracts(),
+    "get_latest_price": lambda api: api.get_latest_price("BTC-USDT"),
+    "get_market_depth": lambda api: api.get_market_depth("BTC-USDT", 100),
+    "get_order_book": lambda api: api.get_order_book("BTC-USDT", 100),
+    "get_latest_trade": lambda api: api.get_latest_trade("BTC-USDT"),
+    "get_latest_funding": lambda api: api.get_latest_funding("BTC-USDT"),
+    "get_index_price": lambda api: api.get_index_price("BTC-USDT"),
+    "get_market_price": lambda api: api.get_market_price("BTC-USDT"),
+    "get_funding_history": lambda api: api.get_funding_history("BTC-USDT"),
+    "get_kline_data": lambda api: api.get_kline_data("BTC-USDT", "1m"),
+    "get_kline_history": lambda api: api.get_kline_history("BTC-USDT", "1m", START, START + 3 * 1440 * 60000),
+    "get_open_positions": lambda api: api.get_open_positions("BTC-USDT"),
+    "get_tiker": lambda api: api.get_tiker("BTC-USDT"),
+    "get_all_prices": lambda api: api.get_all_prices(),
+    "get_all_tickers": lambda api: api.get_all_tickers(),
+    "get_all_funding": lambda api: api.get_all_funding(),
+    "get_current_optimal_price": lambda api: api.get_current_optimal_price("BTC-USDT"),
+    "get_best_bid_offer": lambda api: api.get_best_bid_offer("BTC-USDT"),
+    "get_perpetual_balance": lambda api: api.get_perpetual_balance(),
+    "get_my_perpetual_swap_positions": lambda api: api.get_my_perpetual_swap_positions(),
+    "get_fee_rate": lambda api: api.get_fee_rate(),
+    "open_market_order": lambda api: api.open_market_order("BTC-USDT", "LONG", 0.01),
+    "close_market_order": lambda api: api.close_market_order("BTC-USDT", "LONG", 0.01),
+    "place_trigger_market_order": lambda api: api.place_trigger_market_order("BTC-USDT", "BUY", "LONG", 27500, 0.01),
+    "open_limit_order": lambda api: api.open_limit_order("BTC-USDT", "LONG", 26000, 0.01, sl=25000, tp=28000),
+    "close_limit_order": lambda api: api.close_limit_order("BTC-USDT", "LONG", 28000, 0.01),
+    "place_trigger_limit_order": lambda api: api.place_trigger_limit_order("BTC-USDT", "BUY", "LONG", 27400, 0.01,
+                                                                           27500),
+    "place_trailing_stop_order": lambda api: api.place_trailing_stop_order("BTC-USDT", "SELL", "LONG", 0.01,
+                                                                           price_rate=0.01),
+    "place_test_order": lambda api: api.place_test_order("LIMIT", "BTC-USDT", "BUY", "LONG", 26000, 0.01, "NULL",
+                                                         "NULL", "NULL", "NULL", "NULL", "NULL", "NULL"),
+    "place_bulk_order": lambda api: api.place_bulk_order(BULK_ORDERS),
+    "close_all_positions": lambda api: api.close_all_positions(),
+    "cancel_order": lambda api: api.cancel_order("BTC-USDT", order_id=1),
+    "cancel_all_orders_of_symbol": lambda api: api.cancel_all_orders_of_symbol("BTC-USDT"),
+    "cancel_batch_orders": lambda api: api.cancel_batch_orders("BTC-USDT", orderid_list=list(range(25))),
+    "query_pending_orders": lambda api: api.query_pending_orders("BTC-USDT"),
+    "query_order": lambda api: api.query_order("BTC-USDT", order_id=1),
+    "get_margin_mode": lambda api: api.get_margin_mode("BTC-USDT"),
+    "set_margin_mode": lambda api: api.set_margin_mode("BTC-USDT", "CROSSED"),
+    "get_levarage": lambda api: api.get_levarage("BTC-USDT"),
+    "set_levarage": lambda api: api.set_levarage("BTC-USDT", "LONG", 10),
+    "query_force_orders": lambda api: api.query_force_orders("BTC-USDT"),
+    "query_orders_history": lambda api: api.query_orders_history("BTC-USDT"),
+}
+
+
+def _percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def bench_method(api, call, count):
+    call(api)
+    samples = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        begin = time.perf_counter()
+        try:
+            call(api)
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    result = {"calls": count, "errors": errors, "throughput_per_s": count / elapsed}
+    if samples:
+        result.update(p50_us=_percentile(samples, 0.5) * 1e6, p99_us=_percentile(samples, 0.99) * 1e6)
+    return result
+
+
+def _per_call_us(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def bench_cpu(size, decoder="auto", number=20000):
+    """
+    Microseconds per query string built, per query signed and per response decoded, without any I/O.
+    """
+    signer = RequestSigner(SECRET_KEY)
+    order = ENDPOINTS["place_order"]
+    params = dict(symbol="BTC-USDT", type="LIMIT", side="BUY", positionSide="LONG", price="27000.5", quantity="0.01",
+                  stopPrice="NULL", priceRate="NULL", workingType="NULL", takeProfit="NULL", stopLoss="NULL",
+                  clientOrderID="NULL", timeInForce="NULL")
+    query = build_query(order, params)
+    result = {"build_query_us": _per_call_us(lambda: build_query(order, params), number),
+              "sign_query_us": _per_call_us(lambda: signer.sign_query(order, query, "1696118400000"), number)}
+    decode = BingxAPI("key", SECRET_KEY, decoder=decoder)._decode
+    for name, path, params in (("price", "/openApi/swap/v2/quote/price", {"symbol": "BTC-USDT"}),
+                               ("depth", "/openApi/swap/v2/quote/depth", {"symbol": "BTC-USDT"}),
+                               ("klines", "/openApi/swap/v3/quote/klines", {"symbol": "BTC-USDT"}),
+                               ("all_tickers", "/openApi/swap/v2/quote/ticker", {})):
+        body = json.dumps({"code": 0, "msg": "", "data": PAYLOADS[path](params, size)}).encode("utf-8")
+        result["decode_%s_us" % name] = _per_call_us(lambda: decode(body), max(1, number // max(1, size)))
+        result["decode_%s_bytes" % name] = len(body)
+    return result
+
+
+def _backend_name(decoder):
+    if decoder == "auto":
+        return next(name for name in PREFERENCE if name in BACKENDS)
+    return decoder
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(count=200, latency=0.0, size=100, error_rate=0.0, error_status=500, error_code=None, methods=None,
+        seed=0, decoder="auto", lazy=False):
+    payloads = {path: (lambda payload: lambda params: payload(params, size))(payload)
+                for path, payload in PAYLOADS.items()}
+    result = {"meta": {"commit": _commit(), "python": platform.python_version(), "platform": platform.platform(),
+                       "count": count, "latency": latency, "size": size, "error_rate": error_rate,
+                       "decoder": _backend_name(decoder), "lazy": lazy},
+              "cpu": bench_cpu(size, decoder), "methods": {}}
+    with MockBingxServer(payloads, latency=latency, error_rate=error_rate, error_status=error_status,
+                         error_code=error_code, seed=seed) as server:
+        transport = HTTPTransport()
+        api = BingxAPI("key", SECRET_KEY, transport=transport, decoder=decoder, lazy=lazy)
+        api.ROOT_URL = server.url
+        for name in methods or CALLS:
+            result["methods"][name] = bench_method(api, CALLS[name], count)
+        transport.close()
+    return result
+
+
+def compare(before, after):
+    """
+    Prints every metric present in both results with the after/before ratio. Below 1 is better for times, above 1
+    for throughput.
+    """
+    for section in ("cpu", "methods"):
+        for name, value in sorted(after.get(section, {}).items()):
+            old = before.get(section, {}).get(name)
+            if old is None:
+                continue
+            metrics = value.items() if isinstance(value, dict) else [("", value)]
+            old = old if isinstance(old, dict) else {"": old}
+            for metric, new_value in metrics:
+                if metric in old and old[metric] and metric not in ("calls", "errors") \
+                        and not (name + metric).endswith("_bytes"):
+                    print("%-45s %12.1f -> %12.1f  x%.2f" % ((name + " " + metric).strip(), old[metric], new_value,
+                                                            new_value / old[metric]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200, help="calls per method")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock server waits per request")
+    parser.add_argument("--size", type=int, default=100, help="rows per list payload")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected errors")
+    parser.add_argument("--error-code", type=int, default=None, help="exchange code of injected errors")
+    parser.add_argument("--decoder", default="auto", choices=["auto"] + sorted(BACKENDS), help="JSON backend")
+    parser.add_argument("--lazy", action="store_true", help="decode responses lazily")
+    parser.add_argument("--method", action="append", dest="methods", choices=sorted(CALLS),
+                        help="only benchmark this method, can be repeated")
+    parser.add_argument("--output", help="write the JSON result to this file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two JSON results")
+    args = parser.parse_args(argv)
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+        return
+    result = run(args.count, args.latency, args.size, args.error_rate, args.error_status, args.error_code,
+                 args.methods, decoder=args.decoder, lazy=args.lazy)
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
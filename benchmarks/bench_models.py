@@ -0,0 +1,68 @@
+"""
+Compares memory and time of holding orders as decoded dicts against the typed classes of bingx.models.
+
+    python -m benchmarks.bench_models [rows]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from bingx.decoding import loads
+from bingx.models import Orders
+
+
+def make_body(count):
+    orders = [{"symbol": ("BTC-USDT", "ETH-USDT", "SOL-USDT")[i % 3], "orderId": 1700000000000000000 + i,
+               "side": "BUY" if i % 2 else "SELL", "positionSide": "LONG", "type": "LIMIT", "origQty": "0.0100",
+               "price": "%.1f" % (27000 + i % 1000 * 0.5), "executedQty": "0.0100", "avgPrice": "27000.5",
+               "cumQuote": "270", "stopPrice": "", "profit": "0.0000", "commission": "-0.1350", "status": "FILLED",
+               "time": 1696118400000 + i, "updateTime": 1696118400000 + i, "clientOrderId": "",
+               "workingType": "MARK_PRICE"} for i in range(count)]
+    return json.dumps({"code": 0, "msg": "", "data": {"orders": orders}}).encode("utf-8")
+
+
+def measure(build):
+    """
+    Seconds build() takes and bytes still allocated by what it returns. Tracing allocations slows the build down,
+    so it is timed in a separate run.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def main(count=50000):
+    body = make_body(count)
+    loads(body)
+    cases = (("dicts", lambda: loads(body)["data"]["orders"]),
+             ("Order objects", lambda: list(Orders.from_rows(loads(body)["data"]["orders"]))),
+             ("Orders columns", lambda: Orders.from_rows(loads(body)["data"]["orders"])))
+    print("%d orders, %d bytes of JSON" % (count, len(body)))
+    for name, build in cases:
+        result, elapsed, size = measure(build)
+        # What a consumer pays on top: summing the notional of every order.
+        start = time.perf_counter()
+        if name == "dicts":
+            total = sum(float(row["price"]) * float(row["executedQty"]) for row in result)
+        elif name == "Order objects":
+            total = sum(order.price * order.executed_quantity for order in result)
+        else:
+            total = sum(map(float.__mul__, result.column("price"), result.column("executed_quantity")))
+        use = time.perf_counter() - start
+        print("%-15s %8.1f MB  %6.1f bytes/order  build %7.1f ms  sum %6.1f ms  (%.1f)" % (
+            name, size / 1e6, size / count, elapsed * 1e3, use * 1e3, total))
+        del result
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,54 @@
+"""
+Measures the CPU cost of building and signing one order request, before and after the endpoint registry.
+
+    python -m benchmarks.bench_signing [iterations]
+"""
+import hmac
+import sys
+import timeit
+
+from bingx.endpoints import ENDPOINTS, RequestSigner, build_query
+
+SECRET_KEY = "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
+ORDER = dict(symbol="BTC-USDT", type="LIMIT", side="BUY", positionSide="LONG", price="27000.5", quantity="0.01",
+             stopPrice="NULL", priceRate="NULL", workingType="NULL", takeProfit="NULL", stopLoss="NULL",
+             clientOrderID="NULL", timeInForce="NULL")
+
+
+def legacy_generate_params(**kwargs):
+    params = ""
+    if 'params' in kwargs:
+        params = kwargs['params'] + "&"
+        del kwargs['params']
+    params += ''.join(str(kwarg) + "=" + str(kwargs[kwarg]) + "&" for kwarg in kwargs if kwargs[kwarg] != "NULL")[
+              :-1]
+    return params
+
+
+def legacy_sign_hex(params):
+    digest = hmac.new(SECRET_KEY.encode("utf-8"), params.encode("utf-8"), digestmod="sha256").digest()
+    return digest.hex()
+
+
+def legacy():
+    parameters = legacy_generate_params(**ORDER, timestamp="1696118400000", recvWindow="10000")
+    return legacy_generate_params(params=parameters, signature=legacy_sign_hex(parameters))
+
+
+signer = RequestSigner(SECRET_KEY)
+endpoint = ENDPOINTS["place_order"]
+
+
+def registry():
+    return signer.sign_query(endpoint, build_query(endpoint, ORDER), "1696118400000")
+
+
+def main(iterations=100000):
+    assert legacy().rsplit("signature=", 1)[1] == registry().rsplit("signature=", 1)[1]
+    for name, function in (("legacy", legacy), ("registry", registry)):
+        seconds = min(timeit.repeat(function, number=iterations, repeat=5))
+        print("%-9s %6.2fus per request" % (name, seconds / iterations * 1e6))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
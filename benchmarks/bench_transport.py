@@ -0,0 +1,42 @@
+"""
+Compares request latency of the original urlopen transport with the pooled keep-alive HTTPTransport.
+
+    python -m benchmarks.bench_transport [requests]
+"""
+import statistics
+import sys
+import time
+
+from bingx.api import BingxAPI
+from bingx.transport import HTTPTransport, UrllibTransport
+
+from .mock_server import MockBingxServer
+
+
+def run(transport, url, count):
+    bingx = BingxAPI("key", "secret", transport=transport)
+    bingx.ROOT_URL = url
+    bingx.get_latest_price("BTC-USDT")
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        bingx.get_latest_price("BTC-USDT")
+        samples.append(time.perf_counter() - start)
+    transport.close()
+    samples.sort()
+    return {"mean_us": statistics.mean(samples) * 1e6,
+            "p50_us": samples[len(samples) // 2] * 1e6,
+            "p99_us": samples[int(len(samples) * 0.99) - 1] * 1e6}
+
+
+def main(count=2000):
+    payloads = {"/openApi/swap/v2/quote/price": {"symbol": "BTC-USDT", "price": "27000.5", "time": 0}}
+    with MockBingxServer(payloads) as server:
+        for name, transport in (("urlopen", UrllibTransport()), ("pooled", HTTPTransport())):
+            result = run(transport, server.url, count)
+            print("%-8s mean %8.1fus  p50 %8.1fus  p99 %8.1fus" % (name, result["mean_us"], result["p50_us"],
+                                                                   result["p99_us"]))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
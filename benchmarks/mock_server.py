@@ -0,0 +1,330 @@
+import gzip
+import json
+import random
+import socket
+import socketserver
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bingx.websocket import OP_BINARY, OP_CLOSE, OP_PING, OP_PONG, accept_key, encode_frame, read_frame
+
+
+class ExchangeError(Exception):
+    """
+    Raised by a payload function to answer with an exchange error code instead of data.
+    """
+
+    def __init__(self, code, msg="mock error"):
+        super().__init__(code, msg)
+        self.code = code
+        self.msg = msg
+
+
+class MockBingxHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def __respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        path, _, query = self.path.partition("?")
+        query = query or body
+        self.server.requests.append((self.command, path, query))
+        status = 200
+        if self.server.error_rate and self.server.random.random() < self.server.error_rate:
+            if self.server.error_code is None:
+                status = self.server.error_status
+            body = json.dumps({"code": self.server.error_code or status, "msg": "injected error", "data": {}})
+        else:
+            data = self.server.payloads.get(path, {})
+            try:
+                if callable(data):
+                    data = data(dict(urllib.parse.parse_qsl(query)))
+                body = json.dumps({"code": 0, "msg": "", "data": data})
+            except ExchangeError as e:
+                body = json.dumps({"code": e.code, "msg": e.msg, "data": {}})
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = __respond
+    do_POST = __respond
+    do_DELETE = __respond
+    do_PUT = __respond
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up on a request (timeouts, hedged requests that lost) close the connection early.
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            ThreadingHTTPServer.handle_error(self, request, client_address)
+
+
+class MockBingxServer(object):
+    """
+    A local HTTP/1.1 stand-in for open-api.bingx.com that answers every path with a canned payload.
+
+    :param payloads: Mapping of path to the "data" field returned for it, or to a function that receives the query
+        (or form body) parameters as a dict and returns the "data" field or raises ExchangeError
+    :param latency: Seconds to sleep before answering each request
+    :param error_rate: Share of requests answered with an injected error instead of their payload
+    :param error_status: HTTP status of injected errors
+    :param error_code: Exchange code of injected errors. When set they are sent with HTTP 200 like BingX reports
+        rejected requests, otherwise with error_status.
+    :param seed: Seed of the error injection, so runs fail the same requests
+
+    requests lists the (method, path, query or form body) of every request received, in arrival order.
+    """
+
+    def __init__(self, payloads=None, latency=0.0, host="127.0.0.1", port=0, error_rate=0.0, error_status=500,
+                 error_code=None, seed=None):
+        self.httpd = _Server((host, port), MockBingxHandler)
+        self.httpd.payloads = payloads or {}
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self.httpd.error_status = error_status
+        self.httpd.error_code = error_code
+        self.httpd.random = random.Random(seed)
+        self.httpd.requests = []
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class MockStreamHandler(socketserver.StreamRequestHandler):
+    """
+    Server side of one WebSocket connection: completes the handshake, then records sub/unsub requests, Pong
+    answers and any other JSON message until the client goes away. path is the request path, with the listen key of
+    user data streams.
+    """
+
+    def setup(self):
+        socketserver.StreamRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+
+    def __read(self, length):
+        data = self.rfile.read(length)
+        if len(data) != length:
+            raise EOFError
+        return data
+
+    def send(self, opcode, payload):
+        with self.lock:
+            self.connection.sendall(encode_frame(opcode, payload, mask=False))
+
+    def handle(self):
+        self.path = self.rfile.readline().decode("latin-1").split(" ")[1]
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        valid = self.server.valid_listen_keys
+        if valid is not None and not any("listenKey=" + key in self.path for key in valid):
+            self.wfile.write(b"HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n")
+            return
+        self.wfile.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          "Sec-WebSocket-Accept: %s\r\n\r\n" % accept_key(headers["sec-websocket-key"]))
+                         .encode("ascii"))
+        self.server.connected(self)
+        try:
+            while True:
+                _, opcode, payload = read_frame(self.__read)
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_PING:
+                    continue
+                text = payload.decode("utf-8")
+                if opcode == OP_PONG or text == "Pong":
+                    self.server.pongs += 1
+                    continue
+                request = json.loads(text)
+                if request.get("reqType") == "sub":
+                    self.subscriptions.add(request["dataType"])
+                elif request.get("reqType") == "unsub":
+                    self.subscriptions.discard(request["dataType"])
+                else:
+                    self.server.messages.append(request)
+                    continue
+                self.send(OP_BINARY, gzip.compress(json.dumps({"id": request.get("id"), "code": 0, "msg": "",
+                                                               "dataType": "", "data": None}).encode("utf-8")))
+        except (EOFError, OSError, ValueError):
+            pass
+        finally:
+            self.server.disconnected(self)
+
+
+class _StreamServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        socketserver.ThreadingTCPServer.__init__(self, address, MockStreamHandler)
+        self.lock = threading.Lock()
+        self.clients = []
+        self.connections = 0
+        self.pongs = 0
+        self.messages = []
+
+    def connected(self, client):
+        with self.lock:
+            self.clients.append(client)
+            self.connections += 1
+
+    def disconnected(self, client):
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+
+class MockBingxStreamServer(object):
+    """
+    A local stand-in for the BingX swap market WebSocket and user data stream. Messages are sent gzip-compressed in
+    binary frames the way the exchange does. Market data only goes to clients subscribed to its data type, user data
+    events to the clients connected with their listen key. With valid_listen_keys set, other keys are refused during
+    the handshake.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, valid_listen_keys=None):
+        self.server = _StreamServer((host, port))
+        self.server.valid_listen_keys = valid_listen_keys
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "ws://%s:%d/swap-market" % (host, port)
+
+    @property
+    def connections(self):
+        return self.server.connections
+
+    @property
+    def pongs(self):
+        return self.server.pongs
+
+    @property
+    def messages(self):
+        """
+        JSON messages received from clients that are not subscription requests, i.e. answers to JSON pings.
+        """
+        return self.server.messages
+
+    def subscribers(self, data_type):
+        with self.server.lock:
+            return [client for client in self.server.clients if data_type in client.subscriptions]
+
+    def publish(self, data_type, data):
+        """
+        Sends data to every client subscribed to data_type and returns how many received it.
+        """
+        message = gzip.compress(json.dumps({"code": 0, "dataType": data_type, "data": data}).encode("utf-8"))
+        clients = self.subscribers(data_type)
+        for client in clients:
+            client.send(OP_BINARY, message)
+        return len(clients)
+
+    def listen_keys(self):
+        """
+        Listen keys of the connected clients.
+        """
+        with self.server.lock:
+            paths = [client.path for client in self.server.clients]
+        return [key for path in paths for key in urllib.parse.parse_qs(urllib.parse.urlsplit(path).query)
+                .get("listenKey", [])]
+
+    def push(self, event, listen_key=None):
+        """
+        Sends a user data event to the clients connected with listen_key, or to every client, and returns how many
+        received it.
+        """
+        message = gzip.compress(json.dumps(event).encode("utf-8"))
+        with self.server.lock:
+            clients = [client for client in self.server.clients
+                       if listen_key is None or "listenKey=" + listen_key in client.path]
+        for client in clients:
+            client.send(OP_BINARY, message)
+        return len(clients)
+
+    def ping(self, control=False):
+        """
+        Sends the exchange's gzip "Ping" heartbeat to every client, or a WebSocket ping frame with control=True.
+        """
+        with self.server.lock:
+            clients = list(self.server.clients)
+        for client in clients:
+            if control:
+                client.send(OP_PING, b"heartbeat")
+            else:
+                client.send(OP_BINARY, gzip.compress(b"Ping"))
+
+    def drop_connections(self):
+        """
+        Closes every client connection without a close frame, like a network failure would.
+        """
+        with self.server.lock:
+            clients = list(self.server.clients)
+        for client in clients:
+            try:
+                client.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.drop_connections()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
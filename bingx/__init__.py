@@ -1,3 +1,4 @@
 # An unofficial Python wrapper for the BingX exchange API
 
 from bingx.api import BingxAPI
+from bingx.async_api import AsyncBingxAPI
@@ -0,0 +1,332 @@
+import asyncio
+import json
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from .exceptions import BingxAPIError
+from .models import Balance, Order, Position
+
+AccountSnapshot = namedtuple("AccountSnapshot", ["balance", "positions", "orders", "pending", "reconciled_at",
+                                                 "version"])
+AccountSnapshot.__doc__ = """
+The account as the mirror currently sees it. Every field is read-only and never changes once the snapshot is taken.
+
+balance        bingx.models.Balance of the last reconcile, None before the first one
+positions      Mapping of (symbol, position side) to bingx.models.Position, open positions only
+orders         Mapping of order ID to bingx.models.Order, pending orders only
+pending        Keys of positions and orders changed by the mirror's own requests since the last reconcile
+reconciled_at  Time of the last reconcile in seconds since the epoch, None before the first one
+version        Incremented on every change
+"""
+
+# Endpoints whose responses move the mirror before the exchange confirms it.
+TRACKED_ENDPOINTS = ("place_order", "batch_orders", "close_all_positions", "cancel_order", "cancel_all_orders",
+                     "cancel_batch_orders")
+
+_EMPTY = MappingProxyType({})
+
+
+def _data(response):
+    if response.get("code") != 0:
+        raise BingxAPIError(response.get("code"), response.get("msg"))
+    return response.get("data")
+
+
+def _position_delta(side, position_side, quantity):
+    # Hedge mode positions count up from zero on both sides, one-way (BOTH) positions are signed.
+    if position_side == "BOTH":
+        return quantity if side == "BUY" else -quantity
+    opening = (side, position_side) in (("BUY", "LONG"), ("SELL", "SHORT"))
+    return quantity if opening else -quantity
+
+
+class AccountMirror(object):
+    """
+    A local copy of the balance, open positions and pending orders of the account, so decisions can read them
+    without a signed round trip.
+
+    The responses of the order and cancel requests sent through the BingxAPI the mirror is passed to update it right
+    away: market orders move the position by their quantity, other orders are added to the pending orders and
+    cancels remove them. reconcile() replaces that optimistic state with the exchange's, every interval seconds in
+    the background after start() and settle_delay seconds after a trade. Differences found on reconcile (fills of
+    pending orders, liquidations, orders placed elsewhere) are reported as drift. Balances are only ever taken from
+    the exchange.
+
+    :param fetch_state: Function returning the balance, positions and open orders responses as a dict (a coroutine
+        function when the *_async methods are used). Set by the BingxAPI the mirror is passed to when left out.
+    :param interval: Seconds between background reconciles
+    :param settle_delay: Seconds after a trade before the mirror reconciles early, None to wait for the interval
+    :param tolerance: Position amounts closer than this are not drift
+    :param on_drift: Function called with the drift list of every reconcile that found some
+    """
+
+    def __init__(self, fetch_state=None, interval=5, settle_delay=1, tolerance=1e-9, on_drift=None, clock=time.time):
+        self.fetch_state = fetch_state
+        self.interval = interval
+        self.settle_delay = settle_delay
+        self.tolerance = tolerance
+        self.on_drift = on_drift
+        self.clock = clock
+        self.drift = []
+        self.__state = AccountSnapshot(None, _EMPTY, _EMPTY, frozenset(), None, 0)
+        self.__lock = threading.Lock()
+        self.__touched = None
+        self.__next = None
+        self.__reconciles = 0
+        self.__drifted = 0
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__task = None
+
+    def snapshot(self):
+        """
+        The current AccountSnapshot. Never touches the network.
+        """
+        return self.__state
+
+    def position(self, pair, position_side="LONG"):
+        """
+        The open position of pair on position_side as a bingx.models.Position, None if there is none.
+        """
+        return self.__state.positions.get((pair, position_side))
+
+    def stats(self):
+        """
+        Number of reconciles, how many of them found drift, the last drift and the age of the state in seconds.
+        """
+        state = self.__state
+        return {"reconciles": self.__reconciles, "drifted": self.__drifted, "last_drift": list(self.drift),
+                "pending": len(state.pending), "version": state.version,
+                "age": None if state.reconciled_at is None else self.clock() - state.reconciled_at}
+
+    # Optimistic updates
+
+    def __commit(self, positions, orders, keys):
+        state = self.__state
+        if self.__touched is not None:
+            self.__touched.update(keys)
+        self.__state = state._replace(positions=MappingProxyType(positions), orders=MappingProxyType(orders),
+                                      pending=state.pending | frozenset(keys), version=state.version + 1)
+
+    def __fill(self, positions, symbol, side, position_side, quantity):
+        key = (symbol, position_side)
+        position = positions.get(key)
+        if position is None:
+            position = Position(symbol=symbol, position_side=position_side)
+            position.amount = 0.0
+        else:
+            position = Position(**position.as_dict())
+        position.amount += _position_delta(side, position_side, quantity)
+        if abs(position.amount) <= self.tolerance or (position_side != "BOTH" and position.amount < 0):
+            positions.pop(key, None)
+        else:
+            positions[key] = position
+        return key
+
+    def __place(self, positions, orders, params, order):
+        if not isinstance(order, dict) or order.get("orderId") is None:
+            return []
+        row = {"symbol": params.get("symbol"), "side": params.get("side"), "positionSide": params.get("positionSide"),
+               "type": params.get("type"), "price": params.get("price"), "origQty": params.get("quantity"),
+               "stopPrice": params.get("stopPrice"), "clientOrderId": params.get("clientOrderID"),
+               "status": "NEW"}
+        row = {key: value for key, value in row.items() if value != "NULL"}
+        row.update((key, value) for key, value in order.items() if value not in (None, ""))
+        model = Order.from_dict(row)
+        if model.type == "MARKET":
+            return [self.__fill(positions, model.symbol, model.side, model.position_side, model.quantity)]
+        orders[model.order_id] = model
+        return [model.order_id]
+
+    def __cancel(self, orders, order_id=None, client_order_id=None, symbol=None):
+        removed = []
+        for key, order in list(orders.items()):
+            if (order_id is not None and str(key) == str(order_id)) or \
+                    (client_order_id and order.client_order_id == client_order_id) or \
+                    (symbol is not None and order.symbol == symbol):
+                del orders[key]
+                removed.append(key)
+        return removed
+
+    def apply(self, name, params, response):
+        """
+        Updates the mirror from the response of a request to the endpoint registered under name, as sent by
+        BingxAPI. Requests the exchange rejected change nothing.
+        """
+        if name not in TRACKED_ENDPOINTS or response.get("code") != 0:
+            return
+        data = response.get("data") or {}
+        with self.__lock:
+            positions = dict(self.__state.positions)
+            orders = dict(self.__state.orders)
+            keys = []
+            if name == "place_order":
+                keys += self.__place(positions, orders, params, data.get("order", data))
+            elif name == "batch_orders":
+                sent = json.loads(params.get("batchOrders") or "[]")
+                for order_params, order in zip(sent, data.get("orders") or []):
+                    keys += self.__place(positions, orders, order_params, order)
+            elif name == "close_all_positions":
+                keys += list(positions)
+                positions.clear()
+            elif name == "cancel_order":
+                order_id = params.get("orderId", "NULL")
+                client_order_id = params.get("clientOrderID", "NULL")
+                keys += self.__cancel(orders, order_id=None if order_id == "NULL" else order_id,
+                                      client_order_id=None if client_order_id == "NULL" else client_order_id)
+            elif name == "cancel_all_orders":
+                keys += self.__cancel(orders, symbol=params.get("symbol"))
+            elif name == "cancel_batch_orders":
+                for order in data.get("success") or []:
+                    keys += self.__cancel(orders, order_id=order.get("orderId"))
+            if not keys:
+                return
+            self.__commit(positions, orders, keys)
+            if self.settle_delay is not None:
+                due = self.clock() + self.settle_delay
+                self.__next = due if self.__next is None else min(self.__next, due)
+
+    # Reconciling
+
+    def __begin(self):
+        with self.__lock:
+            self.__touched = set()
+
+    def __install(self, state):
+        balance = _data(state["balance"]) or {}
+        positions = {}
+        for row in _data(state["positions"]) or []:
+            position = Position.from_dict(row)
+            if abs(position.amount) > self.tolerance:
+                positions[(position.symbol, position.position_side)] = position
+        orders = {}
+        for row in (_data(state["orders"]) or {}).get("orders") or []:
+            order = Order.from_dict(row)
+            orders[order.order_id] = order
+        with self.__lock:
+            local = self.__state
+            touched, self.__touched = self.__touched or set(), None
+            # Requests answered while the state was fetched may not be part of it yet, keep the mirror's view of them.
+            for key in touched:
+                store, local_store = (positions, local.positions) if isinstance(key, tuple) else (orders, local.orders)
+                if key in local_store:
+                    store[key] = local_store[key]
+                else:
+                    store.pop(key, None)
+            drift = [] if local.reconciled_at is None else self.__compare(local, positions, orders, touched)
+            now = self.clock()
+            self.__state = AccountSnapshot(Balance.from_dict(balance.get("balance", balance)),
+                                           MappingProxyType(positions), MappingProxyType(orders),
+                                           frozenset(touched), now, local.version + 1)
+            self.__next = now + (self.settle_delay if touched and self.settle_delay is not None else self.interval)
+            self.__reconciles += 1
+            self.drift = drift
+            if drift:
+                self.__drifted += 1
+        if drift and self.on_drift is not None:
+            self.on_drift(drift)
+        return drift
+
+    def __compare(self, local, positions, orders, touched):
+        drift = []
+        for key in set(local.positions) | set(positions):
+            if key in touched:
+                continue
+            mine = local.positions.get(key)
+            theirs = positions.get(key)
+            mine = 0.0 if mine is None else mine.amount
+            theirs = 0.0 if theirs is None else theirs.amount
+            if abs(mine - theirs) > self.tolerance:
+                drift.append({"kind": "position", "symbol": key[0], "position_side": key[1], "local": mine,
+                              "exchange": theirs})
+        for order_id in set(local.orders) ^ set(orders):
+            if order_id in touched:
+                continue
+            order = local.orders.get(order_id) or orders.get(order_id)
+            drift.append({"kind": "order", "symbol": order.symbol, "order_id": order_id,
+                          "local": order_id in local.orders, "exchange": order_id in orders})
+        return drift
+
+    def reconcile(self):
+        """
+        Replaces the mirror with the exchange's state now and returns the drift found.
+        """
+        self.__begin()
+        try:
+            state = self.fetch_state()
+        except BaseException:
+            self.__touched = None
+            raise
+        return self.__install(state)
+
+    async def reconcile_async(self):
+        """
+        Coroutine version of reconcile().
+        """
+        self.__begin()
+        try:
+            state = await self.fetch_state()
+        except BaseException:
+            self.__touched = None
+            raise
+        return self.__install(state)
+
+    def __next_due(self):
+        return self.clock() if self.__next is None else self.__next
+
+    def __wait_time(self):
+        # Woken up at least every settle_delay so an early reconcile requested by a trade is not missed.
+        wait = max(0.0, self.__next_due() - self.clock())
+        return min(wait, self.settle_delay) if self.settle_delay is not None else wait
+
+    def __run(self):
+        while not self.__stop.wait(self.__wait_time()):
+            if self.clock() < self.__next_due():
+                continue
+            try:
+                self.reconcile()
+            except Exception:
+                # Keep serving the previous state, the next attempt is one interval later.
+                self.__next = self.clock() + self.interval
+
+    def start(self):
+        """
+        Reconciles once, then keeps reconciling in a background thread.
+        """
+        if self.__thread is not None:
+            return self
+        self.reconcile()
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="bingx-account", daemon=True)
+        self.__thread.start()
+        return self
+
+    async def __run_async(self):
+        while True:
+            await asyncio.sleep(self.__wait_time())
+            if self.clock() < self.__next_due():
+                continue
+            try:
+                await self.reconcile_async()
+            except Exception:
+                self.__next = self.clock() + self.interval
+
+    async def start_async(self):
+        """
+        Reconciles once, then keeps reconciling in a task of the running event loop.
+        """
+        if self.__task is None:
+            await self.reconcile_async()
+            self.__task = asyncio.get_running_loop().create_task(self.__run_async())
+        return self
+
+    def stop(self):
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
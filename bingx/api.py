@@ -1,143 +1,344 @@
-import hmac
-import base64
 import json
-import urllib.parse
-import urllib.request
-
+import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from .batch import (MAX_BATCH_ORDERS, batch_orders_param, cancel_chunks, cancel_params, chunked,
+                    merge_cancel_results, order_results, with_client_ids)
+from .clock import ClockOffsetEstimator
+from .decoding import LazyResponse, get_decoder
+from .endpoints import ENDPOINTS, RequestSigner, build_query
+from .exceptions import BingxAPIError
+from .history import (INCOME_FIELDS, MAX_FILLS_LIMIT, HistoryWriter, TimeCursor, default_range, fill_identity,
+                      fill_time, page_rows, prefetched, split_time_windows)
+from .klines import MAX_KLINE_LIMIT, VALID_INTERVALS, Klines, split_windows
+from .metrics import current_timings
+from .models import Order, Orders, Positions, Trades
+from .orderbook import OrderBook
+from .pricing import Quote
+from .ratelimit import THROTTLE_CODES
+from .snapshots import FUNDING_FIELDS, PRICE_FIELDS, TICKER_FIELDS, Snapshot
+from .transport import HTTPTransport
 from .utilities import get_system_time
 
 
 class BingxAPI(object):
     ROOT_URL = "https://open-api.bingx.com"
 
-    def __init__(self, api_key, secret_key, timestamp="local"):
+    def __init__(self, api_key, secret_key, timestamp="local", transport=None, cache=None, contracts=None,
+                 rate_limiter=None, policy=None, instrumentation=None, decoder="auto", lazy=False, typed=False,
+                 account=None, price_source=None):
+        """
+        :param api_key: Your API key
+        :param secret_key: Your secret key
+        :param timestamp: "local" to use the system clock, "server" to ask the server for its time on every request or
+            "offset" to measure the server clock offset once, refresh it in the background and apply it locally
+        :param transport: A bingx.transport.Transport to send requests with. Defaults to a keep-alive HTTPTransport.
+        :param cache: A bingx.cache.MarketDataCache shared by the premiumIndex, ticker and bookTicker functions.
+            Caching is disabled when it is None.
+        :param contracts: A bingx.contracts.ContractCatalog. When given, order quantities and prices are rounded to the
+            contract's precision and checked against its minimums before the order is sent.
+        :param rate_limiter: A bingx.ratelimit.RateLimiter that paces requests per endpoint group and lets orders and
+            cancels go ahead of queued polls. Requests are sent as soon as they are made when it is None.
+        :param policy: A bingx.policy.RequestPolicy with deadlines, retries of safe requests and hedging of slow GETs.
+            Without it every request is sent once and only the transport timeout applies.
+        :param instrumentation: A bingx.metrics.Instrumentation recording where the time of every request goes, its
+            response size and code. Nothing is measured when it is None.
+        :param decoder: JSON backend responses are decoded with: "auto" for the fastest one installed (orjson,
+            ujson, then the standard library), a backend name or a function decoding bytes.
+        :param lazy: Return responses as bingx.decoding.LazyResponse, which only decodes the payload when it is read.
+        :param typed: Return orders, positions, trades and candles as the compact classes of bingx.models (and
+            bingx.klines.Klines) with numbers parsed, instead of dicts of strings.
+        :param account: A bingx.account.AccountMirror kept up to date by the responses of the order and cancel
+            functions and reconciled with the exchange in the background, so balance and positions can be read
+            without a request.
+        :param price_source: A bingx.pricing.BookTickerSource "BBO" limit orders are priced from while its quote is
+            fresh, saving the book ticker request in front of the order. The request is still made when it is None.
+        """
         self.API_KEY = api_key
         self.SECRET_KEY = secret_key
         self.timestamp = timestamp
         self.HEADERS = {'User-Agent': 'Mozilla/5.0',
                         'X-BX-APIKEY': self.API_KEY}
+        self.signer = RequestSigner(secret_key)
+        self.transport = transport if transport is not None else HTTPTransport()
+        self.cache = cache
+        self.clock = ClockOffsetEstimator(self._get_server_time) if timestamp == "offset" else None
+        self.rate_limiter = rate_limiter
+        self.policy = policy
+        self.instrumentation = instrumentation
+        self.loads = get_decoder(decoder)
+        self.lazy = lazy
+        self.typed = typed
+        self.contracts = contracts
+        if contracts is not None and contracts.fetch_contracts is None:
+            contracts.fetch_contracts = self.get_all_contracts
+        self.account = account
+        if account is not None and account.fetch_state is None:
+            account.fetch_state = self._account_state
+        self.price_source = price_source
 
     @staticmethod
-    def __generate_params(**kwargs):
-        params = ""
-        if 'params' in kwargs:
-            params = kwargs['params'] + "&"
-            del kwargs['params']
-        params += ''.join(str(kwarg) + "=" + str(kwargs[kwarg]) + "&" for kwarg in kwargs if kwargs[kwarg] != "NULL")[
-                  :-1]
-        return params
-
-    @staticmethod
-    def __jasonify(**kwargs):
+    def _jasonify(**kwargs):
         filtered_kwargs = {k: v for k, v in kwargs.items() if v != "NULL"}
         return json.dumps(filtered_kwargs)
 
-    def __sign(self, method, path, params):
-        orig_string = method + path + params
-        signature = urllib.parse.quote(base64.b64encode(
-            hmac.new(self.SECRET_KEY.encode("utf-8"), orig_string.encode("utf-8"), digestmod="sha256").digest()))
-        return signature
-
-    def __sign_hex(self, params):
-        digest = hmac.new(self.SECRET_KEY.encode("utf-8"), params.encode("utf-8"), digestmod="sha256").digest()
-        return digest.hex()
+    @staticmethod
+    def _attached_order(price, volume):
+        """
+        Builds the takeProfit/stopLoss order attached to a new order, or returns "NULL" if no price was given.
+        """
+        if price == "NULL":
+            return price
+        return "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {price},"price": {price},"workingType":"MARK_PRICE"' + "}"
 
-    def _post(self, url, body):
-        request = urllib.request.Request(url, data=body.encode("utf-8"), headers=self.HEADERS, method="POST")
-        response = urllib.request.urlopen(request).read()
-        json_object = json.loads(response.decode('utf8'))
+    def _decode(self, response):
+        timings = current_timings()
+        json_object = LazyResponse(response, self.loads) if self.lazy else self.loads(response)
+        if timings is not None:
+            timings.size += len(response)
+            timings.mark("decode")
         return json_object
 
-    def _delete(self, url, params):
+    @staticmethod
+    def _typed_order(response):
+        """
+        The order of a place or query order response as a bingx.models.Order.
+        """
+        if response.get("code") != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
+        data = response["data"]
+        return Order.from_dict(data.get("order", data))
+
+    def _post(self, url, body, timeout=None):
+        response = self.transport.request("POST", url, body=body.encode("utf-8"), headers=self.HEADERS, timeout=timeout)
+        return self._decode(response)
+
+    def _delete(self, url, params, timeout=None):
         if params != "":
             url = url + "?" + params
-        request = urllib.request.Request(url, headers=self.HEADERS, method="DELETE")
-        response = urllib.request.urlopen(request).read()
-        json_object = json.loads(response.decode('utf8'))
-        return json_object
+        response = self.transport.request("DELETE", url, headers=self.HEADERS, timeout=timeout)
+        return self._decode(response)
 
-    def _get(self, url, params):
+    def _put(self, url, params, timeout=None):
         if params != "":
             url = url + "?" + params
-        request = urllib.request.Request(url, headers=self.HEADERS)
-        response = urllib.request.urlopen(request).read()
-        json_object = json.loads(response.decode('utf8'))
-        return json_object
+        response = self.transport.request("PUT", url, headers=self.HEADERS, timeout=timeout)
+        return self._decode(response)
+
+    def _get(self, url, params, timeout=None):
+        if params != "":
+            url = url + "?" + params
+        response = self.transport.request("GET", url, headers=self.HEADERS, timeout=timeout)
+        return self._decode(response)
+
+    def _send(self, endpoint, query):
+        """
+        Sends query to endpoint, following the request policy if one is configured.
+        """
+        if self.policy is None:
+            return self._attempt(endpoint, query)
+        return self.policy.run(endpoint, query, lambda timeout: self._attempt(endpoint, query, timeout))
+
+    def _attempt(self, endpoint, query, timeout=None):
+        """
+        Sends query to endpoint once, recording its timings if instrumentation is configured.
+        """
+        if self.instrumentation is None:
+            return self._exchange(endpoint, query, timeout)
+        timings = self.instrumentation.start(endpoint)
+        try:
+            response = self._exchange(endpoint, query, timeout)
+        except BaseException as e:
+            self.instrumentation.finish(timings, e)
+            raise
+        timings.code = response.get("code")
+        self.instrumentation.finish(timings)
+        return response
+
+    def _exchange(self, endpoint, query, timeout=None):
+        """
+        Signs query if the endpoint requires it and sends it once with the endpoint's HTTP method, after waiting for
+        the rate limiter if one is configured.
+        """
+        timings = current_timings()
+        if self.rate_limiter is not None:
+            # Signing happens after the wait, so a queued request does not go out with a stale timestamp.
+            queued = time.monotonic()
+            self.rate_limiter.acquire(endpoint.group, endpoint.priority, endpoint.weight, timeout)
+            if timeout is not None:
+                # The wait counts against the timeout of the attempt.
+                timeout = max(0.001, timeout - (time.monotonic() - queued))
+            if timings is not None:
+                timings.mark("queue")
+        if endpoint.signed:
+            query = self.signer.sign_query(endpoint, query, self.get_timestamp(endpoint.priority))
+            if timings is not None:
+                timings.mark("sign")
+        url = self.ROOT_URL + endpoint.path
+        try:
+            if endpoint.method == "POST":
+                response = self._post(url, query, timeout)
+            elif endpoint.method == "DELETE":
+                response = self._delete(url, query, timeout)
+            elif endpoint.method == "PUT":
+                response = self._put(url, query, timeout)
+            else:
+                response = self._get(url, query, timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 and self.rate_limiter is not None:
+                self.rate_limiter.throttled(endpoint.group, e.headers.get("Retry-After"))
+            raise
+        if self.rate_limiter is not None and response.get("code") in THROTTLE_CODES:
+            self.rate_limiter.throttled(endpoint.group)
+        return response
 
-    def __get_server_time(self):
-        path = "/openApi/swap/v2/server/time"
-        url = self.ROOT_URL + path
-        response = self._post(url, "")
+    def _request(self, name, **params):
+        """
+        Sends a request to the endpoint registered under name in bingx.endpoints.ENDPOINTS.
+        Parameters set to "NULL" are left out.
+        """
+        endpoint = ENDPOINTS[name]
+        response = self._send(endpoint, build_query(endpoint, params))
+        if self.account is not None:
+            self.account.apply(name, params, response)
+        return response
+
+    def request(self, name, **params):
+        """
+        Sends a request to the endpoint registered under name in bingx.endpoints.ENDPOINTS and returns the response
+        as it is, for endpoints or parameters the other methods do not cover. It goes through the same rate limiter,
+        retry policy and account mirror as they do. Parameters set to "NULL" are left out.
+        """
+        return self._request(name, **params)
+
+    def _cached_request(self, name, **params):
+        """
+        Same as _request, but goes through the market data cache when one is configured.
+        """
+        endpoint = ENDPOINTS[name]
+        query = build_query(endpoint, params)
+        if self.cache is None:
+            return self._send(endpoint, query)
+        return self.cache.get(endpoint.path, query, lambda: self._send(endpoint, query))
+
+    def map_concurrently(self, function, items, max_workers):
+        """
+        [function(item) for item in items], running up to max_workers calls at the same time.
+        """
+        if len(items) <= 1 or max_workers <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(function, items))
+
+    def _check_order(self, pair, volume, price="NULL"):
+        """
+        Rounds volume and price to the precision of pair and validates them, if a contract catalog is configured.
+        """
+        if self.contracts is None:
+            return volume, price
+        self.contracts.ensure_fresh(pair)
+        return self.contracts.validate_order(pair, volume, price)
+
+    def _check_bulk_order(self, order):
+        """
+        _check_order for an order spec of place_bulk_order, returns a copy with quantity and prices rounded.
+        """
+        if self.contracts is None:
+            return order
+        pair = order.get("symbol")
+        quantity, price = self._check_order(pair, order.get("quantity"), order.get("price", "NULL"))
+        stop_price = self._round_price(pair, order.get("stopPrice", "NULL"))
+        return dict(order, quantity=quantity, price=price, stopPrice=stop_price)
+
+    def _round_price(self, pair, price):
+        if self.contracts is None or price == "NULL":
+            return price
+        return self.contracts.round_price(pair, price)
+
+    def _account_state(self):
+        """
+        The balance, positions and open orders responses an AccountMirror reconciles with.
+        """
+        balance, positions, orders = self.map_concurrently(self._request, ["balance", "positions", "open_orders"], 3)
+        return {"balance": balance, "positions": positions, "orders": orders}
+
+    def _get_server_time(self, priority=None):
+        endpoint = ENDPOINTS["server_time"]
+        if priority is not None and priority < endpoint.priority:
+            # Asked for to sign a request, so it queues with that request instead of behind market data polls.
+            endpoint = endpoint._replace(priority=priority)
+        response = self._send(endpoint, build_query(endpoint, {}))
         return str(response["data"]["serverTime"])
 
     @staticmethod
-    def __handle_response(response):
+    def _handle_response(response):
         if response["code"] != 0:
             return response["msg"]
         else:
             return response["data"]
 
-    def get_timestamp(self):
+    def get_timestamp(self, priority=None):
+        """
+        :param priority: Priority of the request the timestamp is for. With timestamp="server" the server time is
+            requested with that priority, so orders do not queue behind market data polls for it.
+        """
         if self.timestamp == "local":
             return get_system_time()
         elif self.timestamp == "server":
-            return self.__get_server_time()
+            return self._get_server_time(priority)
+        elif self.timestamp == "offset":
+            self.clock.ensure_synchronized()
+            return str(self.clock.now())
         else:
             raise ValueError("[!] INVALID VALUE FOR TIMESTAMP WAS INITIATED.")
 
+    def get_clock_skew(self):
+        """
+        Only available with timestamp="offset". Returns the estimated server minus local clock offset and its
+        uncertainty in milliseconds, and the age of the estimate in seconds.
+        """
+        if self.clock is None:
+            raise ValueError("[!] CLOCK SKEW IS ONLY TRACKED WITH timestamp=\"offset\".")
+        self.clock.ensure_synchronized()
+        return self.clock.skew()
+
     def get_all_contracts(self):
-        path = "/openApi/swap/v2/quote/contracts"
-        url = self.ROOT_URL + path
-        response = self._get(url, "")
+        response = self._request("contracts")
         return response["data"]
 
     def get_latest_price(self, pair):
-        path = "/openApi/swap/v2/quote/price"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._request("price", symbol=pair)
         return response["data"]["price"]
 
     def get_market_depth(self, pair, limit="NULL"):
-        path = "/openApi/swap/v2/quote/depth"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair, limit=limit)
-        response = self._get(url, params)
+        response = self._request("depth", symbol=pair, limit=limit)
         return response["data"]
 
+    def get_order_book(self, pair, limit="NULL"):
+        return OrderBook.from_depth(self.get_market_depth(pair, limit))
+
     def get_latest_trade(self, pair):
-        path = "/openApi/swap/v2/quote/trades"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._request("trades", symbol=pair)
+        if self.typed:
+            return Trades.from_rows(response["data"])
         return response["data"]
 
     def get_latest_funding(self, pair):
-        path = "/openApi/swap/v2/quote/premiumIndex"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._cached_request("premium_index", symbol=pair)
         return response["data"]["lastFundingRate"]
 
     def get_index_price(self, pair):
-        path = "/openApi/swap/v2/quote/premiumIndex"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._cached_request("premium_index", symbol=pair)
         return response["data"]["indexPrice"]
 
     def get_market_price(self, pair):
-        path = "/openApi/swap/v2/quote/premiumIndex"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._cached_request("premium_index", symbol=pair)
         return response["data"]["markPrice"]
 
     def get_funding_history(self, pair):
-        path = "/openApi/swap/v2/quote/fundingRate"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._request("funding_rate", symbol=pair)
         return response["data"]
 
     def get_kline_data(self, pair, interval, start_timestamp="NULL", end_timestamp="NULL", limit="NULL"):
@@ -152,90 +353,154 @@ class BingxAPI(object):
         :return:
         """
 
-        path = "/openApi/swap/v3/quote/klines"
-        url = self.ROOT_URL + path
-        VALID_INTERVALS = ["1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"]
         if str(interval) not in VALID_INTERVALS:
             raise ValueError("[!] INVALID INTERVAL VALUE. Valid Intervals are: ", str(VALID_INTERVALS))
 
-        params = self.__generate_params(symbol=pair, interval=interval, startTime=start_timestamp,
-                                        endTime=end_timestamp, limit=limit)
-        response = self._get(url, params)
+        response = self._request("klines", symbol=pair, interval=interval, startTime=start_timestamp,
+                                 endTime=end_timestamp, limit=limit)
+        if self.typed:
+            return Klines.from_rows(response["data"])
         return response["data"]
 
+    def get_kline_history(self, pair, interval, start_timestamp, end_timestamp, max_workers=4):
+        """
+        Downloads every candle of [start_timestamp, end_timestamp), no matter how many there are.
+        The range is split into windows of at most 1440 candles which are fetched concurrently.
+
+        :param pair: Symbol i.e. BTC-USDT
+        :param interval: One of VALID_INTERVALS
+        :param start_timestamp: Epoch milliseconds, inclusive
+        :param end_timestamp: Epoch milliseconds, exclusive
+        :param max_workers: Maximum number of windows fetched at the same time
+        :return: bingx.klines.Klines with one column per field, ordered by time and without duplicates
+        """
+        windows = split_windows(start_timestamp, end_timestamp, interval)
+
+        def fetch(window):
+            response = self._request("klines", symbol=pair, interval=interval, startTime=window[0],
+                                     endTime=window[1] - 1, limit=MAX_KLINE_LIMIT)
+            return response["data"]
+
+        pages = self.map_concurrently(fetch, windows, max_workers)
+        return Klines.from_rows(chain.from_iterable(pages), int(start_timestamp), int(end_timestamp))
+
     def get_open_positions(self, pair):
         """
         Get all the swap positions on a pair. (Not limited to your positions)
         """
-        path = "/openApi/swap/v2/quote/openInterest"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._request("open_interest", symbol=pair)
         return response["data"]
 
     def get_tiker(self, pair):
         """
         Get general useful info about the given pair.
         """
-        path = "/openApi/swap/v2/quote/ticker"
-        url = self.ROOT_URL + path
-        params = self.__generate_params(symbol=pair)
-        response = self._get(url, params)
+        response = self._cached_request("ticker", symbol=pair)
         return response["data"]
 
+    def get_all_prices(self):
+        """
+        Latest price of every symbol in a single request, as a bingx.snapshots.Snapshot with price and time columns.
+        """
+        response = self._request("price")
+        return Snapshot.from_rows(response["data"], PRICE_FIELDS)
+
+    def get_all_tickers(self):
+        """
+        24h ticker of every symbol in a single request, as a bingx.snapshots.Snapshot, i.e.
+        get_all_tickers().top("priceChangePercent") for the biggest movers.
+        """
+        response = self._cached_request("ticker")
+        return Snapshot.from_rows(response["data"], TICKER_FIELDS)
+
+    def get_all_funding(self):
+        """
+        Mark price, index price and funding rate of every symbol in a single request, as a bingx.snapshots.Snapshot.
+        """
+        response = self._cached_request("premium_index")
+        return Snapshot.from_rows(response["data"], FUNDING_FIELDS)
+
     def get_current_optimal_price(self, pair):
         """
         Obtain the current optimal order(Best bid and offer)
         # Use best bid to sell and use best offer to buy.
         """
-        path = "/openApi/swap/v2/quote/bookTicker"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._cached_request("book_ticker", symbol=pair)
         best_bid = response["data"]["book_ticker"]["bid_price"]
         best_offer = response["data"]["book_ticker"]["ask_price"]
         return [best_offer, best_bid]
 
+    def get_best_bid_offer(self, pair):
+        """
+        Best bid and offer of pair as a bingx.pricing.Quote, from the price source when it has a fresh quote and
+        requested otherwise. quote.source tells which one it was.
+        """
+        if self.price_source is not None:
+            quote = self.price_source.quote(pair)
+            if quote is not None:
+                return quote
+        best_offer, best_bid = self.get_current_optimal_price(pair)
+        if self.price_source is not None:
+            self.price_source.record(pair, "rest")
+        return Quote(best_bid, best_offer, "rest", 0.0)
+
     def get_perpetual_balance(self):
         """
         Get asset information of user‘s Perpetual Account
         """
-        path = "/openApi/swap/v2/user/balance"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("balance")
         # data = response["data"]
         return response
 
     def get_my_perpetual_swap_positions(self, pair="NULL"):
-        path = "/openApi/swap/v2/user/positions"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(currency=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("positions", currency=pair)
         data = response["data"]
+        if self.typed:
+            return Positions.from_rows(data)
         if not data:
             return "You have no open positions!"
         return data
 
-    def get_capital_flow(self):
-        # To be implemented
-        path = "/openApi/swap/v2/user/income"
-        url = self.ROOT_URL + path
-        raise NotImplementedError
+    def get_capital_flow(self, pair="NULL", income_type="NULL", start_timestamp="NULL", end_timestamp="NULL",
+                         limit=1000, prefetch=1):
+        """
+        Income records (realized PnL, funding fees, trading fees, transfers...) of [start_timestamp, end_timestamp)
+        as a generator. Ranges longer than 7 days are walked window by window and full pages are followed, while the
+        next page is downloaded in the background, so only a few pages are held in memory at any time.
 
-    def export_fund_flow(self):
-        # To be implemented
-        path = "/openApi/swap/v2/user/income/export"
-        url = self.ROOT_URL + path
-        raise NotImplementedError
+        :param pair: Symbol i.e. BTC-USDT, every symbol if "NULL"
+        :param income_type: i.e. REALIZED_PNL, FUNDING_FEE or TRADING_FEE, every type if "NULL"
+        :param start_timestamp: Epoch milliseconds, inclusive. Defaults to 7 days before end_timestamp.
+        :param end_timestamp: Epoch milliseconds, exclusive. Defaults to now.
+        :param limit: Records per request, at most 1000
+        :param prefetch: Pages downloaded ahead of the consumer, 0 to only download when asked
+        """
+        start_timestamp, end_timestamp = default_range(start_timestamp, end_timestamp, get_system_time())
+
+        def pages():
+            for start, end in split_time_windows(start_timestamp, end_timestamp):
+                cursor = TimeCursor(start, end, limit, "tranId")
+                while not cursor.done:
+                    response = self._request("income", symbol=pair, incomeType=income_type, startTime=cursor.start,
+                                             endTime=end - 1, limit=limit)
+                    yield cursor.feed(page_rows(response))
+
+        return (row for page in prefetched(pages(), prefetch) for row in page)
+
+    def export_fund_flow(self, path, pair="NULL", income_type="NULL", start_timestamp="NULL", end_timestamp="NULL",
+                         format="csv"):
+        """
+        Streams get_capital_flow() into a file as the pages arrive, see bingx.history.HistoryWriter.
+
+        :param path: File to append to, created if missing
+        :param format: "csv" or "binary"
+        :return: The number of records written
+        """
+        with HistoryWriter(path, INCOME_FIELDS, format) as writer:
+            return writer.write_rows(self.get_capital_flow(pair, income_type, start_timestamp, end_timestamp))
 
     def get_fee_rate(self):
-        path = "/openApi/swap/v2/user/commissionRate"
-        url = self.ROOT_URL + path
-        response = self._get(url, "")
+        response = self._request("commission_rate")
         return response["data"]
 
     # Market Orders:
@@ -262,23 +527,19 @@ class BingxAPI(object):
             workingType Trigger price type for stopPrice: MARK_PRICE, CONTRACT_PRICE, INDEX_PRICE, default is MARK_PRICE
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
         if position_side == "LONG":
             desicion = "BUY"
         elif position_side == "SHORT":
             desicion = "SELL"
         else:
             raise ValueError("position_side must be either 'SHORT' or 'LONG'")
-        if tp != "NULL":
-            tp = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {tp},"price": {tp},"workingType":"MARK_PRICE"' + "}"
-        if sl != "NULL":
-            sl = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {sl},"price": {sl},"workingType":"MARK_PRICE"' + "}"
-        parameters = self.__generate_params(clientOrderID=client_order_id, positionSide=position_side, quantity=volume,
-                                            side=desicion, symbol=pair, type="MARKET", takeProfit=tp, stopLoss=sl,
-                                            timestamp=self.get_timestamp(), recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        volume, _ = self._check_order(pair, volume)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = self._request("place_order", clientOrderID=client_order_id, positionSide=position_side,
+                                 quantity=volume, side=desicion, symbol=pair, type="MARKET", takeProfit=tp, stopLoss=sl)
+        if self.typed:
+            return self._typed_order(response)
         return response["data"]["order"]
 
     def close_market_order(self, pair, position_side, volume, client_order_id="NULL"):
@@ -291,20 +552,18 @@ class BingxAPI(object):
         :param client_order_id: Your choosen order id (a unique number between 1 and 40)
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
         if position_side == "LONG":
             desicion = "SELL"
         elif position_side == "SHORT":
             desicion = "BUY"
         else:
             raise ValueError("position_side must be either 'SHORT' or 'LONG'")
-        parameters = self.__generate_params(clientOrderID=client_order_id, symbol=pair, type="MARKET", side=desicion,
-                                            positionSide=position_side, quantity=volume, timestamp=self.get_timestamp(),
-                                            recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        volume, _ = self._check_order(pair, volume)
+        response = self._request("place_order", clientOrderID=client_order_id, symbol=pair, type="MARKET",
+                                 side=desicion, positionSide=position_side, quantity=volume)
         # data = response["data"]
+        if self.typed:
+            return self._typed_order(response)
         return response
 
     def place_trigger_market_order(self, pair, desicion, position_side, trigger_price, volume,
@@ -335,20 +594,16 @@ class BingxAPI(object):
             workingType Trigger price type for stopPrice: MARK_PRICE, CONTRACT_PRICE, INDEX_PRICE, default is MARK_PRICE
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
-        if tp != "NULL":
-            tp = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {tp},"price": {tp},"workingType":"MARK_PRICE"' + "}"
-        if sl != "NULL":
-            sl = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {sl},"price": {sl},"workingType":"MARK_PRICE"' + "}"
-        parameters = self.__generate_params(symbol=pair, type="TRIGGER_MARKET", side=desicion,
-                                            positionSide=position_side, quantity=volume, stopPrice=trigger_price,
-                                            workingType=trigger_price_type, takeProfit=tp, stopLoss=sl,
-                                            timestamp=self.get_timestamp(), clientOrderID=client_order_id,
-                                            timeInForce=time_in_force, recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        volume, trigger_price = self._check_order(pair, volume, trigger_price)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = self._request("place_order", symbol=pair, type="TRIGGER_MARKET", side=desicion,
+                                 positionSide=position_side, quantity=volume, stopPrice=trigger_price,
+                                 workingType=trigger_price_type, takeProfit=tp, stopLoss=sl,
+                                 clientOrderID=client_order_id, timeInForce=time_in_force)
         # data = response["data"]
+        if self.typed:
+            return self._typed_order(response)
         return response
 
     # Limit Orders:
@@ -376,29 +631,25 @@ class BingxAPI(object):
             workingType Trigger price type for stopPrice: MARK_PRICE, CONTRACT_PRICE, INDEX_PRICE, default is MARK_PRICE
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
         if position_side == "LONG":
             desicion = "BUY"
         elif position_side == "SHORT":
             desicion = "SELL"
         else:
             raise ValueError("position_side must be either 'SHORT' or 'LONG'")
-        if price == "BBO" and desicion == "BUY":
-            price = self.get_current_optimal_price(pair)[0]
-        if price == "BBO" and desicion == "SELL":
-            price = self.get_current_optimal_price(pair)[1]
-
-        if tp != "NULL":
-            tp = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {tp},"price": {tp},"workingType":"MARK_PRICE"' + "}"
-        if sl != "NULL":
-            sl = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {sl},"price": {sl},"workingType":"MARK_PRICE"' + "}"
-        parameters = self.__generate_params(clientOrderID=client_order_id, positionSide=position_side, quantity=volume,
-                                            price=price, side=desicion, symbol=pair, type="LIMIT", takeProfit=tp,
-                                            stopLoss=sl,
-                                            timestamp=self.get_timestamp(), recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        if price == "BBO":
+            # Use best offer to buy and best bid to sell.
+            quote = self.get_best_bid_offer(pair)
+            price = quote.ask if desicion == "BUY" else quote.bid
+
+        volume, price = self._check_order(pair, volume, price)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = self._request("place_order", clientOrderID=client_order_id, positionSide=position_side,
+                                 quantity=volume, price=price, side=desicion, symbol=pair, type="LIMIT", takeProfit=tp,
+                                 stopLoss=sl)
+        if self.typed:
+            return self._typed_order(response)
         return response["data"]["order"]
 
     def close_limit_order(self, pair, position_side, price, volume, client_order_id="NULL"):
@@ -412,24 +663,22 @@ class BingxAPI(object):
         :param client_order_id: Your choosen order id (a unique number between 1 and 40)
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
         if position_side == "LONG":
             desicion = "SELL"
         elif position_side == "SHORT":
             desicion = "BUY"
         else:
             raise ValueError("position_side must be either 'SHORT' or 'LONG'")
-        if price == "BBO" and desicion == "BUY":
-            price = self.get_current_optimal_price(pair)[0]
-        if price == "BBO" and desicion == "SELL":
-            price = self.get_current_optimal_price(pair)[1]
-        parameters = self.__generate_params(clientOrderID=client_order_id, symbol=pair, type="LIMIT", side=desicion,
-                                            positionSide=position_side, price=price, quantity=volume,
-                                            timestamp=self.get_timestamp(), recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        if price == "BBO":
+            # Use best offer to buy and best bid to sell.
+            quote = self.get_best_bid_offer(pair)
+            price = quote.ask if desicion == "BUY" else quote.bid
+        volume, price = self._check_order(pair, volume, price)
+        response = self._request("place_order", clientOrderID=client_order_id, symbol=pair, type="LIMIT", side=desicion,
+                                 positionSide=position_side, price=price, quantity=volume)
         # data = response["data"]
+        if self.typed:
+            return self._typed_order(response)
         return response
 
     def place_trigger_limit_order(self, pair, desicion, position_side, price, volume, trigger_price,
@@ -463,21 +712,17 @@ class BingxAPI(object):
             workingType Trigger price type for stopPrice: MARK_PRICE, CONTRACT_PRICE, INDEX_PRICE, default is MARK_PRICE
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
-        if tp != "NULL":
-            tp = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {tp},"price": {tp},"workingType":"MARK_PRICE"' + "}"
-        if sl != "NULL":
-            sl = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {sl},"price": {sl},"workingType":"MARK_PRICE"' + "}"
-        parameters = self.__generate_params(symbol=pair, type="TRIGGER_LIMIT", side=desicion,
-                                            positionSide=position_side, price=price, quantity=volume,
-                                            stopPrice=trigger_price, takeProfit=tp, stopLoss=sl,
-                                            workingType=trigger_price_type, timestamp=self.get_timestamp(),
-                                            clientOrderID=client_order_id, timeInForce=time_in_force,
-                                            recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        volume, price = self._check_order(pair, volume, price)
+        trigger_price = self._round_price(pair, trigger_price)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = self._request("place_order", symbol=pair, type="TRIGGER_LIMIT", side=desicion,
+                                 positionSide=position_side, price=price, quantity=volume, stopPrice=trigger_price,
+                                 takeProfit=tp, stopLoss=sl, workingType=trigger_price_type,
+                                 clientOrderID=client_order_id, timeInForce=time_in_force)
         # data = response["data"]
+        if self.typed:
+            return self._typed_order(response)
         return response
 
     def place_trailing_stop_order(self, pair, desicion, position_side, volume, price="NULL", price_rate="NULL",
@@ -495,18 +740,16 @@ class BingxAPI(object):
         :param time_in_force: PostOnly(Cancel if it can be filled immediately), GTC(Execute or manually cancel), IOC(Cancel any part that's not immediately filled), and FOK(Fill or Kill)
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
         if price == "NULL" and price_rate == "NULL":
             raise ValueError("[!] EITHER PRICE OR PRICE_RATE MUST BE SET.")
-        parameters = self.__generate_params(symbol=pair, type="TRAILING_STOP_MARKET", side=desicion,
-                                            positionSide=position_side, quantity=volume, price=price,
-                                            priceRate=price_rate,
-                                            timestamp=self.get_timestamp(), clientOrderID=client_order_id,
-                                            timeInForce=time_in_force, recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        volume, _ = self._check_order(pair, volume)
+        price = self._round_price(pair, price)
+        response = self._request("place_order", symbol=pair, type="TRAILING_STOP_MARKET", side=desicion,
+                                 positionSide=position_side, quantity=volume, price=price, priceRate=price_rate,
+                                 clientOrderID=client_order_id, timeInForce=time_in_force)
         # data = response["data"]
+        if self.typed:
+            return self._typed_order(response)
         return response
 
     def place_test_order(self, trade_type, pair, desicion, position_side, price, volume, stop_price, priceRate, sl, tp,
@@ -532,37 +775,51 @@ class BingxAPI(object):
         :param time_in_force: PostOnly(Cancel if it can be filled immediately), GTC(Execute or manually cancel), IOC(Cancel any part that's not immediately filled), and FOK(Fill or Kill)
         :return: Order details
         """
-        path = "/openApi/swap/v2/trade/order/test"
-        url = self.ROOT_URL + path
-        if tp != "NULL":
-            tp = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {tp},"price": {tp},"workingType":"MARK_PRICE"' + "}"
-        if sl != "NULL":
-            sl = "{" + f'"type": "TAKE_PROFIT_MARKET", "quantity": {volume},"stopPrice": {sl},"price": {sl},"workingType":"MARK_PRICE"' + "}"
-        parameters = self.__generate_params(symbol=pair, type=trade_type, side=desicion, positionSide=position_side,
-                                            price=price, quantity=volume, stopPrice=stop_price, price_rate=priceRate,
-                                            stopLoss=sl, takeProfit=tp, workingType=working_type,
-                                            timestamp=self.get_timestamp(), clientOrderID=client_order_id,
-                                            timeInForce=time_in_force)
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        tp = self._attached_order(tp, volume)
+        sl = self._attached_order(sl, volume)
+        response = self._request("test_order", symbol=pair, type=trade_type, side=desicion, positionSide=position_side,
+                                 price=price, quantity=volume, stopPrice=stop_price, priceRate=priceRate, stopLoss=sl,
+                                 takeProfit=tp, workingType=working_type, clientOrderID=client_order_id,
+                                 timeInForce=time_in_force)
         # data = response["data"]
         return response
 
-    def place_bulk_order(self):
-        # To be implemented
-        path = "/openApi/swap/v2/trade/batchOrders"
-        url = self.ROOT_URL + path
-        raise NotImplementedError
+    def place_bulk_order(self, orders, max_workers=4):
+        """
+        APIKEY must have 'perpetual futures trading' permission for this to work.
+        Places any number of orders. They are sent in chunks of 5, the most batchOrders accepts, and the chunks are
+        submitted concurrently, each signed once.
+
+        :param orders: List of dicts of order parameters as sent to the order endpoint, i.e.
+            {"symbol": "BTC-USDT", "type": "LIMIT", "side": "BUY", "positionSide": "LONG", "price": 26000, "quantity": 0.01}
+            Values set to "NULL" are left out. Orders without a clientOrderID are given a random one. With a
+            contract catalog quantities and prices are rounded and checked like for the single order calls.
+        :param max_workers: Maximum number of chunks in flight at the same time
+        :return: One entry per order, in the order given: the order as returned by the exchange, or a
+            bingx.exceptions.BingxAPIError if it was rejected. Orders the answer does not mention get a
+            bingx.exceptions.OrderOutcomeUnknown. If a chunk's request failed on the way (timeout, HTTP error) its
+            orders get that exception. Both may or may not have been placed, query them by clientOrderID.
+        """
+        # Checked before anything is sent, an invalid order raises ValueError like it does for the single order calls.
+        orders = with_client_ids([self._check_bulk_order(order) for order in orders])
+        chunks = chunked(orders, MAX_BATCH_ORDERS)
+
+        def submit(chunk):
+            try:
+                return self._request("batch_orders", batchOrders=batch_orders_param(chunk))
+            except Exception as e:
+                return e
+
+        responses = self.map_concurrently(submit, chunks, max_workers)
+        return list(chain.from_iterable(order_results(chunk, response) for chunk, response in zip(chunks, responses)))
 
     def close_all_positions(self):
         """
             Closes any open position based on Market price.
         """
-        path = "/openApi/swap/v2/trade/closeAllPositions"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(timestamp=self.get_timestamp(), recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        response = self._request("close_all_positions")
+        if response.get("code") != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
         data = response["data"]
         return data
 
@@ -570,45 +827,39 @@ class BingxAPI(object):
         """
         Cancel an order that is currently in an unfilled state
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(orderId=order_id, symbol=pair, clientOrderID=client_order_id,
-                                            timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("cancel_order", orderId=order_id, symbol=pair, clientOrderID=client_order_id)
         # data = response["data"]
         return response
 
     def cancel_all_orders_of_symbol(self, pair):
-        path = "/openApi/swap/v2/trade/allOpenOrders"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._delete(url, body)
+        response = self._request("cancel_all_orders", symbol=pair)
+        if response.get("code") != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
         data = response["data"]
         return data
 
-    def cancel_batch_orders(self, pair, orderid_list="NULL", client_orderID_list="NULL"):
+    def cancel_batch_orders(self, pair, orderid_list="NULL", client_orderID_list="NULL", max_workers=4):
         """
-        orderIdList              LIST < int64 >      order number up to 10 orders in a list [1234567, 2345678]
-        ClientOrderIDList        LIST < string >     Customized order ID for users, up to 10 orders[1234567, 2345678]
+        orderIdList              LIST < int64 >      order numbers [1234567, 2345678]
+        ClientOrderIDList        LIST < string >     Customized order IDs for users [1234567, 2345678]
+        Lists of any length are cancelled in concurrent requests of up to 10 IDs each.
+        Returns {"success": [...], "failed": [...]} for all of them.
         """
-        path = "/openApi/swap/v2/trade/batchOrders"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(ClientOrderIDList=client_orderID_list, orderIdList=orderid_list,
-                                            symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._delete(url, body)
-        data = response["data"]
-        return data
+        chunks = cancel_chunks(orderid_list, client_orderID_list)
+
+        def submit(chunk):
+            try:
+                return self._request("cancel_batch_orders", symbol=pair, **cancel_params(chunk))
+            except Exception as e:
+                return e
+
+        return merge_cancel_results(chunks, self.map_concurrently(submit, chunks, max_workers))
 
     def query_pending_orders(self, pair="NULL"):
-        path = "/openApi/swap/v2/trade/openOrders"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("open_orders", symbol=pair)
         data = response["data"]
+        if self.typed:
+            return Orders.from_rows((data or {}).get("orders"))
         return data
 
     def query_order(self, pair, order_id="NULL", client_order_id="NULL"):
@@ -619,21 +870,14 @@ class BingxAPI(object):
         Filled	        Order is Filled
         Failed	        Order is Failed
         """
-        path = "/openApi/swap/v2/trade/order"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(clientOrderID=client_order_id, orderId=order_id, symbol=pair,
-                                            timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("query_order", clientOrderID=client_order_id, orderId=order_id, symbol=pair)
+        if self.typed:
+            return self._typed_order(response)
         data = response["data"]
         return data
 
     def get_margin_mode(self, pair):
-        path = "/openApi/swap/v2/trade/marginType"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("get_margin_type", symbol=pair)
         data = response["data"]["marginType"]
         return data
 
@@ -646,27 +890,16 @@ class BingxAPI(object):
         """
         if mode not in ["ISOLATED", "CROSSED"]:
             raise ValueError("[!] INVALID VALUE FOR MODE. Mode should be either ISOLATED or CROSSED")
-        path = "/openApi/swap/v2/trade/marginType"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(marginType=mode, symbol=pair,
-                                            timestamp=self.get_timestamp(), recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        response = self._request("set_margin_type", marginType=mode, symbol=pair)
         if response["code"] == '0':
             return f"Margin mode for {pair} was set to {mode}."
 
     def get_levarage(self, pair):
-        path = "/openApi/swap/v2/trade/leverage"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("get_leverage", symbol=pair)
         data = response["data"]
         return data
 
     def set_levarage(self, pair, position_side, amount):
-        path = "/openApi/swap/v2/trade/leverage"
-        url = self.ROOT_URL + path
         valid_ask = ['ASK', 'Ask', 'ask', 'short', 'Short', 'SHORT']
         valid_bid = ['BID', 'Bid', 'bid', 'long', 'Long', 'LONG']
         if position_side in valid_ask:
@@ -675,10 +908,7 @@ class BingxAPI(object):
             position_side = "LONG"
         else:
             raise ValueError("[!] INVALID VALUE FOR POSITION SIDE")
-        parameters = self.__generate_params(leverage=amount, side=position_side, symbol=pair,
-                                            timestamp=self.get_timestamp(), recvWindow="10000")
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._post(url, body)
+        response = self._request("set_leverage", leverage=amount, side=position_side, symbol=pair)
         data = response["data"]
         return data
 
@@ -691,36 +921,82 @@ class BingxAPI(object):
         If "autoCloseType" is not passed, both forced liquidation orders and ADL liquidation orders will be returned
         If "startTime" is not passed, only the data within 7 days before "endTime" will be returned
         """
-        path = "/openApi/swap/v2/trade/forceOrders"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(autoCloseType=auto_close_type, endTime=end_timestamp, limit=limit,
-                                            startTime=start_timestamp, symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("force_orders", autoCloseType=auto_close_type, endTime=end_timestamp, limit=limit,
+                                 startTime=start_timestamp, symbol=pair)
         data = response["data"]
+        if self.typed:
+            return Orders.from_rows((data or {}).get("orders"))
         return data
 
     def query_orders_history(self, pair, limit=500, order_id="NULL", start_timestamp="NULL", end_timestamp="NULL"):
         # The maximum query time range shall not exceed 7 days
         # Query data within the last 7 days by default
         # limit is: number of result sets to return //Default: 500 //Maximum: 1000
-        path = "/openApi/swap/v2/trade/allOrders"
-        url = self.ROOT_URL + path
-        parameters = self.__generate_params(endTime=end_timestamp, limit=limit, orderId=order_id,
-                                            startTime=start_timestamp, symbol=pair, timestamp=self.get_timestamp())
-        body = self.__generate_params(params=parameters, signature=self.__sign_hex(parameters))
-        response = self._get(url, body)
+        response = self._request("all_orders", endTime=end_timestamp, limit=limit, orderId=order_id,
+                                 startTime=start_timestamp, symbol=pair)
         data = response["data"]
+        if self.typed:
+            return Orders.from_rows((data or {}).get("orders"))
         return data
 
-    def query_transactional_order_history(self):
-        # To be implemented
-        path = "/openApi/swap/v2/trade/allFillOrders"
-        url = self.ROOT_URL + path
-        raise NotImplementedError
+    def query_transactional_order_history(self, pair="NULL", start_timestamp="NULL", end_timestamp="NULL",
+                                          order_id="NULL", trading_unit="COIN", limit=MAX_FILLS_LIMIT, prefetch=1):
+        """
+        Fills of [start_timestamp, end_timestamp) as a generator, walked 7 day window by 7 day window with the next
+        page downloaded in the background. Every page is followed by a request from the time of its last fill until an
+        empty page or one shorter than an earlier page comes back, so busy windows are not cut off even if the
+        exchange returns fewer than limit fills per request. Write them to a file with bingx.history.HistoryWriter and
+        FILL_FIELDS.
+
+        :param pair: Symbol i.e. BTC-USDT, every symbol if "NULL"
+        :param start_timestamp: Epoch milliseconds, inclusive. Defaults to 7 days before end_timestamp.
+        :param end_timestamp: Epoch milliseconds, exclusive. Defaults to now.
+        :param order_id: Only the fills of this order
+        :param trading_unit: "COIN" for volumes in coins, "CONT" for volumes in contracts
+        :param limit: Most fills the exchange is assumed to return per request
+        :param prefetch: Pages downloaded ahead of the consumer, 0 to only download when asked
+        """
+        start_timestamp, end_timestamp = default_range(start_timestamp, end_timestamp, get_system_time())
+
+        def pages():
+            for start, end in split_time_windows(start_timestamp, end_timestamp):
+                cursor = TimeCursor(start, end, limit, fill_identity, "filledTm", fill_time, exact_limit=False)
+                while not cursor.done:
+                    response = self._request("all_fill_orders", symbol=pair, orderId=order_id,
+                                             tradingUnit=trading_unit, startTs=cursor.start, endTs=end - 1)
+                    yield cursor.feed(page_rows(response, "fill_orders"))
+
+        return (row for page in prefetched(pages(), prefetch) for row in page)
 
     def adjust_isolated_margin(self):
-        # To be implemented
-        path = "/openApi/swap/v2/trade/positionMargin"
-        url = self.ROOT_URL + path
+        # To be implemented with ENDPOINTS["position_margin"]
         raise NotImplementedError
+
+    # User Data Stream:
+
+    @staticmethod
+    def _listen_key(response):
+        # The exchange answers {"listenKey": ...} without the usual code and data envelope.
+        if response.get("code", 0) != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
+        return response.get("listenKey") or (response.get("data") or {}).get("listenKey")
+
+    def create_listen_key(self):
+        """
+        Creates a listen key for the user data stream, see bingx.user_stream.UserDataStream. It is valid for 60
+        minutes unless extended.
+        """
+        return self._listen_key(self._request("create_listen_key"))
+
+    def extend_listen_key(self, listen_key):
+        """
+        Extends the validity of listen_key to 60 minutes from now.
+        """
+        response = self._request("extend_listen_key", listenKey=listen_key)
+        if response.get("code", 0) != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
+        return response
+
+    def delete_listen_key(self, listen_key):
+        response = self._request("delete_listen_key", listenKey=listen_key)
+        return response
@@ -0,0 +1,618 @@
+import asyncio
+import urllib.error
+from itertools import chain
+
+from .api import BingxAPI
+from .batch import (MAX_BATCH_ORDERS, batch_orders_param, cancel_chunks, cancel_params, chunked,
+                    merge_cancel_results, order_results, with_client_ids)
+from .endpoints import ENDPOINTS, build_query
+from .exceptions import BingxAPIError
+from .history import (INCOME_FIELDS, MAX_FILLS_LIMIT, HistoryWriter, TimeCursor, default_range, fill_identity,
+                      fill_time, page_rows, prefetched_async, split_time_windows)
+from .klines import MAX_KLINE_LIMIT, VALID_INTERVALS, Klines, split_windows
+from .metrics import current_timings
+from .models import Orders, Positions, Trades
+from .orderbook import OrderBook
+from .pricing import Quote
+from .ratelimit import THROTTLE_CODES
+from .snapshots import FUNDING_FIELDS, PRICE_FIELDS, TICKER_FIELDS, Snapshot
+from .transport import AsyncHTTPTransport
+from .utilities import get_system_time
+
+
+class AsyncBingxAPI(BingxAPI):
+    """
+    asyncio version of BingxAPI. Every public method of BingxAPI is available here as a coroutine with the same
+    parameters and return value (the history generators as async generators), and requests go through a non-blocking
+    keep-alive connection pool so a single event loop can keep hundreds of requests in flight:
+
+        bingx = AsyncBingxAPI(API_KEY, SECRET_KEY)
+        prices = await asyncio.gather(*(bingx.get_latest_price(pair) for pair in pairs))
+        await bingx.close()
+    """
+
+    def __init__(self, api_key, secret_key, timestamp="local", transport=None, cache=None, contracts=None,
+                 rate_limiter=None, policy=None, instrumentation=None, decoder="auto", lazy=False, typed=False,
+                 account=None, price_source=None):
+        """
+        :param api_key: Your API key
+        :param secret_key: Your secret key
+        :param timestamp: "local", "server" or "offset", see BingxAPI
+        :param transport: A bingx.transport.AsyncHTTPTransport to send requests with.
+        :param cache: A bingx.cache.MarketDataCache shared by the premiumIndex, ticker and bookTicker functions.
+        :param contracts: A bingx.contracts.ContractCatalog to validate orders with, see BingxAPI.
+        :param rate_limiter: A bingx.ratelimit.RateLimiter to pace requests with, see BingxAPI.
+        :param policy: A bingx.policy.RequestPolicy for deadlines, retries and hedging, see BingxAPI.
+        :param instrumentation: A bingx.metrics.Instrumentation to record request timings with, see BingxAPI.
+        :param decoder: JSON backend to decode responses with, see BingxAPI.
+        :param lazy: Return responses as bingx.decoding.LazyResponse, see BingxAPI.
+        :param typed: Return orders, positions, trades and candles as bingx.models classes, see BingxAPI.
+        :param account: A bingx.account.AccountMirror to keep up to date, see BingxAPI. Start it with
+            await account.start_async().
+        :param price_source: A bingx.pricing.BookTickerSource to price "BBO" limit orders from, see BingxAPI.
+        """
+        super().__init__(api_key, secret_key, timestamp=timestamp,
+                         transport=transport if transport is not None else AsyncHTTPTransport(), cache=cache,
+                         contracts=contracts, rate_limiter=rate_limiter,
+                         policy=policy, instrumentation=instrumentation, decoder=decoder, lazy=lazy,
+                         typed=typed, account=account, price_source=price_source)
+        self.__clock_sync = None
+
+    async def close(self):
+        if self.clock is not None:
+            self.clock.stop()
+        if self.account is not None:
+            self.account.stop()
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _post(self, url, body, timeout=None):
+        response = await self.transport.request("POST", url, body=body.encode("utf-8"), headers=self.HEADERS,
+                                                timeout=timeout)
+        return self._decode(response)
+
+    async def _delete(self, url, params, timeout=None):
+        if params != "":
+            url = url + "?" + params
+        response = await self.transport.request("DELETE", url, headers=self.HEADERS, timeout=timeout)
+        return self._decode(response)
+
+    async def _put(self, url, params, timeout=None):
+        if params != "":
+            url = url + "?" + params
+        response = await self.transport.request("PUT", url, headers=self.HEADERS, timeout=timeout)
+        return self._decode(response)
+
+    async def _get(self, url, params, timeout=None):
+        if params != "":
+            url = url + "?" + params
+        response = await self.transport.request("GET", url, headers=self.HEADERS, timeout=timeout)
+        return self._decode(response)
+
+    async def _send(self, endpoint, query):
+        if self.policy is None:
+            return await self._attempt(endpoint, query)
+        return await self.policy.run_async(endpoint, query, lambda timeout: self._attempt(endpoint, query, timeout))
+
+    async def _attempt(self, endpoint, query, timeout=None):
+        if self.instrumentation is None:
+            return await self._exchange(endpoint, query, timeout)
+        timings = self.instrumentation.start(endpoint)
+        try:
+            response = await self._exchange(endpoint, query, timeout)
+        except BaseException as e:
+            self.instrumentation.finish(timings, e)
+            raise
+        timings.code = response.get("code")
+        self.instrumentation.finish(timings)
+        return response
+
+    async def _exchange(self, endpoint, query, timeout=None):
+        timings = current_timings()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(endpoint.group, endpoint.priority, endpoint.weight)
+            if timings is not None:
+                timings.mark("queue")
+        if endpoint.signed:
+            query = self.signer.sign_query(endpoint, query, await self.get_timestamp(endpoint.priority))
+            if timings is not None:
+                timings.mark("sign")
+        url = self.ROOT_URL + endpoint.path
+        try:
+            if endpoint.method == "POST":
+                response = await self._post(url, query, timeout)
+            elif endpoint.method == "DELETE":
+                response = await self._delete(url, query, timeout)
+            elif endpoint.method == "PUT":
+                response = await self._put(url, query, timeout)
+            else:
+                response = await self._get(url, query, timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 and self.rate_limiter is not None:
+                self.rate_limiter.throttled(endpoint.group, e.headers.get("Retry-After"))
+            raise
+        if self.rate_limiter is not None and response.get("code") in THROTTLE_CODES:
+            self.rate_limiter.throttled(endpoint.group)
+        return response
+
+    async def _request(self, name, **params):
+        endpoint = ENDPOINTS[name]
+        response = await self._send(endpoint, build_query(endpoint, params))
+        if self.account is not None:
+            self.account.apply(name, params, response)
+        return response
+
+    async def request(self, name, **params):
+        return await self._request(name, **params)
+
+    async def _cached_request(self, name, **params):
+        endpoint = ENDPOINTS[name]
+        query = build_query(endpoint, params)
+        if self.cache is None:
+            return await self._send(endpoint, query)
+        return await self.cache.get_async(endpoint.path, query, lambda: self._send(endpoint, query))
+
+    async def map_concurrently(self, function, items, max_workers):
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def run(item):
+            async with semaphore:
+                return await function(item)
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+    async def _check_order(self, pair, volume, price="NULL"):
+        if self.contracts is None:
+            return volume, price
+        await self.contracts.ensure_fresh_async(pair)
+        return self.contracts.validate_order(pair, volume, price)
+
+    async def _check_bulk_order(self, order):
+        if self.contracts is None:
+            return order
+        pair = order.get("symbol")
+        quantity, price = await self._check_order(pair, order.get("quantity"), order.get("price", "NULL"))
+        stop_price = self._round_price(pair, order.get("stopPrice", "NULL"))
+        return dict(order, quantity=quantity, price=price, stopPrice=stop_price)
+
+    async def _account_state(self):
+        balance, positions, orders = await asyncio.gather(self._request("balance"), self._request("positions"),
+                                                          self._request("open_orders"))
+        return {"balance": balance, "positions": positions, "orders": orders}
+
+    async def _get_server_time(self, priority=None):
+        endpoint = ENDPOINTS["server_time"]
+        if priority is not None and priority < endpoint.priority:
+            # Asked for to sign a request, so it queues with that request instead of behind market data polls.
+            endpoint = endpoint._replace(priority=priority)
+        response = await self._send(endpoint, build_query(endpoint, {}))
+        return str(response["data"]["serverTime"])
+
+    async def get_timestamp(self, priority=None):
+        if self.timestamp == "local":
+            return get_system_time()
+        elif self.timestamp == "server":
+            return await self._get_server_time(priority)
+        elif self.timestamp == "offset":
+            await self.__synchronize_clock()
+            return str(self.clock.now())
+        else:
+            raise ValueError("[!] INVALID VALUE FOR TIMESTAMP WAS INITIATED.")
+
+    async def __synchronize_clock(self):
+        if not self.clock.synchronized:
+            if self.__clock_sync is None:
+                self.__clock_sync = asyncio.ensure_future(self.clock.measure_async())
+            try:
+                await asyncio.shield(self.__clock_sync)
+            except Exception:
+                self.__clock_sync = None
+                raise
+            self.clock.start_async()
+
+    async def get_clock_skew(self):
+        if self.clock is None:
+            raise ValueError("[!] CLOCK SKEW IS ONLY TRACKED WITH timestamp=\"offset\".")
+        await self.__synchronize_clock()
+        return self.clock.skew()
+
+    # Market Data:
+
+    async def get_all_contracts(self):
+        response = await self._request("contracts")
+        return response["data"]
+
+    async def get_latest_price(self, pair):
+        response = await self._request("price", symbol=pair)
+        return response["data"]["price"]
+
+    async def get_market_depth(self, pair, limit="NULL"):
+        response = await self._request("depth", symbol=pair, limit=limit)
+        return response["data"]
+
+    async def get_order_book(self, pair, limit="NULL"):
+        return OrderBook.from_depth(await self.get_market_depth(pair, limit))
+
+    async def get_latest_trade(self, pair):
+        response = await self._request("trades", symbol=pair)
+        if self.typed:
+            return Trades.from_rows(response["data"])
+        return response["data"]
+
+    async def get_latest_funding(self, pair):
+        response = await self._cached_request("premium_index", symbol=pair)
+        return response["data"]["lastFundingRate"]
+
+    async def get_index_price(self, pair):
+        response = await self._cached_request("premium_index", symbol=pair)
+        return response["data"]["indexPrice"]
+
+    async def get_market_price(self, pair):
+        response = await self._cached_request("premium_index", symbol=pair)
+        return response["data"]["markPrice"]
+
+    async def get_funding_history(self, pair):
+        response = await self._request("funding_rate", symbol=pair)
+        return response["data"]
+
+    async def get_kline_data(self, pair, interval, start_timestamp="NULL", end_timestamp="NULL", limit="NULL"):
+        if str(interval) not in VALID_INTERVALS:
+            raise ValueError("[!] INVALID INTERVAL VALUE. Valid Intervals are: ", str(VALID_INTERVALS))
+        response = await self._request("klines", symbol=pair, interval=interval, startTime=start_timestamp,
+                                       endTime=end_timestamp, limit=limit)
+        if self.typed:
+            return Klines.from_rows(response["data"])
+        return response["data"]
+
+    async def get_kline_history(self, pair, interval, start_timestamp, end_timestamp, max_workers=4):
+        windows = split_windows(start_timestamp, end_timestamp, interval)
+
+        async def fetch(window):
+            response = await self._request("klines", symbol=pair, interval=interval, startTime=window[0],
+                                           endTime=window[1] - 1, limit=MAX_KLINE_LIMIT)
+            return response["data"]
+
+        pages = await self.map_concurrently(fetch, windows, max_workers)
+        return Klines.from_rows(chain.from_iterable(pages), int(start_timestamp), int(end_timestamp))
+
+    async def get_open_positions(self, pair):
+        response = await self._request("open_interest", symbol=pair)
+        return response["data"]
+
+    async def get_tiker(self, pair):
+        response = await self._cached_request("ticker", symbol=pair)
+        return response["data"]
+
+    async def get_all_prices(self):
+        response = await self._request("price")
+        return Snapshot.from_rows(response["data"], PRICE_FIELDS)
+
+    async def get_all_tickers(self):
+        response = await self._cached_request("ticker")
+        return Snapshot.from_rows(response["data"], TICKER_FIELDS)
+
+    async def get_all_funding(self):
+        response = await self._cached_request("premium_index")
+        return Snapshot.from_rows(response["data"], FUNDING_FIELDS)
+
+    async def get_current_optimal_price(self, pair):
+        response = await self._cached_request("book_ticker", symbol=pair)
+        best_bid = response["data"]["book_ticker"]["bid_price"]
+        best_offer = response["data"]["book_ticker"]["ask_price"]
+        return [best_offer, best_bid]
+
+    async def get_best_bid_offer(self, pair):
+        if self.price_source is not None:
+            quote = self.price_source.quote(pair)
+            if quote is not None:
+                return quote
+        best_offer, best_bid = await self.get_current_optimal_price(pair)
+        if self.price_source is not None:
+            self.price_source.record(pair, "rest")
+        return Quote(best_bid, best_offer, "rest", 0.0)
+
+    # Account Data:
+
+    async def get_perpetual_balance(self):
+        return await self._request("balance")
+
+    async def get_my_perpetual_swap_positions(self, pair="NULL"):
+        response = await self._request("positions", currency=pair)
+        data = response["data"]
+        if self.typed:
+            return Positions.from_rows(data)
+        if not data:
+            return "You have no open positions!"
+        return data
+
+    async def get_capital_flow(self, pair="NULL", income_type="NULL", start_timestamp="NULL", end_timestamp="NULL",
+                               limit=1000, prefetch=1):
+        """
+        Async generator of income records, see BingxAPI.get_capital_flow: async for record in get_capital_flow().
+        """
+        start_timestamp, end_timestamp = default_range(start_timestamp, end_timestamp, get_system_time())
+
+        async def pages():
+            for start, end in split_time_windows(start_timestamp, end_timestamp):
+                cursor = TimeCursor(start, end, limit, "tranId")
+                while not cursor.done:
+                    response = await self._request("income", symbol=pair, incomeType=income_type,
+                                                   startTime=cursor.start, endTime=end - 1, limit=limit)
+                    yield cursor.feed(page_rows(response))
+
+        async for page in prefetched_async(pages(), prefetch):
+            for record in page:
+                yield record
+
+    async def export_fund_flow(self, path, pair="NULL", income_type="NULL", start_timestamp="NULL",
+                               end_timestamp="NULL", format="csv"):
+        with HistoryWriter(path, INCOME_FIELDS, format) as writer:
+            async for record in self.get_capital_flow(pair, income_type, start_timestamp, end_timestamp):
+                writer.write(record)
+            return writer.count
+
+    async def get_fee_rate(self):
+        response = await self._request("commission_rate")
+        return response["data"]
+
+    # Market Orders:
+
+    async def open_market_order(self, pair, position_side, volume, sl="NULL", tp="NULL", client_order_id="NULL"):
+        if position_side == "LONG":
+            desicion = "BUY"
+        elif position_side == "SHORT":
+            desicion = "SELL"
+        else:
+            raise ValueError("position_side must be either 'SHORT' or 'LONG'")
+        volume, _ = await self._check_order(pair, volume)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = await self._request("place_order", clientOrderID=client_order_id, positionSide=position_side,
+                                       quantity=volume, side=desicion, symbol=pair, type="MARKET", takeProfit=tp,
+                                       stopLoss=sl)
+        if self.typed:
+            return self._typed_order(response)
+        return response["data"]["order"]
+
+    async def close_market_order(self, pair, position_side, volume, client_order_id="NULL"):
+        if position_side == "LONG":
+            desicion = "SELL"
+        elif position_side == "SHORT":
+            desicion = "BUY"
+        else:
+            raise ValueError("position_side must be either 'SHORT' or 'LONG'")
+        volume, _ = await self._check_order(pair, volume)
+        response = await self._request("place_order", clientOrderID=client_order_id, symbol=pair, type="MARKET",
+                                       side=desicion, positionSide=position_side, quantity=volume)
+        if self.typed:
+            return self._typed_order(response)
+        return response
+
+    async def place_trigger_market_order(self, pair, desicion, position_side, trigger_price, volume,
+                                         trigger_price_type="NULL", client_order_id="NULL", time_in_force="NULL",
+                                         tp="NULL", sl="NULL"):
+        volume, trigger_price = await self._check_order(pair, volume, trigger_price)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = await self._request("place_order", symbol=pair, type="TRIGGER_MARKET", side=desicion,
+                                       positionSide=position_side, quantity=volume, stopPrice=trigger_price,
+                                       workingType=trigger_price_type, takeProfit=tp, stopLoss=sl,
+                                       clientOrderID=client_order_id, timeInForce=time_in_force)
+        if self.typed:
+            return self._typed_order(response)
+        return response
+
+    # Limit Orders:
+
+    async def open_limit_order(self, pair, position_side, price, volume, sl="NULL", tp="NULL", client_order_id="NULL"):
+        if position_side == "LONG":
+            desicion = "BUY"
+        elif position_side == "SHORT":
+            desicion = "SELL"
+        else:
+            raise ValueError("position_side must be either 'SHORT' or 'LONG'")
+        if price == "BBO":
+            quote = await self.get_best_bid_offer(pair)
+            price = quote.ask if desicion == "BUY" else quote.bid
+        volume, price = await self._check_order(pair, volume, price)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = await self._request("place_order", clientOrderID=client_order_id, positionSide=position_side,
+                                       quantity=volume, price=price, side=desicion, symbol=pair, type="LIMIT",
+                                       takeProfit=tp, stopLoss=sl)
+        if self.typed:
+            return self._typed_order(response)
+        return response["data"]["order"]
+
+    async def close_limit_order(self, pair, position_side, price, volume, client_order_id="NULL"):
+        if position_side == "LONG":
+            desicion = "SELL"
+        elif position_side == "SHORT":
+            desicion = "BUY"
+        else:
+            raise ValueError("position_side must be either 'SHORT' or 'LONG'")
+        if price == "BBO":
+            quote = await self.get_best_bid_offer(pair)
+            price = quote.ask if desicion == "BUY" else quote.bid
+        volume, price = await self._check_order(pair, volume, price)
+        response = await self._request("place_order", clientOrderID=client_order_id, symbol=pair, type="LIMIT",
+                                       side=desicion, positionSide=position_side, price=price, quantity=volume)
+        if self.typed:
+            return self._typed_order(response)
+        return response
+
+    async def place_trigger_limit_order(self, pair, desicion, position_side, price, volume, trigger_price,
+                                        trigger_price_type="NULL", client_order_id="NULL", time_in_force="NULL",
+                                        tp="NULL", sl="NULL"):
+        volume, price = await self._check_order(pair, volume, price)
+        trigger_price = self._round_price(pair, trigger_price)
+        tp = self._attached_order(self._round_price(pair, tp), volume)
+        sl = self._attached_order(self._round_price(pair, sl), volume)
+        response = await self._request("place_order", symbol=pair, type="TRIGGER_LIMIT", side=desicion,
+                                       positionSide=position_side, price=price, quantity=volume,
+                                       stopPrice=trigger_price, takeProfit=tp, stopLoss=sl,
+                                       workingType=trigger_price_type,
+                                       clientOrderID=client_order_id, timeInForce=time_in_force)
+        if self.typed:
+            return self._typed_order(response)
+        return response
+
+    async def place_trailing_stop_order(self, pair, desicion, position_side, volume, price="NULL", price_rate="NULL",
+                                        client_order_id="NULL", time_in_force="NULL"):
+        if price == "NULL" and price_rate == "NULL":
+            raise ValueError("[!] EITHER PRICE OR PRICE_RATE MUST BE SET.")
+        volume, _ = await self._check_order(pair, volume)
+        price = self._round_price(pair, price)
+        response = await self._request("place_order", symbol=pair, type="TRAILING_STOP_MARKET", side=desicion,
+                                       positionSide=position_side, quantity=volume, price=price, priceRate=price_rate,
+                                       clientOrderID=client_order_id, timeInForce=time_in_force)
+        if self.typed:
+            return self._typed_order(response)
+        return response
+
+    async def place_test_order(self, trade_type, pair, desicion, position_side, price, volume, stop_price, priceRate,
+                               sl, tp, working_type, client_order_id, time_in_force):
+        tp = self._attached_order(tp, volume)
+        sl = self._attached_order(sl, volume)
+        return await self._request("test_order", symbol=pair, type=trade_type, side=desicion,
+                                   positionSide=position_side, price=price, quantity=volume, stopPrice=stop_price,
+                                   priceRate=priceRate, stopLoss=sl, takeProfit=tp, workingType=working_type,
+                                   clientOrderID=client_order_id, timeInForce=time_in_force)
+
+    async def place_bulk_order(self, orders, max_workers=4):
+        orders = with_client_ids([await self._check_bulk_order(order) for order in orders])
+        chunks = chunked(orders, MAX_BATCH_ORDERS)
+
+        async def submit(chunk):
+            try:
+                return await self._request("batch_orders", batchOrders=batch_orders_param(chunk))
+            except Exception as e:
+                return e
+
+        responses = await self.map_concurrently(submit, chunks, max_workers)
+        return list(chain.from_iterable(order_results(chunk, response) for chunk, response in zip(chunks, responses)))
+
+    async def close_all_positions(self):
+        response = await self._request("close_all_positions")
+        if response.get("code") != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
+        return response["data"]
+
+    async def cancel_order(self, pair, order_id="NULL", client_order_id="NULL"):
+        return await self._request("cancel_order", orderId=order_id, symbol=pair, clientOrderID=client_order_id)
+
+    async def cancel_all_orders_of_symbol(self, pair):
+        response = await self._request("cancel_all_orders", symbol=pair)
+        if response.get("code") != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
+        return response["data"]
+
+    async def cancel_batch_orders(self, pair, orderid_list="NULL", client_orderID_list="NULL", max_workers=4):
+        chunks = cancel_chunks(orderid_list, client_orderID_list)
+
+        async def submit(chunk):
+            try:
+                return await self._request("cancel_batch_orders", symbol=pair, **cancel_params(chunk))
+            except Exception as e:
+                return e
+
+        return merge_cancel_results(chunks, await self.map_concurrently(submit, chunks, max_workers))
+
+    async def query_pending_orders(self, pair="NULL"):
+        response = await self._request("open_orders", symbol=pair)
+        if self.typed:
+            return Orders.from_rows((response["data"] or {}).get("orders"))
+        return response["data"]
+
+    async def query_order(self, pair, order_id="NULL", client_order_id="NULL"):
+        response = await self._request("query_order", clientOrderID=client_order_id, orderId=order_id, symbol=pair)
+        if self.typed:
+            return self._typed_order(response)
+        return response["data"]
+
+    async def get_margin_mode(self, pair):
+        response = await self._request("get_margin_type", symbol=pair)
+        return response["data"]["marginType"]
+
+    async def set_margin_mode(self, pair, mode):
+        if mode not in ["ISOLATED", "CROSSED"]:
+            raise ValueError("[!] INVALID VALUE FOR MODE. Mode should be either ISOLATED or CROSSED")
+        response = await self._request("set_margin_type", marginType=mode, symbol=pair)
+        if response["code"] == '0':
+            return f"Margin mode for {pair} was set to {mode}."
+
+    async def get_levarage(self, pair):
+        response = await self._request("get_leverage", symbol=pair)
+        return response["data"]
+
+    async def set_levarage(self, pair, position_side, amount):
+        valid_ask = ['ASK', 'Ask', 'ask', 'short', 'Short', 'SHORT']
+        valid_bid = ['BID', 'Bid', 'bid', 'long', 'Long', 'LONG']
+        if position_side in valid_ask:
+            position_side = "SHORT"
+        elif position_side in valid_bid:
+            position_side = "LONG"
+        else:
+            raise ValueError("[!] INVALID VALUE FOR POSITION SIDE")
+        response = await self._request("set_leverage", leverage=amount, side=position_side, symbol=pair)
+        return response["data"]
+
+    async def query_force_orders(self, pair, auto_close_type="NULL", start_timestamp="NULL", end_timestamp="NULL",
+                                 limit="NULL"):
+        response = await self._request("force_orders", autoCloseType=auto_close_type, endTime=end_timestamp,
+                                       limit=limit, startTime=start_timestamp, symbol=pair)
+        if self.typed:
+            return Orders.from_rows((response["data"] or {}).get("orders"))
+        return response["data"]
+
+    async def query_orders_history(self, pair, limit=500, order_id="NULL", start_timestamp="NULL",
+                                   end_timestamp="NULL"):
+        response = await self._request("all_orders", endTime=end_timestamp, limit=limit, orderId=order_id,
+                                       startTime=start_timestamp, symbol=pair)
+        if self.typed:
+            return Orders.from_rows((response["data"] or {}).get("orders"))
+        return response["data"]
+
+    async def query_transactional_order_history(self, pair="NULL", start_timestamp="NULL", end_timestamp="NULL",
+                                                order_id="NULL", trading_unit="COIN", limit=MAX_FILLS_LIMIT,
+                                                prefetch=1):
+        """
+        Async generator of fills, see BingxAPI.query_transactional_order_history.
+        """
+        start_timestamp, end_timestamp = default_range(start_timestamp, end_timestamp, get_system_time())
+
+        async def pages():
+            for start, end in split_time_windows(start_timestamp, end_timestamp):
+                cursor = TimeCursor(start, end, limit, fill_identity, "filledTm", fill_time, exact_limit=False)
+                while not cursor.done:
+                    response = await self._request("all_fill_orders", symbol=pair, orderId=order_id,
+                                                   tradingUnit=trading_unit, startTs=cursor.start, endTs=end - 1)
+                    yield cursor.feed(page_rows(response, "fill_orders"))
+
+        async for page in prefetched_async(pages(), prefetch):
+            for fill in page:
+                yield fill
+
+    async def adjust_isolated_margin(self):
+        # To be implemented
+        raise NotImplementedError
+
+    # User Data Stream:
+
+    async def create_listen_key(self):
+        return self._listen_key(await self._request("create_listen_key"))
+
+    async def extend_listen_key(self, listen_key):
+        response = await self._request("extend_listen_key", listenKey=listen_key)
+        if response.get("code", 0) != 0:
+            raise BingxAPIError(response.get("code"), response.get("msg"))
+        return response
+
+    async def delete_listen_key(self, listen_key):
+        response = await self._request("delete_listen_key", listenKey=listen_key)
+        return response
@@ -0,0 +1,109 @@
+import json
+import uuid
+
+from .exceptions import BingxAPIError, OrderOutcomeUnknown
+
+# Most orders /trade/batchOrders accepts in one request and most IDs DELETE /trade/batchOrders accepts.
+MAX_BATCH_ORDERS = 5
+MAX_BATCH_CANCEL = 10
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def order_payload(order):
+    """
+    An order spec for batchOrders: a dict of order parameters (symbol, type, side, positionSide, price, quantity, ...)
+    with "NULL" values left out.
+    """
+    return {key: value for key, value in order.items() if value != "NULL"}
+
+
+def with_client_ids(orders):
+    """
+    Copies of the order specs, each with a clientOrderID: the caller's, or a new random one, so every order of a
+    batch can be found in the answer and looked up later.
+    """
+    return [order if order.get("clientOrderID", "NULL") not in ("NULL", None, "") else
+            dict(order, clientOrderID=uuid.uuid4().hex) for order in orders]
+
+
+def batch_orders_param(orders):
+    return json.dumps([order_payload(order) for order in orders], separators=(",", ":"))
+
+
+def order_results(orders, response):
+    """
+    Maps a batchOrders response back to the orders of the chunk it was sent for: one entry per order, either the
+    order returned by the exchange, a BingxAPIError if it was rejected or an OrderOutcomeUnknown if the answer does
+    not mention it.
+    """
+    if isinstance(response, Exception):
+        return [response] * len(orders)
+    if response.get("code") != 0:
+        return [BingxAPIError(response.get("code"), response.get("msg")) for _ in orders]
+    placed = (response.get("data") or {}).get("orders") or []
+    by_client_id = {}
+    for item in placed:
+        client_id = item.get("clientOrderID") or item.get("clientOrderId")
+        if client_id:
+            by_client_id[str(client_id)] = item
+    results = []
+    for index, order in enumerate(orders):
+        client_id = order.get("clientOrderID", "NULL")
+        item = by_client_id.get(str(client_id))
+        if item is None and len(placed) == len(orders):
+            # Every order came back, in the order they were sent.
+            item = placed[index]
+        if item is None:
+            results.append(OrderOutcomeUnknown(client_id, "order missing from the batchOrders answer"))
+        elif item.get("code"):
+            results.append(BingxAPIError(item["code"], item.get("msg")))
+        else:
+            results.append(item)
+    return results
+
+
+def cancel_chunks(order_ids, client_order_ids):
+    """
+    Splits the IDs to cancel into (parameter name, IDs) chunks of at most MAX_BATCH_CANCEL IDs each.
+    """
+    chunks = []
+    if isinstance(order_ids, str) and order_ids != "NULL":
+        order_ids = json.loads(order_ids)
+    if isinstance(client_order_ids, str) and client_order_ids != "NULL":
+        client_order_ids = json.loads(client_order_ids)
+    if order_ids != "NULL":
+        chunks += [("orderIdList", chunk) for chunk in chunked(list(order_ids), MAX_BATCH_CANCEL)]
+    if client_order_ids != "NULL":
+        chunks += [("ClientOrderIDList", chunk) for chunk in chunked(list(client_order_ids), MAX_BATCH_CANCEL)]
+    return chunks
+
+
+def cancel_params(chunk):
+    name, ids = chunk
+    params = {"orderIdList": "NULL", "ClientOrderIDList": "NULL"}
+    params[name] = json.dumps(ids, separators=(",", ":"))
+    return params
+
+
+def merge_cancel_results(chunks, responses):
+    """
+    Combines the responses of the cancel chunks into a single {"success": [...], "failed": [...]} result.
+    Chunks that failed as a whole list each of their IDs as failed.
+    """
+    merged = {"success": [], "failed": []}
+    for (name, ids), response in zip(chunks, responses):
+        if isinstance(response, Exception):
+            code, msg = None, str(response)
+        elif response.get("code") != 0:
+            code, msg = response.get("code"), response.get("msg")
+        else:
+            data = response.get("data") or {}
+            merged["success"] += data.get("success") or []
+            merged["failed"] += data.get("failed") or []
+            continue
+        key = "orderId" if name == "orderIdList" else "clientOrderID"
+        merged["failed"] += [{key: value, "errorCode": code, "errorMessage": msg} for value in ids]
+    return merged
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+def _succeeded(response):
+    # Exchange errors, throttling among them, are passed to the callers waiting for them but never stored.
+    get = getattr(response, "get", None)
+    return get is None or get("code") == 0
+
+
+class _Flight(object):
+    """
+    A request that is currently being fetched. Callers asking for the same key wait on it instead of fetching again.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MarketDataCache(object):
+    """
+    A small in-memory cache for public market data responses.
+
+    - Every endpoint path has its own time to live, paths missing from ttls use default_ttl.
+    - Concurrent callers asking for the same (path, params) share a single in-flight request.
+    - Only successful responses are stored, answers with a code other than 0 are shared with the callers already
+      waiting for them and fetched again by the next one.
+    - Once max_entries responses are stored the least recently used one is evicted.
+    - hits, misses and coalesced count how requests were served.
+
+    :param ttls: Mapping of endpoint path to time to live in seconds
+    :param default_ttl: Time to live in seconds for paths that are not in ttls
+    :param max_entries: Maximum number of responses kept in memory
+    """
+    DEFAULT_TTLS = {
+        "/openApi/swap/v2/quote/premiumIndex": 1.0,
+        "/openApi/swap/v2/quote/ticker": 1.0,
+        "/openApi/swap/v2/quote/bookTicker": 0.2,
+    }
+
+    def __init__(self, ttls=None, default_ttl=1.0, max_entries=1024, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError("[!] MAX_ENTRIES MUST BE AT LEAST 1.")
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.__entries = OrderedDict()
+        self.__flights = {}
+        self.__async_flights = {}
+        self.__lock = threading.Lock()
+
+    def __lookup(self, key):
+        entry = self.__entries.get(key)
+        if entry is not None:
+            if entry[0] > self.clock():
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            del self.__entries[key]
+        return False, None
+
+    def __store(self, key, value):
+        ttl = self.ttls.get(key[0], self.default_ttl)
+        if ttl <= 0:
+            return
+        self.__entries[key] = (self.clock() + ttl, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+
+    def get(self, path, params, fetch):
+        """
+        Returns the cached response for path and params, or calls fetch() to get it.
+
+        :param path: Endpoint path, used to pick the time to live
+        :param params: Anything hashable that identifies the request apart from its path, e.g. the query string
+        :param fetch: Function without arguments that performs the request
+        """
+        key = (path, params)
+        with self.__lock:
+            found, value = self.__lookup(key)
+            if found:
+                return value
+            flight = self.__flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self.__flights[key] = flight
+                self.misses += 1
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self.__lock:
+                if flight.error is None and _succeeded(flight.result):
+                    self.__store(key, flight.result)
+                del self.__flights[key]
+            flight.done.set()
+        return flight.result
+
+    async def get_async(self, path, params, fetch):
+        """
+        Coroutine version of get(), fetch is a function without arguments that returns an awaitable.
+        """
+        key = (path, params)
+        with self.__lock:
+            found, value = self.__lookup(key)
+            if found:
+                return value
+            future = self.__async_flights.get(key)
+            owner = future is None
+            if owner:
+                future = asyncio.get_running_loop().create_future()
+                self.__async_flights[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return await asyncio.shield(future)
+        try:
+            result = await fetch()
+        except BaseException as error:
+            with self.__lock:
+                del self.__async_flights[key]
+            if isinstance(error, Exception):
+                future.set_exception(error)
+                # Mark the exception as retrieved when nobody else was waiting for it.
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        with self.__lock:
+            if _succeeded(result):
+                self.__store(key, result)
+            del self.__async_flights[key]
+        future.set_result(result)
+        return result
+
+    def invalidate(self, path=None):
+        """
+        Drops every cached response, or only the ones for the given path.
+        """
+        with self.__lock:
+            if path is None:
+                self.__entries.clear()
+            else:
+                for key in [key for key in self.__entries if key[0] == path]:
+                    del self.__entries[key]
+
+    def stats(self):
+        with self.__lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                    "entries": len(self.__entries)}
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+
+class ClockOffsetEstimator(object):
+    """
+    Keeps an estimate of how far the server clock is ahead of the local clock so signed requests can use server time
+    without asking the server for it every time.
+
+    Each measurement asks the server for its time a few times. For every sample the server time is assumed to be read
+    half way through the round trip, the sample with the shortest round trip wins and half of that round trip is the
+    uncertainty of the estimate. After start() the estimate is refreshed in the background every refresh_interval
+    seconds.
+
+    :param fetch_server_time: Function returning the server time in epoch milliseconds (a coroutine function when
+        measure_async or start_async are used)
+    :param samples: Number of round trips per measurement
+    :param refresh_interval: Seconds between background measurements
+    """
+
+    def __init__(self, fetch_server_time, samples=5, refresh_interval=60, clock=time.time):
+        if samples < 1:
+            raise ValueError("[!] SAMPLES MUST BE AT LEAST 1.")
+        self.fetch_server_time = fetch_server_time
+        self.samples = samples
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.offset = None
+        self.uncertainty = None
+        self.updated_at = None
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__task = None
+
+    @property
+    def synchronized(self):
+        return self.offset is not None
+
+    def __local_ms(self):
+        return self.clock() * 1000
+
+    def __update(self, measurements):
+        rtt, offset = min(measurements)
+        self.offset = offset
+        self.uncertainty = rtt / 2
+        self.updated_at = self.clock()
+        return self.offset
+
+    def measure(self):
+        """
+        Measures the offset now and returns it in milliseconds.
+        """
+        measurements = []
+        for _ in range(self.samples):
+            sent = self.__local_ms()
+            server_time = int(self.fetch_server_time())
+            received = self.__local_ms()
+            measurements.append((received - sent, server_time - (sent + received) / 2))
+        return self.__update(measurements)
+
+    async def measure_async(self):
+        """
+        Coroutine version of measure().
+        """
+        measurements = []
+        for _ in range(self.samples):
+            sent = self.__local_ms()
+            server_time = int(await self.fetch_server_time())
+            received = self.__local_ms()
+            measurements.append((received - sent, server_time - (sent + received) / 2))
+        return self.__update(measurements)
+
+    def ensure_synchronized(self):
+        """
+        Measures the offset unless it is already known, then starts the background refresh.
+        """
+        if self.synchronized:
+            return
+        with self.__lock:
+            if not self.synchronized:
+                self.measure()
+                self.start()
+
+    def now(self):
+        """
+        Server time in epoch milliseconds, estimated from the local clock.
+        """
+        return int(self.__local_ms() + self.offset)
+
+    def skew(self):
+        """
+        The current estimate: offset (server minus local) and its uncertainty in milliseconds, and how many seconds ago
+        it was measured.
+        """
+        age = None if self.updated_at is None else self.clock() - self.updated_at
+        return {"offset": self.offset, "uncertainty": self.uncertainty, "age": age}
+
+    def __refresh(self):
+        while not self.__stop.wait(self.refresh_interval):
+            try:
+                self.measure()
+            except Exception:
+                # Keep using the previous estimate, the next refresh will try again.
+                pass
+
+    def start(self):
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__refresh, name="bingx-clock", daemon=True)
+        self.__thread.start()
+
+    async def __refresh_async(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.measure_async()
+            except Exception:
+                pass
+
+    def start_async(self):
+        if self.__task is None:
+            self.__task = asyncio.get_running_loop().create_task(self.__refresh_async())
+
+    def stop(self):
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
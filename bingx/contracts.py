@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+
+
+def _step(precision):
+    return Decimal(1).scaleb(-int(precision))
+
+
+class ContractCatalog(object):
+    """
+    The contract list of get_all_contracts indexed by symbol, so orders can be rounded to the contract's precision
+    and checked against its minimum size before they are signed and sent.
+
+    The list is fetched on first use and again once it is older than ttl seconds. With a path it is also saved to
+    disk and a fresh enough file is used instead of the network on the next start. If a refresh fails while an older
+    list is available, the older list keeps being used. A symbol missing from a refreshed list is not asked for again
+    for missing_ttl seconds, so a misspelled symbol does not fetch the whole list on every order.
+
+    :param fetch_contracts: Function returning the list of contracts (a coroutine function when the *_async methods
+        are used). Set to get_all_contracts of the BingxAPI the catalog is passed to when left out.
+    :param ttl: Seconds a contract list is used before it is fetched again
+    :param path: Optional JSON file to persist the list to
+    :param missing_ttl: Seconds a symbol the last refresh did not list is treated as unknown without refreshing
+    """
+
+    def __init__(self, fetch_contracts=None, ttl=3600, path=None, missing_ttl=60, clock=time.time):
+        self.fetch_contracts = fetch_contracts
+        self.ttl = ttl
+        self.path = path
+        self.missing_ttl = missing_ttl
+        self.clock = clock
+        self.contracts = {}
+        self.updated_at = None
+        self.__missing = {}
+        self.__refreshing = None
+        self.__lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path) as file:
+                saved = json.load(file)
+            self.__index(saved["contracts"], saved["updated_at"])
+
+    @property
+    def fresh(self):
+        return self.updated_at is not None and self.clock() - self.updated_at < self.ttl
+
+    def __index(self, contracts, updated_at):
+        self.contracts = {contract["symbol"]: contract for contract in contracts or []}
+        self.updated_at = updated_at
+        self.__missing = {}
+
+    def __store(self, contracts):
+        self.__index(contracts, self.clock())
+        if self.path is not None:
+            with open(self.path + ".tmp", "w") as file:
+                json.dump({"updated_at": self.updated_at, "contracts": contracts}, file)
+            os.replace(self.path + ".tmp", self.path)
+
+    def refresh(self):
+        self.__store(self.fetch_contracts())
+
+    async def refresh_async(self):
+        self.__store(await self.fetch_contracts())
+
+    def __needs_refresh(self, symbol):
+        if not self.fresh:
+            return True
+        # A symbol that is not known yet may have been listed since the last refresh.
+        if symbol is None or symbol in self.contracts:
+            return False
+        missed = self.__missing.get(symbol)
+        return missed is None or self.clock() - missed >= self.missing_ttl
+
+    def __missed(self, symbol):
+        if symbol is not None and symbol not in self.contracts:
+            self.__missing[symbol] = self.clock()
+
+    def ensure_fresh(self, symbol=None):
+        """
+        Refreshes the list if it is too old or does not contain symbol.
+        """
+        if not self.__needs_refresh(symbol):
+            return
+        with self.__lock:
+            if not self.__needs_refresh(symbol):
+                return
+            try:
+                self.refresh()
+            except Exception:
+                if not self.contracts:
+                    raise
+            self.__missed(symbol)
+
+    async def ensure_fresh_async(self, symbol=None):
+        if not self.__needs_refresh(symbol):
+            return
+        # Callers arriving while a refresh runs wait for it instead of starting their own.
+        refreshing = self.__refreshing
+        if refreshing is None:
+            refreshing = self.__refreshing = asyncio.ensure_future(self.refresh_async())
+        try:
+            await asyncio.shield(refreshing)
+        except Exception:
+            if not self.contracts:
+                raise
+        finally:
+            if self.__refreshing is refreshing and refreshing.done():
+                self.__refreshing = None
+        self.__missed(symbol)
+
+    def get(self, symbol):
+        """
+        The contract of symbol as returned by get_all_contracts, without refreshing.
+        """
+        try:
+            return self.contracts[symbol]
+        except KeyError:
+            raise ValueError("[!] UNKNOWN SYMBOL " + str(symbol) + ".")
+
+    def round_quantity(self, symbol, quantity):
+        """
+        quantity rounded down to the contract's quantityPrecision, as a string.
+        """
+        step = _step(self.get(symbol)["quantityPrecision"])
+        return format(Decimal(str(quantity)).quantize(step, rounding=ROUND_DOWN), "f")
+
+    def round_price(self, symbol, price):
+        """
+        price rounded to the nearest tick of the contract's pricePrecision, as a string.
+        """
+        step = _step(self.get(symbol)["pricePrecision"])
+        return format(Decimal(str(price)).quantize(step, rounding=ROUND_HALF_UP), "f")
+
+    def validate_order(self, symbol, quantity, price="NULL"):
+        """
+        Rounds quantity and price (if given) and checks them against the contract. Returns the rounded
+        (quantity, price) as strings or raises ValueError without anything being sent.
+        """
+        contract = self.get(symbol)
+        if str(contract.get("status", 1)) != "1":
+            raise ValueError("[!] " + symbol + " IS NOT TRADING.")
+        quantity = self.round_quantity(symbol, quantity)
+        if Decimal(quantity) <= 0:
+            raise ValueError("[!] QUANTITY ROUNDS TO 0 AT THE PRECISION OF " + symbol + ".")
+        minimum = contract.get("tradeMinQuantity")
+        if minimum is not None and Decimal(quantity) < Decimal(str(minimum)):
+            raise ValueError("[!] QUANTITY " + quantity + " IS BELOW THE MINIMUM OF " + str(minimum) + " FOR " + symbol)
+        if price == "NULL":
+            return quantity, price
+        price = self.round_price(symbol, price)
+        if Decimal(price) <= 0:
+            raise ValueError("[!] PRICE MUST BE POSITIVE.")
+        minimum = contract.get("tradeMinUSDT")
+        if minimum is not None and Decimal(quantity) * Decimal(price) < Decimal(str(minimum)):
+            raise ValueError("[!] ORDER VALUE IS BELOW THE MINIMUM OF " + str(minimum) + " USDT FOR " + symbol)
+        return quantity, price
@@ -0,0 +1,141 @@
+import json
+import re
+from collections.abc import Mapping
+
+
+def _stdlib_loads(data):
+    # json.loads detects the encoding of bytes itself, there is no need to decode them to str first.
+    return json.loads(data)
+
+
+BACKENDS = {"json": _stdlib_loads}
+
+try:
+    import orjson
+    BACKENDS["orjson"] = orjson.loads
+except ImportError:
+    pass
+
+try:
+    import ujson
+    BACKENDS["ujson"] = ujson.loads
+except ImportError:
+    pass
+
+# Fastest first.
+PREFERENCE = ("orjson", "ujson", "json")
+
+
+def get_decoder(backend="auto"):
+    """
+    Returns a function decoding JSON from bytes or str.
+
+    :param backend: "orjson", "ujson", "json" (the standard library), "auto" for the fastest one installed, or a
+        function to use as it is
+    """
+    if callable(backend):
+        return backend
+    if backend == "auto":
+        return next(BACKENDS[name] for name in PREFERENCE if name in BACKENDS)
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError("[!] JSON BACKEND " + str(backend) + " IS NOT INSTALLED. Installed backends are: " +
+                         str(sorted(BACKENDS)))
+
+
+loads = get_decoder()
+
+_KEY = re.compile(rb'\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+_SCALAR = re.compile(rb'(?:-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|"(?:[^"\\]|\\.)*"|true|false|null)\s*([,}])')
+
+
+class LazyResponse(Mapping):
+    """
+    Read-only view of a JSON object response that decodes only what is accessed.
+
+    BingX answers {"code": 0, "msg": "", "data": ...}. The small leading fields are picked out of the body on first
+    access; the value of the last field, which holds the payload, is only decoded when it is asked for. Reading
+    response["code"] therefore costs the same for a 1 MB body as for an empty one. Bodies of any other shape are
+    decoded as a whole on first access.
+
+    :param body: The response body as bytes
+    :param loads: Function decoding JSON from bytes, see get_decoder()
+    """
+    __slots__ = ("body", "loads", "__state")
+
+    def __init__(self, body, loads=loads):
+        self.body = body
+        self.loads = loads
+        # (fields, tail) once scanned, tail being (name, position) of the payload while it is not decoded. Both are
+        # built before the tuple is published and never changed after, so responses shared between threads (i.e. by
+        # MarketDataCache) are never seen half decoded: concurrent readers at worst decode the same part twice.
+        self.__state = None
+
+    def __scan(self):
+        body = self.body
+        position = body.find(b"{")
+        if position < 0 or body[:position].strip():
+            return self.__decode_all()
+        position += 1
+        fields = {}
+        while True:
+            key = _KEY.match(body, position)
+            if key is None:
+                return self.__decode_all()
+            name = key.group(1)
+            name = self.loads(b'"' + name + b'"') if b"\\" in name else name.decode("utf-8")
+            position = key.end()
+            value = _SCALAR.match(body, position)
+            if value is None:
+                # An object or array: assumed to be the last field, confirmed when it is decoded.
+                self.__state = state = (fields, (name, position))
+                return state
+            fields[name] = self.loads(body[position:value.start(1)])
+            position = value.end()
+            if value.group(1) == b"}":
+                self.__state = state = (fields, None)
+                return state
+
+    def __decode_all(self):
+        fields = self.loads(self.body)
+        if not isinstance(fields, dict):
+            raise ValueError("[!] RESPONSE IS NOT A JSON OBJECT.")
+        self.__state = state = (fields, None)
+        return state
+
+    def __decode_tail(self, state):
+        fields, (name, position) = state
+        try:
+            value = self.loads(self.body[position:self.body.rindex(b"}")])
+        except ValueError:
+            # More fields follow the payload.
+            return self.__decode_all()
+        fields = dict(fields)
+        fields[name] = value
+        self.__state = state = (fields, None)
+        return state
+
+    def __getitem__(self, key):
+        state = self.__state or self.__scan()
+        if key not in state[0] and state[1] is not None:
+            state = self.__decode_tail(state)
+        return state[0][key]
+
+    def materialize(self):
+        """
+        The whole response as a dict.
+        """
+        state = self.__state or self.__scan()
+        if state[1] is not None:
+            state = self.__decode_tail(state)
+        return state[0]
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __len__(self):
+        return len(self.materialize())
+
+    def __repr__(self):
+        return "LazyResponse(%d bytes)" % len(self.body)
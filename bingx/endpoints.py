@@ -0,0 +1,149 @@
+import hashlib
+import hmac
+from collections import namedtuple
+
+Endpoint = namedtuple("Endpoint", ["method", "path", "signed", "params", "recv_window", "group", "priority", "weight",
+                                   "idempotent"])
+Endpoint.__doc__ = """
+A BingX REST endpoint.
+
+method       HTTP method
+path         Path below BingxAPI.ROOT_URL
+signed       Whether timestamp and signature have to be added to the request
+params       Names of the parameters the endpoint accepts, in the order they are sent
+recv_window  Whether recvWindow is sent with signed requests
+group        Rate limit group: "market", "account" or "trade"
+priority     PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW, the order queued requests of a group are sent in
+weight       Tokens a request takes from its group's rate limit
+idempotent   Whether sending the same request twice has the same effect as sending it once
+"""
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+_GROUPS = {"server": "market", "quote": "market", "user": "account", "trade": "trade"}
+
+
+def _endpoint(method, path, params=(), signed=False, recv_window=False, priority=None, weight=1, idempotent=None,
+              group=None):
+    # /openApi/swap/v2/<quote|user|trade>/... tells which rate limit group the endpoint belongs to.
+    if group is None:
+        group = _GROUPS[path.split("/")[4]]
+    if priority is None:
+        priority = PRIORITY_LOW if group == "market" else PRIORITY_NORMAL
+    if idempotent is None:
+        idempotent = method != "POST"
+    return Endpoint(method, path, signed, tuple(params), recv_window, group, priority, weight, idempotent)
+
+
+ORDER_PARAMS = ("symbol", "type", "side", "positionSide", "price", "quantity", "stopPrice", "priceRate", "workingType",
+                "takeProfit", "stopLoss", "clientOrderID", "timeInForce")
+
+ENDPOINTS = {
+    "server_time": _endpoint("POST", "/openApi/swap/v2/server/time", idempotent=True),
+
+    # Market Data
+    "contracts": _endpoint("GET", "/openApi/swap/v2/quote/contracts"),
+    "price": _endpoint("GET", "/openApi/swap/v2/quote/price", ["symbol"]),
+    "depth": _endpoint("GET", "/openApi/swap/v2/quote/depth", ["symbol", "limit"]),
+    "trades": _endpoint("GET", "/openApi/swap/v2/quote/trades", ["symbol"]),
+    "premium_index": _endpoint("GET", "/openApi/swap/v2/quote/premiumIndex", ["symbol"]),
+    "funding_rate": _endpoint("GET", "/openApi/swap/v2/quote/fundingRate", ["symbol"]),
+    "klines": _endpoint("GET", "/openApi/swap/v3/quote/klines", ["symbol", "interval", "startTime", "endTime", "limit"]),
+    "open_interest": _endpoint("GET", "/openApi/swap/v2/quote/openInterest", ["symbol"]),
+    "ticker": _endpoint("GET", "/openApi/swap/v2/quote/ticker", ["symbol"]),
+    "book_ticker": _endpoint("GET", "/openApi/swap/v2/quote/bookTicker", ["symbol"], signed=True),
+
+    # Account Data
+    "balance": _endpoint("GET", "/openApi/swap/v2/user/balance", signed=True),
+    "positions": _endpoint("GET", "/openApi/swap/v2/user/positions", ["currency"], signed=True),
+    "income": _endpoint("GET", "/openApi/swap/v2/user/income",
+                        ["symbol", "incomeType", "startTime", "endTime", "limit"], signed=True),
+    "income_export": _endpoint("GET", "/openApi/swap/v2/user/income/export",
+                               ["symbol", "incomeType", "startTime", "endTime", "limit"], signed=True),
+    "commission_rate": _endpoint("GET", "/openApi/swap/v2/user/commissionRate", signed=True),
+
+    # Trading
+    "place_order": _endpoint("POST", "/openApi/swap/v2/trade/order", ORDER_PARAMS, signed=True, recv_window=True,
+                             priority=PRIORITY_HIGH),
+    "test_order": _endpoint("POST", "/openApi/swap/v2/trade/order/test", ORDER_PARAMS, signed=True),
+    "batch_orders": _endpoint("POST", "/openApi/swap/v2/trade/batchOrders", ["batchOrders"], signed=True,
+                              recv_window=True, priority=PRIORITY_HIGH, weight=5),
+    "close_all_positions": _endpoint("POST", "/openApi/swap/v2/trade/closeAllPositions", signed=True,
+                                     recv_window=True, priority=PRIORITY_HIGH),
+    "cancel_order": _endpoint("DELETE", "/openApi/swap/v2/trade/order", ["orderId", "symbol", "clientOrderID"],
+                              signed=True, priority=PRIORITY_HIGH),
+    "cancel_all_orders": _endpoint("DELETE", "/openApi/swap/v2/trade/allOpenOrders", ["symbol"], signed=True,
+                                   priority=PRIORITY_HIGH),
+    "cancel_batch_orders": _endpoint("DELETE", "/openApi/swap/v2/trade/batchOrders",
+                                     ["ClientOrderIDList", "orderIdList", "symbol"], signed=True,
+                                     priority=PRIORITY_HIGH),
+    "open_orders": _endpoint("GET", "/openApi/swap/v2/trade/openOrders", ["symbol"], signed=True),
+    "query_order": _endpoint("GET", "/openApi/swap/v2/trade/order", ["clientOrderID", "orderId", "symbol"],
+                             signed=True),
+    "get_margin_type": _endpoint("GET", "/openApi/swap/v2/trade/marginType", ["symbol"], signed=True),
+    "set_margin_type": _endpoint("POST", "/openApi/swap/v2/trade/marginType", ["marginType", "symbol"], signed=True,
+                                 recv_window=True, idempotent=True),
+    "get_leverage": _endpoint("GET", "/openApi/swap/v2/trade/leverage", ["symbol"], signed=True),
+    "set_leverage": _endpoint("POST", "/openApi/swap/v2/trade/leverage", ["leverage", "side", "symbol"], signed=True,
+                              recv_window=True, idempotent=True),
+    "force_orders": _endpoint("GET", "/openApi/swap/v2/trade/forceOrders",
+                              ["autoCloseType", "endTime", "limit", "startTime", "symbol"], signed=True),
+    "all_orders": _endpoint("GET", "/openApi/swap/v2/trade/allOrders",
+                            ["endTime", "limit", "orderId", "startTime", "symbol"], signed=True),
+    "all_fill_orders": _endpoint("GET", "/openApi/swap/v2/trade/allFillOrders",
+                                 ["symbol", "orderId", "tradingUnit", "startTs", "endTs"], signed=True),
+    "position_margin": _endpoint("POST", "/openApi/swap/v2/trade/positionMargin",
+                                 ["symbol", "amount", "type", "positionSide"], signed=True, recv_window=True),
+
+    # User Data Stream, authenticated by the API key header alone
+    "create_listen_key": _endpoint("POST", "/openApi/user/auth/userDataStream", group="account", idempotent=True),
+    "extend_listen_key": _endpoint("PUT", "/openApi/user/auth/userDataStream", ["listenKey"], group="account"),
+    "delete_listen_key": _endpoint("DELETE", "/openApi/user/auth/userDataStream", ["listenKey"], group="account"),
+}
+
+
+def build_query(endpoint, params):
+    """
+    Builds the query string for endpoint in a single pass over params, in the order declared by the endpoint.
+    Parameters that are missing or set to "NULL" are left out.
+    """
+    parts = []
+    found = 0
+    for name in endpoint.params:
+        if name in params:
+            found += 1
+            value = params[name]
+            if value != "NULL":
+                parts.append(name + "=" + str(value))
+    if found != len(params):
+        unknown = [name for name in params if name not in endpoint.params]
+        raise ValueError("[!] INVALID PARAMETERS FOR " + endpoint.path + ": " + str(unknown))
+    return "&".join(parts)
+
+
+class RequestSigner(object):
+    """
+    Signs query strings with HMAC-SHA256. The key is hashed into the HMAC state once, every signature then only copies
+    that state instead of setting up a new HMAC from the secret key.
+    """
+
+    def __init__(self, secret_key, recv_window="10000"):
+        self.__mac = hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+        self.recv_window = recv_window
+
+    def sign(self, payload):
+        mac = self.__mac.copy()
+        mac.update(payload.encode("utf-8"))
+        return mac.hexdigest()
+
+    def sign_query(self, endpoint, query, timestamp):
+        """
+        Appends timestamp, recvWindow if the endpoint uses it, and the signature of the result to query.
+        """
+        tail = "timestamp=" + str(timestamp)
+        if endpoint.recv_window:
+            tail += "&recvWindow=" + self.recv_window
+        query = query + "&" + tail if query else tail
+        return query + "&signature=" + self.sign(query)
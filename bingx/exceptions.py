@@ -1,3 +1,26 @@
+class BingxAPIError(Exception):
+    """
+    An error answered by the exchange, i.e. a response whose code is not 0.
+    """
+
+    def __init__(self, code, msg):
+        super().__init__("[!] BINGX ERROR " + str(code) + ": " + str(msg))
+        self.code = code
+        self.msg = msg
+
+
+class OrderOutcomeUnknown(Exception):
+    """
+    An order the exchange's answer says nothing about: it may or may not have been placed. Look it up by its client
+    order ID before sending it again.
+    """
+
+    def __init__(self, client_order_id, msg):
+        super().__init__("[!] OUTCOME OF ORDER " + str(client_order_id) + " UNKNOWN: " + str(msg))
+        self.client_order_id = client_order_id
+        self.msg = msg
+
+
 # {'code': 80014, 'msg': 'client apiKey.GetSign: apiKey has no permission', 'data': {}}
 # {'code': 80014, 'msg': 'signature not match', 'data': {}}
 # {'code': 80014, 'msg': 'Insufficient margin, please adjust and resubmit', 'data': {}} # TODO: return mgs if code is not 0.
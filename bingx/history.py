@@ -0,0 +1,333 @@
+import asyncio
+import csv
+import os
+import queue
+import struct
+import threading
+from datetime import datetime, timezone
+
+from .exceptions import BingxAPIError
+from .models import _PARSERS
+
+# Widest time range the history endpoints answer for in one request.
+MAX_HISTORY_SPAN = 7 * 24 * 3600 * 1000
+
+# Most fills /trade/allFillOrders is assumed to return per request. It takes no limit and does not document one, so
+# its pages are walked with exact_limit=False.
+MAX_FILLS_LIMIT = 1000
+
+# (key, kind) of the rows of /user/income and /trade/allFillOrders, kinds as in bingx.models.
+INCOME_FIELDS = (("time", "int"), ("symbol", "str"), ("incomeType", "str"), ("income", "float"), ("asset", "str"),
+                 ("info", "str"), ("tranId", "str"), ("tradeId", "str"))
+FILL_FIELDS = (("filledTm", "str"), ("orderId", "str"), ("currency", "str"), ("liquidity", "str"),
+               ("price", "float"), ("volume", "float"), ("amount", "float"), ("commission", "float"))
+
+VALID_FORMATS = ["csv", "binary"]
+
+
+def split_time_windows(start_timestamp, end_timestamp, span=MAX_HISTORY_SPAN):
+    """
+    Splits [start_timestamp, end_timestamp) into consecutive windows of at most span milliseconds.
+    """
+    windows = []
+    start = int(start_timestamp)
+    end = int(end_timestamp)
+    while start < end:
+        windows.append((start, min(start + span, end)))
+        start += span
+    return windows
+
+
+def default_range(start_timestamp, end_timestamp, now):
+    """
+    Fills in "NULL" bounds the way the exchange does: up to now, starting 7 days before the end.
+    """
+    end = int(now) if end_timestamp == "NULL" else int(end_timestamp)
+    start = end - MAX_HISTORY_SPAN if start_timestamp == "NULL" else int(start_timestamp)
+    return start, end
+
+
+def page_rows(response, key=None):
+    """
+    The rows of a history response, data itself or data[key]. Raises BingxAPIError if the exchange answered an error.
+    """
+    if response.get("code") != 0:
+        raise BingxAPIError(response.get("code"), response.get("msg"))
+    data = response.get("data")
+    if key is not None and isinstance(data, dict):
+        data = data.get(key)
+    return data or []
+
+
+def fill_time(value):
+    """
+    Epoch milliseconds of the filledTm of a fill, an ISO 8601 time (UTC unless it says otherwise) or epoch
+    milliseconds.
+    """
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return int(value)
+    moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def fill_identity(row):
+    # Fills carry no ID of their own, the whole row tells them apart.
+    return tuple(sorted(row.items()))
+
+
+class TimeCursor(object):
+    """
+    Pages through a window of a time-ordered endpoint that returns at most limit rows per request. A full page moves
+    start to the newest time in it, and the rows of that millisecond that were already returned are dropped from the
+    next page, so nothing is lost or returned twice.
+
+        cursor = TimeCursor(start, end, limit, "tranId")
+        while not cursor.done:
+            rows = cursor.feed(fetch(cursor.start, cursor.end))
+
+    :param key: Field that identifies a row, or a function returning what identifies it
+    :param time_key: Field holding the time of a row
+    :param parse_time: Function turning that field into epoch milliseconds
+    :param exact_limit: Whether the endpoint is known to return limit rows whenever it has that many. Otherwise a
+        page shorter than limit only ends the window when it is empty or shorter than an earlier page, which a capped
+        answer never is.
+    """
+
+    def __init__(self, start, end, limit, key, time_key="time", parse_time=int, exact_limit=True):
+        self.start = int(start)
+        self.end = int(end)
+        self.limit = int(limit)
+        self.key = key
+        self.time_key = time_key
+        self.parse_time = parse_time
+        self.exact_limit = exact_limit
+        self.done = self.start >= self.end
+        self.__largest = 0
+        self.__identity = key if callable(key) else lambda row: row.get(key)
+        self.__seen = set()
+
+    def feed(self, rows):
+        """
+        Takes the rows returned for the current position, advances it and returns the rows not seen before.
+        """
+        identity = self.__identity
+        fresh = [row for row in rows if identity(row) not in self.__seen]
+        times = [self.parse_time(row[self.time_key]) for row in rows]
+        last = max(times) if rows else self.start
+        if self.exact_limit or len(rows) >= self.limit:
+            short = len(rows) < self.limit
+        else:
+            short = not rows or len(rows) < self.__largest
+        self.__largest = max(self.__largest, len(rows))
+        if short or last < self.start:
+            self.done = True
+            return fresh
+        if not fresh:
+            # More than limit rows share this millisecond, the rest of them cannot be reached.
+            self.start = last + 1
+            self.__seen = set()
+        elif last == self.start:
+            self.__seen.update(identity(row) for row in rows)
+        else:
+            self.__seen = {identity(row) for row, time in zip(rows, times) if time == last}
+            self.start = last
+        self.done = self.start >= self.end
+        return fresh
+
+
+class OrderIdCursor(object):
+    """
+    Pages through a window of an endpoint that returns orders from an orderId on, at most limit of them per request.
+    """
+
+    def __init__(self, limit, key="orderId"):
+        self.limit = int(limit)
+        self.key = key
+        self.order_id = "NULL"
+        self.done = False
+
+    def feed(self, rows):
+        if len(rows) < self.limit:
+            self.done = True
+        else:
+            self.order_id = max(int(row[self.key]) for row in rows) + 1
+        return rows
+
+
+_END = object()
+
+
+def prefetched(pages, depth=1):
+    """
+    Iterates over pages while a background thread fetches up to depth pages ahead of the consumer, so at most
+    depth + 2 pages are held at any time. With depth 0 pages are fetched when they are asked for.
+    """
+    if depth <= 0:
+        yield from pages
+        return
+    buffer = queue.Queue(depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+            put((None, _END))
+        except BaseException as e:
+            put((None, e))
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            page, end = buffer.get()
+            if end is _END:
+                return
+            if end is not None:
+                raise end
+            yield page
+    finally:
+        stop.set()
+
+
+async def prefetched_async(pages, depth=1):
+    """
+    prefetched() for an async iterator of pages: a task fetches up to depth pages ahead of the consumer.
+    """
+    if depth <= 0:
+        async for page in pages:
+            yield page
+        return
+    buffer = asyncio.Queue(depth)
+
+    async def produce():
+        try:
+            async for page in pages:
+                await buffer.put((page, None))
+            await buffer.put((None, _END))
+        except Exception as e:
+            await buffer.put((None, e))
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            page, end = await buffer.get()
+            if end is _END:
+                return
+            if end is not None:
+                raise end
+            yield page
+    finally:
+        task.cancel()
+
+
+def _packer(kind):
+    if kind == "int":
+        return lambda value: struct.pack("<q", _PARSERS[kind](value))
+    if kind == "float":
+        return lambda value: struct.pack("<d", _PARSERS[kind](value))
+    if kind == "bool":
+        return lambda value: struct.pack("<?", _PARSERS[kind](value))
+
+    def pack(value):
+        encoded = _PARSERS[kind](value).encode("utf-8")
+        return struct.pack("<I", len(encoded)) + encoded
+
+    return pack
+
+
+class HistoryWriter(object):
+    """
+    Appends history rows to a file as they come, so a long history never has to be held in memory.
+
+    "csv" files get a header row when they are created. "binary" files hold one record per row, fields in the order
+    of fields: int as int64, float as float64, bool as one byte and str as a uint32 byte length followed by UTF-8,
+    all little-endian. Read them back with read_history().
+
+    :param path: File to append to, created if missing
+    :param fields: (key, kind) of the columns to write, i.e. INCOME_FIELDS or FILL_FIELDS
+    :param format: "csv" or "binary"
+    """
+
+    def __init__(self, path, fields, format="csv"):
+        if format not in VALID_FORMATS:
+            raise ValueError("[!] INVALID FORMAT. Valid formats are: " + str(VALID_FORMATS))
+        self.path = path
+        self.fields = tuple(fields)
+        self.format = format
+        self.count = 0
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if format == "csv":
+            self.__file = open(path, "a", newline="", encoding="utf-8")
+            self.__writer = csv.writer(self.__file)
+            if new:
+                self.__writer.writerow([key for key, _ in self.fields])
+        else:
+            self.__file = open(path, "ab")
+            self.__packers = [(key, _packer(kind)) for key, kind in self.fields]
+
+    def write(self, row):
+        if self.format == "csv":
+            self.__writer.writerow(["" if row.get(key) is None else row.get(key) for key, _ in self.fields])
+        else:
+            self.__file.write(b"".join(pack(row.get(key)) for key, pack in self.__packers))
+        self.count += 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+        return self.count
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_history(path, fields, format="csv"):
+    """
+    Yields the rows of a file written by HistoryWriter as dicts, values parsed according to fields.
+    """
+    if format not in VALID_FORMATS:
+        raise ValueError("[!] INVALID FORMAT. Valid formats are: " + str(VALID_FORMATS))
+    if format == "csv":
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                yield {key: _PARSERS[kind](row.get(key)) for key, kind in fields}
+        return
+    sizes = {"int": ("<q", 8), "float": ("<d", 8), "bool": ("<?", 1)}
+    with open(path, "rb") as file:
+        while True:
+            row = {}
+            for key, kind in fields:
+                if kind in sizes:
+                    code, size = sizes[kind]
+                    chunk = file.read(size)
+                    if len(chunk) < size:
+                        return
+                    row[key] = struct.unpack(code, chunk)[0]
+                else:
+                    chunk = file.read(4)
+                    if len(chunk) < 4:
+                        return
+                    row[key] = file.read(struct.unpack("<I", chunk)[0]).decode("utf-8")
+            yield row
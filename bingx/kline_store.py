@@ -0,0 +1,272 @@
+import json
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from .klines import INTERVAL_MS, VALID_INTERVALS, Klines
+
+
+class KlineStore(object):
+    """
+    A local on-disk kline history, one directory per symbol and interval:
+
+        <root>/<symbol>/<interval>/time.bin      int64 open times in epoch milliseconds, ascending
+        <root>/<symbol>/<interval>/open.bin      float64, same for high, low, close and volume
+        <root>/<symbol>/<interval>/manifest.json number of candles stored and generation of each column file
+        <root>/<symbol>/<interval>/coverage.json time ranges that were already downloaded
+
+    Columns are fixed-width native-endian binary files that are memory-mapped on read, so the Klines returned by
+    read() and get() are memoryview slices of the files and cost no copy. get() only downloads the parts of the
+    requested range that are not covered yet and appends them to the files. The manifest is updated after the
+    columns are written, so candles only count as stored once every column holds them: what a crash leaves behind
+    past the stored length is ignored and overwritten by the next write.
+
+    Only closed candles are stored, the one that is still forming is never part of the result. Recent candles the
+    exchange has not published yet are not marked as covered, so they are downloaded again by the next get().
+
+    :param root: Directory the store lives in, created if missing
+    :param api: BingxAPI used to download missing candles. Without it the store is read-only.
+    :param settle_delay: Seconds after its close a candle may still be missing from the exchange's answers. Empty
+        ranges younger than that are not marked as covered.
+    """
+    COLUMN_TYPES = (("time", "q"), ("open", "d"), ("high", "d"), ("low", "d"), ("close", "d"), ("volume", "d"))
+
+    def __init__(self, root, api=None, settle_delay=60, clock=time.time):
+        self.root = root
+        self.api = api
+        self.settle_delay = settle_delay
+        self.clock = clock
+        self.__columns_cache = {}
+        self.__locks = {}
+        self.__lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def __directory(self, pair, interval):
+        if str(interval) not in VALID_INTERVALS:
+            raise ValueError("[!] INVALID INTERVAL VALUE. Valid Intervals are: ", str(VALID_INTERVALS))
+        # "1m" and "1M" would share a directory on case-insensitive file systems.
+        return os.path.join(self.root, pair, "1mo" if interval == "1M" else interval)
+
+    def __series_lock(self, pair, interval):
+        with self.__lock:
+            return self.__locks.setdefault((pair, interval), threading.Lock())
+
+    @staticmethod
+    def __column_path(directory, name, generation):
+        return os.path.join(directory, name + (".bin" if not generation else "-%d.bin" % generation))
+
+    def __manifest(self, pair, interval):
+        """
+        (generations, length) of the stored columns, generations mapping each column to the generation of its file.
+        """
+        directory = self.__directory(pair, interval)
+        path = os.path.join(directory, "manifest.json")
+        if os.path.exists(path):
+            with open(path) as file:
+                manifest = json.load(file)
+            if "generations" in manifest:
+                return manifest["generations"], manifest["length"]
+            # Manifests written when every column shared one generation.
+            return {name: manifest["generation"] for name, _ in self.COLUMN_TYPES}, manifest["length"]
+        # Stores written before the manifest existed: the shortest column holds what every column has.
+        sizes = []
+        for name, code in self.COLUMN_TYPES:
+            path = self.__column_path(directory, name, 0)
+            sizes.append(os.path.getsize(path) // array(code).itemsize if os.path.exists(path) else 0)
+        return {name: 0 for name, _ in self.COLUMN_TYPES}, min(sizes)
+
+    def __save_manifest(self, pair, interval, generations, length):
+        path = os.path.join(self.__directory(pair, interval), "manifest.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump({"generations": generations, "length": length}, file)
+        os.replace(path + ".tmp", path)
+
+    def __columns(self, pair, interval):
+        key = (pair, interval)
+        columns = self.__columns_cache.get(key)
+        if columns is None:
+            directory = self.__directory(pair, interval)
+            generations, length = self.__manifest(pair, interval)
+            columns = {}
+            for name, code in self.COLUMN_TYPES:
+                path = self.__column_path(directory, name, generations[name])
+                if not length:
+                    columns[name] = memoryview(array(code))
+                    continue
+                with open(path, "rb") as file:
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                columns[name] = memoryview(mapped).cast(code)[:length]
+            self.__columns_cache[key] = columns
+        return columns
+
+    def coverage(self, pair, interval):
+        """
+        The [start, end) ranges of open times that are already stored, merged and ordered.
+        """
+        path = os.path.join(self.__directory(pair, interval), "coverage.json")
+        if not os.path.exists(path):
+            return []
+        with open(path) as file:
+            return [tuple(item) for item in json.load(file)]
+
+    def __save_coverage(self, pair, interval, ranges):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        path = os.path.join(self.__directory(pair, interval), "coverage.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(merged, file)
+        os.replace(path + ".tmp", path)
+
+    def missing(self, pair, interval, start_timestamp, end_timestamp):
+        """
+        The parts of [start_timestamp, end_timestamp) that are not stored yet.
+        """
+        gaps = []
+        cursor = int(start_timestamp)
+        end_timestamp = int(end_timestamp)
+        for start, end in self.coverage(pair, interval):
+            if end <= cursor:
+                continue
+            if start >= end_timestamp:
+                break
+            if start > cursor:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < end_timestamp:
+            gaps.append((cursor, end_timestamp))
+        return gaps
+
+    def read(self, pair, interval, start_timestamp, end_timestamp):
+        """
+        Stored candles with open times in [start_timestamp, end_timestamp), without touching the network.
+        """
+        columns = self.__columns(pair, interval)
+        times = columns["time"]
+        low = bisect_left(times, int(start_timestamp))
+        high = bisect_left(times, int(end_timestamp), low)
+        return Klines(**{name: columns[name][low:high] for name, _ in self.COLUMN_TYPES})
+
+    def write(self, pair, interval, klines, start_timestamp, end_timestamp):
+        """
+        Stores klines and marks [start_timestamp, end_timestamp) as covered, nothing when end_timestamp is not
+        after start_timestamp.
+        Candles that come after everything stored are appended, anything else is spliced in, rewriting only the
+        column files it changes.
+        """
+        directory = self.__directory(pair, interval)
+        os.makedirs(directory, exist_ok=True)
+        if len(klines):
+            times = self.__columns(pair, interval)["time"]
+            if not len(times) or klines.time[0] > times[-1]:
+                generations, length = self.__manifest(pair, interval)
+                for name, code in self.COLUMN_TYPES:
+                    with open(self.__column_path(directory, name, generations[name]), "ab") as file:
+                        size = length * array(code).itemsize
+                        if file.tell() > size:
+                            # Left over from a write that did not finish.
+                            file.truncate(size)
+                        file.write(array(code, getattr(klines, name)).tobytes())
+                self.__save_manifest(pair, interval, generations, length + len(klines))
+            else:
+                self.__merge(pair, interval, klines)
+            # Readers still holding slices keep the old mappings alive, new reads map the new files.
+            self.__columns_cache.pop((pair, interval), None)
+        if int(end_timestamp) > int(start_timestamp):
+            self.__save_coverage(pair, interval, self.coverage(pair, interval) + [(int(start_timestamp),
+                                                                                  int(end_timestamp))])
+
+    def __merge(self, pair, interval, klines):
+        old = self.__columns(pair, interval)
+        old_times = old["time"]
+        # Only the stored candles within the time span of klines can change, the rest is copied as it is.
+        low = bisect_left(old_times, klines.time[0])
+        high = bisect_right(old_times, klines.time[-1], low)
+        times = set(klines.time)
+        middle = {name: array(code, getattr(klines, name)) for name, code in self.COLUMN_TYPES}
+        if any(old_times[index] not in times for index in range(low, high)):
+            # Stored candles between the new ones: merge both, new candles replace stored ones of the same time.
+            merged = {name: array(code) for name, code in self.COLUMN_TYPES}
+            i, j = low, 0
+            while i < high or j < len(klines):
+                if j == len(klines) or (i < high and old_times[i] < klines.time[j]):
+                    source, index = old, i
+                    i += 1
+                else:
+                    if i < high and old_times[i] == klines.time[j]:
+                        i += 1
+                    source, index = middle, j
+                    j += 1
+                for name, _ in self.COLUMN_TYPES:
+                    merged[name].append(source[name][index])
+            middle = merged
+        length = len(old_times) - (high - low) + len(middle["time"])
+        if length == len(old_times):
+            changed = [name for name, _ in self.COLUMN_TYPES if middle[name].tobytes() != old[name][low:high].tobytes()]
+        else:
+            changed = [name for name, _ in self.COLUMN_TYPES]
+        if not changed:
+            return
+        # Changed columns go to a new generation of files, switched to at once by the manifest.
+        directory = self.__directory(pair, interval)
+        generations, _ = self.__manifest(pair, interval)
+        previous = dict(generations)
+        generation = max(generations.values()) + 1
+        for name in changed:
+            with open(self.__column_path(directory, name, generation), "wb") as file:
+                file.write(old[name][:low])
+                file.write(middle[name])
+                file.write(old[name][high:])
+            generations[name] = generation
+        self.__save_manifest(pair, interval, generations, length)
+        for name in changed:
+            try:
+                os.remove(self.__column_path(directory, name, previous[name]))
+            except OSError:
+                # Still mapped by a reader on systems that do not allow removing open files.
+                pass
+
+    def __covered_end(self, interval, klines, end, last_closed):
+        """
+        End of the part of a downloaded range that counts as covered: all of it when it is older than settle_delay,
+        otherwise only up to the last candle received (up to settle_delay ago when none was), since the exchange may
+        not have published the others yet.
+        """
+        settled = last_closed - int(self.settle_delay * 1000)
+        if end <= settled:
+            return end
+        if len(klines):
+            return min(end, klines.time[-1] + INTERVAL_MS[interval])
+        return settled
+
+    def get(self, pair, interval, start_timestamp, end_timestamp):
+        """
+        Candles with open times in [start_timestamp, end_timestamp). Ranges that are not stored yet are downloaded
+        with api.get_kline_history and stored first.
+        """
+        # A candle is closed once its whole interval is in the past.
+        last_closed = int(self.clock() * 1000) - INTERVAL_MS[interval] + 1
+        end_timestamp = min(int(end_timestamp), last_closed)
+        if self.api is not None:
+            with self.__series_lock(pair, interval):
+                for start, end in self.missing(pair, interval, start_timestamp, end_timestamp):
+                    klines = self.api.get_kline_history(pair, interval, start, end)
+                    self.write(pair, interval, klines, start, self.__covered_end(interval, klines, end,
+                                                                                 last_closed))
+        return self.read(pair, interval, start_timestamp, end_timestamp)
+
+    def get_many(self, pairs, interval, start_timestamp, end_timestamp, max_workers=8):
+        """
+        get() for many symbols at once, filling their gaps concurrently. Returns a dict of symbol to Klines.
+        """
+        pairs = list(pairs)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda pair: self.get(pair, interval, start_timestamp, end_timestamp), pairs)
+            return dict(zip(pairs, results))
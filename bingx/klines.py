@@ -0,0 +1,98 @@
+from array import array
+
+VALID_INTERVALS = ["1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"]
+
+# Length of one candle in milliseconds. Months are counted as 31 days so a window never holds more candles than asked.
+INTERVAL_MS = {"1m": 60000, "3m": 180000, "5m": 300000, "15m": 900000, "30m": 1800000, "1h": 3600000,
+               "2h": 7200000, "4h": 14400000, "6h": 21600000, "8h": 28800000, "12h": 43200000, "1d": 86400000,
+               "3d": 259200000, "1w": 604800000, "1M": 2678400000}
+
+MAX_KLINE_LIMIT = 1440
+
+
+def split_windows(start_timestamp, end_timestamp, interval, limit=MAX_KLINE_LIMIT):
+    """
+    Splits [start_timestamp, end_timestamp) into consecutive windows that hold at most limit candles each.
+    """
+    if str(interval) not in VALID_INTERVALS:
+        raise ValueError("[!] INVALID INTERVAL VALUE. Valid Intervals are: ", str(VALID_INTERVALS))
+    if not 0 < limit <= MAX_KLINE_LIMIT:
+        raise ValueError("[!] LIMIT MUST BE BETWEEN 1 AND %d." % MAX_KLINE_LIMIT)
+    step = INTERVAL_MS[interval] * limit
+    windows = []
+    start = int(start_timestamp)
+    end = int(end_timestamp)
+    while start < end:
+        windows.append((start, min(start + step, end)))
+        start += step
+    return windows
+
+
+class Klines(object):
+    """
+    Candles stored column by column: time is an array of int64 epoch milliseconds, open, high, low, close and volume
+    are arrays of float64. Columns support the buffer protocol, so numpy.frombuffer() can wrap them without copying;
+    to_numpy() does that for you when NumPy is installed.
+    """
+    COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+    def __init__(self, time=None, open=None, high=None, low=None, close=None, volume=None):
+        self.time = time if time is not None else array("q")
+        self.open = open if open is not None else array("d")
+        self.high = high if high is not None else array("d")
+        self.low = low if low is not None else array("d")
+        self.close = close if close is not None else array("d")
+        self.volume = volume if volume is not None else array("d")
+
+    def __len__(self):
+        return len(self.time)
+
+    def __repr__(self):
+        if not len(self):
+            return "Klines(0 candles)"
+        return "Klines(%d candles, %d..%d)" % (len(self), self.time[0], self.time[-1])
+
+    @classmethod
+    def from_rows(cls, rows, start_timestamp=None, end_timestamp=None):
+        """
+        Builds columns from kline dicts as returned by get_kline_data. Rows are ordered by time, duplicated times keep
+        the last row seen and rows outside [start_timestamp, end_timestamp) are dropped.
+        """
+        by_time = {}
+        for row in rows:
+            by_time[int(row["time"])] = row
+        klines = cls()
+        for time in sorted(by_time):
+            if start_timestamp is not None and time < start_timestamp:
+                continue
+            if end_timestamp is not None and time >= end_timestamp:
+                continue
+            row = by_time[time]
+            klines.time.append(time)
+            klines.open.append(float(row["open"]))
+            klines.high.append(float(row["high"]))
+            klines.low.append(float(row["low"]))
+            klines.close.append(float(row["close"]))
+            klines.volume.append(float(row["volume"]))
+        return klines
+
+    def column(self, name):
+        if name not in self.COLUMNS:
+            raise ValueError("[!] INVALID COLUMN. Valid columns are: " + str(self.COLUMNS))
+        return getattr(self, name)
+
+    def to_numpy(self, structured=False):
+        """
+        Returns a dict of NumPy arrays sharing memory with the columns, or a single structured array (a copy) when
+        structured is True. Requires NumPy.
+        """
+        import numpy
+        columns = {"time": numpy.frombuffer(self.time, dtype=numpy.int64)}
+        for name in self.COLUMNS[1:]:
+            columns[name] = numpy.frombuffer(getattr(self, name), dtype=numpy.float64)
+        if not structured:
+            return columns
+        result = numpy.empty(len(self), dtype=[("time", "i8")] + [(name, "f8") for name in self.COLUMNS[1:]])
+        for name, values in columns.items():
+            result[name] = values
+        return result
@@ -0,0 +1,228 @@
+import contextvars
+import logging
+import threading
+import time
+import urllib.error
+from bisect import bisect_left
+
+PHASES = ("queue", "sign", "connect", "ttfb", "read", "decode", "total")
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("bingx_request_timings", default=None)
+
+
+def current_timings():
+    """
+    The RequestTimings of the request being sent in this thread or task, None when instrumentation is disabled.
+    """
+    return _current.get()
+
+
+class RequestTimings(object):
+    """
+    Where the time of one request went, in seconds:
+
+    queue    waiting for the rate limiter and for a free pooled connection
+    sign     building the timestamp and signature
+    connect  opening a new connection, 0 when a kept-alive one was reused
+    ttfb     sending the request until the response headers arrived
+    read     reading the response body
+    decode   parsing the JSON
+    total    the whole request, including the time between the phases above
+
+    Each phase is closed by mark(), which adds the time since the previous mark to it.
+    """
+    __slots__ = ("path", "method", "queue", "sign", "connect", "ttfb", "read", "decode", "total", "size", "code",
+                 "error", "started", "last", "token")
+
+    def __init__(self, path, method):
+        self.path = path
+        self.method = method
+        self.queue = self.sign = self.connect = self.ttfb = self.read = self.decode = self.total = 0.0
+        self.size = 0
+        self.code = None
+        self.error = None
+        self.started = self.last = time.perf_counter()
+        self.token = None
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        setattr(self, phase, getattr(self, phase) + now - self.last)
+        self.last = now
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in ("path", "method") + PHASES + ("size", "code", "error")}
+
+
+class Histogram(object):
+    """
+    Cumulative-bucket histogram as used by Prometheus: counts[i] is the number of observations <= buckets[i], the
+    last count is for +Inf.
+    """
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket the q quantile falls in.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in zip(self.buckets + (float("inf"),), self.cumulative()):
+            if total >= rank:
+                return bound
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return "{" + ",".join('%s="%s"' % (name, _escape(value)) for name, value in labels.items()) + "}"
+
+
+class Instrumentation(object):
+    """
+    Records RequestTimings for every request of the BingxAPI it is passed to: in-process histograms per endpoint
+    path and phase, a response size histogram, request counts per exchange code and error counts per error.
+
+    Hooks are called with every finished RequestTimings on the thread or task that sent the request, so they should
+    be quick. Exceptions raised by a hook are logged, they never fail the request. export_prometheus() renders
+    everything in the Prometheus text exposition format.
+
+    :param hooks: Functions called with every finished RequestTimings
+    :param buckets: Histogram bucket bounds in seconds
+    :param size_buckets: Response size bucket bounds in bytes
+    :param namespace: Prefix of the exported metric names
+    """
+
+    def __init__(self, hooks=None, buckets=DEFAULT_BUCKETS, size_buckets=SIZE_BUCKETS, namespace="bingx"):
+        self.hooks = list(hooks or [])
+        self.buckets = tuple(buckets)
+        self.size_buckets = tuple(size_buckets)
+        self.namespace = namespace
+        self.__phases = {}
+        self.__sizes = {}
+        self.__requests = {}
+        self.__errors = {}
+        self.__lock = threading.Lock()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def start(self, endpoint):
+        timings = RequestTimings(endpoint.path, endpoint.method)
+        timings.token = _current.set(timings)
+        return timings
+
+    def finish(self, timings, error=None):
+        timings.total = time.perf_counter() - timings.started
+        _current.reset(timings.token)
+        timings.token = None
+        if error is not None:
+            if isinstance(error, urllib.error.HTTPError):
+                timings.error = "HTTP %d" % error.code
+            else:
+                timings.error = type(error).__name__
+        self.observe(timings)
+
+    def observe(self, timings):
+        path = timings.path
+        with self.__lock:
+            for phase in PHASES:
+                histogram = self.__phases.get((path, phase))
+                if histogram is None:
+                    histogram = self.__phases[(path, phase)] = Histogram(self.buckets)
+                histogram.observe(getattr(timings, phase))
+            if timings.error is None:
+                sizes = self.__sizes.get(path)
+                if sizes is None:
+                    sizes = self.__sizes[path] = Histogram(self.size_buckets)
+                sizes.observe(timings.size)
+                key = (path, timings.code)
+                self.__requests[key] = self.__requests.get(key, 0) + 1
+            else:
+                key = (path, timings.error)
+                self.__errors[key] = self.__errors.get(key, 0) + 1
+        for hook in self.hooks:
+            try:
+                hook(timings)
+            except Exception:
+                # The request is done, possibly an order placed: a broken hook must not turn it into a failure.
+                _logger.exception("[!] INSTRUMENTATION HOOK %r FAILED.", hook)
+
+    def histogram(self, path, phase="total"):
+        with self.__lock:
+            return self.__phases.get((path, phase))
+
+    def snapshot(self):
+        """
+        Per endpoint path: request count and, per phase, mean and approximate p50/p99 in seconds.
+        """
+        with self.__lock:
+            result = {}
+            for (path, phase), histogram in self.__phases.items():
+                entry = result.setdefault(path, {"count": histogram.count})
+                entry[phase] = {"mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                                "p50": histogram.quantile(0.5), "p99": histogram.quantile(0.99)}
+            return result
+
+    def __histogram_lines(self, name, histograms, label_names):
+        lines = []
+        for key, histogram in sorted(histograms, key=lambda item: item[0]):
+            labels = dict(zip(label_names, key))
+            for bound, total in zip(histogram.buckets + ("+Inf",), histogram.cumulative()):
+                lines.append("%s_bucket%s %d" % (name, _labels(**dict(labels, le=bound)), total))
+            lines.append("%s_sum%s %r" % (name, _labels(**labels), histogram.sum))
+            lines.append("%s_count%s %d" % (name, _labels(**labels), histogram.count))
+        return lines
+
+    def export_prometheus(self):
+        """
+        All metrics in the Prometheus text exposition format, ready to be served on a /metrics endpoint.
+        """
+        prefix = self.namespace + "_"
+        with self.__lock:
+            phases = list(self.__phases.items())
+            sizes = [((path,), histogram) for path, histogram in self.__sizes.items()]
+            requests = sorted(self.__requests.items(), key=lambda item: str(item[0]))
+            errors = sorted(self.__errors.items(), key=lambda item: str(item[0]))
+            lines = ["# HELP %srequest_phase_seconds Time spent in each phase of a request." % prefix,
+                     "# TYPE %srequest_phase_seconds histogram" % prefix]
+            lines += self.__histogram_lines(prefix + "request_phase_seconds", phases, ("path", "phase"))
+            lines += ["# HELP %sresponse_size_bytes Size of the response bodies." % prefix,
+                      "# TYPE %sresponse_size_bytes histogram" % prefix]
+            lines += self.__histogram_lines(prefix + "response_size_bytes", sizes, ("path",))
+        lines += ["# HELP %srequests_total Answered requests by exchange response code." % prefix,
+                  "# TYPE %srequests_total counter" % prefix]
+        lines += ["%srequests_total%s %d" % (prefix, _labels(path=path, code="" if code is None else code), count)
+                  for (path, code), count in requests]
+        lines += ["# HELP %srequest_errors_total Requests that failed without a response." % prefix,
+                  "# TYPE %srequest_errors_total counter" % prefix]
+        lines += ["%srequest_errors_total%s %d" % (prefix, _labels(path=path, error=error), count)
+                  for (path, error), count in errors]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,237 @@
+from array import array
+from collections import deque
+from itertools import repeat
+from operator import itemgetter
+
+_NAN = float("nan")
+_TRUE = ("true", "True", 1)
+
+
+def _float(value):
+    if value is None or value == "":
+        return _NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _int(value):
+    if value is None or value == "":
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return 0
+
+
+def _bool(value):
+    return value is True or value in _TRUE
+
+
+def _str(value):
+    return "" if value is None else str(value)
+
+
+_PARSERS = {"float": _float, "int": _int, "bool": _bool, "str": _str}
+_TYPECODES = {"float": "d", "int": "q", "bool": "b"}
+
+
+class Model(object):
+    """
+    Base of the typed results. FIELDS lists (attribute, key in the exchange's response, kind) with kind one of
+    "float", "int", "bool" or "str"; numbers are parsed once when the model is built, missing or unparsable ones are
+    NaN (0 for int fields).
+    """
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.__parsers = tuple((attribute, key, _PARSERS[kind]) for attribute, key, kind in cls.FIELDS)
+
+    def __init__(self, **values):
+        for attribute, _, kind in self.FIELDS:
+            setattr(self, attribute, values.get(attribute, _PARSERS[kind](None)))
+
+    @classmethod
+    def from_dict(cls, row):
+        model = cls.__new__(cls)
+        get = row.get
+        for attribute, key, parse in cls.__parsers:
+            setattr(model, attribute, parse(get(key)))
+        return model
+
+    def as_dict(self):
+        return {attribute: getattr(self, attribute) for attribute, _, _ in self.FIELDS}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__,
+                           ", ".join("%s=%r" % (attribute, getattr(self, attribute)) for attribute, _, _ in
+                                     self.FIELDS))
+
+
+class Order(Model):
+    FIELDS = (("symbol", "symbol", "str"), ("order_id", "orderId", "int"),
+              ("client_order_id", "clientOrderId", "str"), ("side", "side", "str"),
+              ("position_side", "positionSide", "str"), ("type", "type", "str"), ("status", "status", "str"),
+              ("price", "price", "float"), ("quantity", "origQty", "float"),
+              ("executed_quantity", "executedQty", "float"), ("avg_price", "avgPrice", "float"),
+              ("cum_quote", "cumQuote", "float"), ("stop_price", "stopPrice", "float"), ("profit", "profit", "float"),
+              ("commission", "commission", "float"), ("time", "time", "int"), ("update_time", "updateTime", "int"),
+              ("working_type", "workingType", "str"))
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+    @classmethod
+    def from_dict(cls, row):
+        order = super().from_dict(row)
+        if not order.client_order_id:
+            # Some endpoints spell it clientOrderID.
+            order.client_order_id = _str(row.get("clientOrderID"))
+        return order
+
+
+class Position(Model):
+    FIELDS = (("symbol", "symbol", "str"), ("position_id", "positionId", "str"),
+              ("position_side", "positionSide", "str"), ("isolated", "isolated", "bool"),
+              ("amount", "positionAmt", "float"), ("available_amount", "availableAmt", "float"),
+              ("unrealized_profit", "unrealizedProfit", "float"), ("realised_profit", "realisedProfit", "float"),
+              ("initial_margin", "initialMargin", "float"), ("avg_price", "avgPrice", "float"),
+              ("leverage", "leverage", "int"))
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class Balance(Model):
+    FIELDS = (("asset", "asset", "str"), ("balance", "balance", "float"), ("equity", "equity", "float"),
+              ("unrealized_profit", "unrealizedProfit", "float"), ("realised_profit", "realisedProfit", "float"),
+              ("available_margin", "availableMargin", "float"), ("used_margin", "usedMargin", "float"),
+              ("freezed_margin", "freezedMargin", "float"))
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+class Trade(Model):
+    FIELDS = (("time", "time", "int"), ("is_buyer_maker", "isBuyerMaker", "bool"), ("price", "price", "float"),
+              ("quantity", "qty", "float"), ("quote_quantity", "quoteQty", "float"))
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+
+def _values(rows, key):
+    try:
+        return list(map(itemgetter(key), rows))
+    except KeyError:
+        return [row.get(key) for row in rows]
+
+
+def _column(values, kind, strings):
+    if kind == "str":
+        if not set(map(type, values)) <= {str}:
+            values = list(map(_str, values))
+        # Symbols, sides and statuses repeat, keep one string object per distinct value.
+        return list(map(strings.setdefault, values, values))
+    typecode = _TYPECODES[kind]
+    if kind == "bool":
+        return array(typecode, map(_bool, values))
+    try:
+        return array(typecode, map(float if kind == "float" else int, values))
+    except (TypeError, ValueError, OverflowError):
+        # Empty or malformed values somewhere in the column.
+        return array(typecode, map(_PARSERS[kind], values))
+
+
+class Collection(object):
+    """
+    Base of the typed list results: one column per field of MODEL, an array for numeric fields and a list of shared
+    strings for the others. Indexing and iterating build MODEL objects on the fly, a field at a time for slices and
+    iteration, so no row is ever held as a dict; columns support the buffer
+    protocol, so numpy.frombuffer() can wrap numeric ones without copying, to_numpy() does that when NumPy is
+    installed.
+    """
+    MODEL = Model
+
+    def __init__(self, columns=None):
+        fields = self.MODEL.FIELDS
+        self.columns = columns if columns is not None else {
+            attribute: [] if kind == "str" else array(_TYPECODES[kind]) for attribute, _, kind in fields}
+        self.__length = len(self.columns[fields[0][0]]) if fields else 0
+
+    @classmethod
+    def from_rows(cls, rows):
+        rows = rows if isinstance(rows, list) else list(rows or [])
+        strings = {}
+        return cls({attribute: _column(_values(rows, key), kind, strings)
+                    for attribute, key, kind in cls.MODEL.FIELDS})
+
+    def __len__(self):
+        return self.__length
+
+    def __repr__(self):
+        return "%s(%d %ss)" % (type(self).__name__, len(self), self.MODEL.__name__.lower())
+
+    def column(self, name):
+        if name not in self.columns:
+            raise ValueError("[!] INVALID COLUMN. Valid columns are: " + str(list(self.columns)))
+        return self.columns[name]
+
+    def __models(self, start, stop, step=1):
+        model = self.MODEL
+        models = list(map(model.__new__, repeat(model, len(range(start, stop, step)))))
+        for attribute, _, kind in model.FIELDS:
+            values = self.columns[attribute][start:stop:step]
+            # Filled through the slot descriptors, one C-level pass per field.
+            deque(map(getattr(model, attribute).__set__, models, map(bool, values) if kind == "bool" else values), 0)
+        return models
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__models(*index.indices(len(self)))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        model = self.MODEL.__new__(self.MODEL)
+        for attribute, _, kind in self.MODEL.FIELDS:
+            value = self.columns[attribute][index]
+            setattr(model, attribute, bool(value) if kind == "bool" else value)
+        return model
+
+    def __iter__(self):
+        for start in range(0, len(self), 1024):
+            yield from self.__models(start, min(start + 1024, len(self)))
+
+    def to_numpy(self):
+        """
+        Returns a dict of NumPy arrays sharing memory with the numeric columns. Requires NumPy.
+        """
+        import numpy
+        return {name: numpy.frombuffer(values, dtype=values.typecode) for name, values in self.columns.items()
+                if isinstance(values, array)}
+
+
+class Orders(Collection):
+    MODEL = Order
+
+    @classmethod
+    def from_rows(cls, rows):
+        rows = rows if isinstance(rows, list) else list(rows or [])
+        orders = super().from_rows(rows)
+        ids = orders.columns["client_order_id"]
+        if "" not in ids:
+            return orders
+        for index, value in enumerate(ids):
+            if not value:
+                ids[index] = _str(rows[index].get("clientOrderID"))
+        return orders
+
+
+class Positions(Collection):
+    MODEL = Position
+
+
+class Trades(Collection):
+    MODEL = Trade
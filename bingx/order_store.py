@@ -0,0 +1,175 @@
+import json
+import sqlite3
+import threading
+import time
+
+from .history import MAX_HISTORY_SPAN, OrderIdCursor, TimeCursor, page_rows, split_time_windows
+
+# Most rows /trade/allOrders and /trade/forceOrders return per request.
+MAX_ORDERS_LIMIT = 1000
+MAX_FORCE_ORDERS_LIMIT = 100
+
+# Orders stay open for a while after they are created, their later states are picked up by syncing this far back.
+DEFAULT_LOOKBACK = 24 * 3600 * 1000
+
+VALID_KINDS = ["orders", "force_orders"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    kind TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    update_time INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, symbol, order_id)
+);
+CREATE INDEX IF NOT EXISTS orders_by_time ON orders (kind, symbol, time);
+CREATE TABLE IF NOT EXISTS high_water (
+    kind TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    PRIMARY KEY (kind, symbol)
+);
+"""
+
+
+class OrderHistoryStore(object):
+    """
+    A local SQLite copy of the order history, for reconciling more of it than the 7 days and 1000 rows a single
+    query_orders_history or query_force_orders call covers.
+
+    sync() splits any range into 7 day windows, fetches them concurrently, pages through full windows by orderId
+    (allOrders) or time (forceOrders) and upserts every order by its ID, so overlapping runs never store an order
+    twice and later states of an order replace earlier ones. The end of the synced range is kept per symbol as a
+    high-water mark, and the next sync() without a start only asks for what came after it.
+
+    :param path: SQLite database file, created if missing. ":memory:" keeps it in memory.
+    :param api: BingxAPI used to download orders. Without it the store is read-only.
+    :param lookback: Milliseconds before the high-water mark that are fetched again, to pick up orders that were
+        still open when they were last synced. Orders created earlier than that keep the state they were synced
+        with, sync them again with an explicit start_timestamp.
+    :param max_workers: Maximum number of windows fetched at the same time
+    """
+
+    def __init__(self, path, api=None, lookback=DEFAULT_LOOKBACK, max_workers=4, clock=time.time):
+        self.path = path
+        self.api = api
+        self.lookback = lookback
+        self.max_workers = max_workers
+        self.clock = clock
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.executescript(_SCHEMA)
+
+    @staticmethod
+    def __check_kind(kind):
+        if kind not in VALID_KINDS:
+            raise ValueError("[!] INVALID KIND. Valid kinds are: " + str(VALID_KINDS))
+
+    def high_water(self, pair, kind="orders"):
+        """
+        End of the newest range synced for pair in epoch milliseconds, None if it was never synced.
+        """
+        self.__check_kind(kind)
+        with self.__lock:
+            row = self.__connection.execute("SELECT time FROM high_water WHERE kind = ? AND symbol = ?",
+                                            (kind, pair)).fetchone()
+        return row[0] if row else None
+
+    def __fetch_window(self, pair, kind, window):
+        start, end = window
+        orders = []
+        if kind == "orders":
+            cursor = OrderIdCursor(MAX_ORDERS_LIMIT)
+            while not cursor.done:
+                response = self.api.request("all_orders", endTime=end - 1, limit=MAX_ORDERS_LIMIT,
+                                            orderId=cursor.order_id, startTime=start, symbol=pair)
+                orders += cursor.feed(page_rows(response, "orders"))
+        else:
+            cursor = TimeCursor(start, end, MAX_FORCE_ORDERS_LIMIT, "orderId")
+            while not cursor.done:
+                response = self.api.request("force_orders", endTime=end - 1, limit=MAX_FORCE_ORDERS_LIMIT,
+                                            startTime=cursor.start, symbol=pair)
+                orders += cursor.feed(page_rows(response, "orders"))
+        return orders
+
+    def write(self, pair, orders, kind="orders", high_water=None):
+        """
+        Upserts orders by ID and raises the high-water mark of pair to high_water. Returns the number of orders
+        that were new or changed.
+        """
+        self.__check_kind(kind)
+        rows = [(kind, pair, int(order["orderId"]), int(order.get("time") or 0),
+                 int(order.get("updateTime") or order.get("time") or 0), json.dumps(order, separators=(",", ":")))
+                for order in orders]
+        with self.__lock, self.__connection:
+            before = self.__connection.total_changes
+            self.__connection.executemany(
+                "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (kind, symbol, order_id) DO UPDATE SET "
+                "time = excluded.time, update_time = excluded.update_time, data = excluded.data "
+                "WHERE excluded.data != orders.data", rows)
+            changed = self.__connection.total_changes - before
+            if high_water is not None:
+                self.__connection.execute(
+                    "INSERT INTO high_water VALUES (?, ?, ?) ON CONFLICT (kind, symbol) DO UPDATE SET "
+                    "time = max(time, excluded.time)", (kind, pair, int(high_water)))
+        return changed
+
+    def sync(self, pair, start_timestamp=None, end_timestamp=None, kind="orders"):
+        """
+        Downloads the orders of pair in [start_timestamp, end_timestamp) and stores them.
+
+        :param pair: Symbol i.e. BTC-USDT
+        :param start_timestamp: Epoch milliseconds. Defaults to the high-water mark minus lookback, or 7 days before
+            end_timestamp for a symbol that was never synced.
+        :param end_timestamp: Epoch milliseconds. Defaults to now.
+        :param kind: "orders" for query_orders_history, "force_orders" for query_force_orders
+        :return: The number of orders that were new or changed
+        """
+        self.__check_kind(kind)
+        if self.api is None:
+            raise ValueError("[!] THIS STORE IS READ-ONLY, IT HAS NO API TO DOWNLOAD ORDERS WITH.")
+        if end_timestamp is None:
+            end_timestamp = int(self.clock() * 1000)
+        if start_timestamp is None:
+            high_water = self.high_water(pair, kind)
+            start_timestamp = (int(end_timestamp) - MAX_HISTORY_SPAN if high_water is None else
+                               high_water - self.lookback)
+        windows = split_time_windows(start_timestamp, end_timestamp)
+        pages = self.api.map_concurrently(lambda window: self.__fetch_window(pair, kind, window), windows,
+                                          self.max_workers)
+        changed = 0
+        for page in pages:
+            changed += self.write(pair, page, kind)
+        # Only moved once every window is stored, a failed sync is simply repeated.
+        self.write(pair, [], kind, high_water=end_timestamp)
+        return changed
+
+    def sync_many(self, pairs, start_timestamp=None, end_timestamp=None, kind="orders"):
+        """
+        sync() for many symbols, one after the other. Returns a dict of symbol to the number of orders stored.
+        """
+        return {pair: self.sync(pair, start_timestamp, end_timestamp, kind) for pair in pairs}
+
+    def read(self, pair, start_timestamp=None, end_timestamp=None, kind="orders"):
+        """
+        Stored orders of pair created in [start_timestamp, end_timestamp), oldest first, as returned by the exchange.
+        Wrap them in bingx.models.Orders.from_rows() for columns.
+        """
+        self.__check_kind(kind)
+        query = "SELECT data FROM orders WHERE kind = ? AND symbol = ?"
+        params = [kind, pair]
+        if start_timestamp is not None:
+            query += " AND time >= ?"
+            params.append(int(start_timestamp))
+        if end_timestamp is not None:
+            query += " AND time < ?"
+            params.append(int(end_timestamp))
+        with self.__lock:
+            rows = self.__connection.execute(query + " ORDER BY time, order_id", params).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
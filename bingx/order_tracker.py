@@ -0,0 +1,449 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+from .exceptions import BingxAPIError
+from .models import Model, Order
+from .user_stream import FINAL_ORDER_STATUSES
+
+_logger = logging.getLogger(__name__)
+
+# Codes query_order answers with for orders the exchange does not know.
+ORDER_NOT_FOUND_CODES = (80016, 109421)
+
+
+def _field(order, attribute, key):
+    # Orders are dicts of strings, or bingx.models.Order with typed=True.
+    if isinstance(order, Model):
+        return getattr(order, attribute)
+    value = order.get(key)
+    if value is None and key == "clientOrderId":
+        value = order.get("clientOrderID")
+    return value
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _data(response):
+    if response.get("code") != 0:
+        raise BingxAPIError(response.get("code"), response.get("msg"))
+    return response.get("data") or {}
+
+
+class _Tracked(object):
+    """
+    An order registered with the tracker and what is known about it.
+    """
+
+    def __init__(self, pair, order_id, client_order_id, callback):
+        self.pair = pair
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.callback = callback
+        self.future = Future()
+        self.order = None
+        self.state = None
+        self.price = None
+
+
+class OrderTracker(object):
+    """
+    Follows the status of many orders with one query_pending_orders request per symbol, instead of a query_order
+    request per order.
+
+    Every poll of a symbol lists its pending orders once. Tracked orders found there are updated from that list; only
+    the ones that left it, filled, cancelled or never listed, are looked up with query_order. Symbols are polled
+    every min_interval seconds while one of their orders is within near_market of the market price or just changed,
+    and less often the further their orders are from it, up to max_interval. Market prices are read from the API's
+    price source when it has a fresh quote and from a get_all_prices request, made at most every max_interval,
+    otherwise.
+
+    track() returns a concurrent.futures.Future resolved with the order once it is filled, cancelled, expired or
+    rejected (with the BingxAPIError when query_order answers one of ORDER_NOT_FOUND_CODES), and calls the callback
+    with the order on every change of its status or executed quantity. Other errors, throttling included, are
+    reported and the order is looked up again on the next poll. Orders are dicts with the exchange's keys, or
+    bingx.models.Order when the API is typed.
+
+        tracker = OrderTracker(bingx).start()
+        order = bingx.open_limit_order("BTC-USDT", "LONG", 26000, 0.01)
+        filled = tracker.track("BTC-USDT", order_id=order["orderId"]).result()
+
+    With an AsyncBingxAPI use poll_async() or start_async(), and wait_async() to await an order.
+
+    :param api: BingxAPI or AsyncBingxAPI the orders are queried with
+    :param min_interval: Seconds between polls of symbols with orders near the market
+    :param max_interval: Upper bound of the seconds between polls of a symbol
+    :param near_market: Relative distance between an order price and the market price under which the order is near
+        the market, 0.002 for 0.2%
+    :param max_workers: Maximum number of requests sent at the same time during a poll
+    :param on_error: Function called with every exception that failed the poll of a symbol or was raised by a
+        callback. Without it they are logged.
+    """
+
+    def __init__(self, api, min_interval=0.5, max_interval=5, near_market=0.002, max_workers=8, on_error=None,
+                 clock=time.monotonic):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("[!] MIN_INTERVAL MUST BE POSITIVE AND AT MOST MAX_INTERVAL.")
+        self.api = api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.near_market = near_market
+        self.max_workers = max_workers
+        self.on_error = on_error
+        self.clock = clock
+        self.__orders = {}
+        self.__due = {}
+        self.__prices = {}
+        self.__prices_at = None
+        self.__counts = {"polls": 0, "pending_requests": 0, "order_requests": 0, "price_requests": 0, "resolved": 0}
+        self.__lock = threading.Lock()
+        self.__wake = threading.Event()
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__task = None
+
+    # Registration
+
+    def track(self, pair, order_id=None, client_order_id=None, callback=None):
+        """
+        Starts following an order of pair, identified by its order ID or client order ID.
+
+        :param callback: Optional function called with the order on every change, on the polling thread
+        :return: concurrent.futures.Future of the order in its final status
+        """
+        order_id = None if order_id in (None, "", "NULL") else str(order_id)
+        client_order_id = None if client_order_id in (None, "", "NULL") else str(client_order_id)
+        if order_id is None and client_order_id is None:
+            raise ValueError("[!] ORDER ID OR CLIENT ORDER ID IS REQUIRED.")
+        tracked = _Tracked(pair, order_id, client_order_id, callback)
+        with self.__lock:
+            self.__orders.setdefault(pair, []).append(tracked)
+            # A new order is polled soon, it may fill right away.
+            due = self.clock() + self.min_interval
+            self.__due[pair] = min(self.__due.get(pair, due), due)
+        self.__wake.set()
+        return tracked.future
+
+    async def wait_async(self, pair, order_id=None, client_order_id=None, callback=None, timeout=None):
+        """
+        track() for asyncio: waits for the order to reach its final status and returns it.
+        """
+        future = self.track(pair, order_id, client_order_id, callback)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    def untrack(self, pair, order_id=None, client_order_id=None):
+        """
+        Stops following an order, its future is cancelled.
+        """
+        order_id = None if order_id in (None, "", "NULL") else str(order_id)
+        client_order_id = None if client_order_id in (None, "", "NULL") else str(client_order_id)
+        with self.__lock:
+            orders = self.__orders.get(pair, [])
+            removed = [tracked for tracked in orders
+                       if (order_id is not None and tracked.order_id == order_id) or
+                       (client_order_id is not None and tracked.client_order_id == client_order_id)]
+            self.__remove(pair, removed)
+        for tracked in removed:
+            tracked.future.cancel()
+
+    def __remove(self, pair, removed):
+        orders = [tracked for tracked in self.__orders.get(pair, []) if tracked not in removed]
+        if orders:
+            self.__orders[pair] = orders
+        else:
+            self.__orders.pop(pair, None)
+            self.__due.pop(pair, None)
+
+    def tracked(self):
+        """
+        Number of orders followed per symbol.
+        """
+        with self.__lock:
+            return {pair: len(orders) for pair, orders in self.__orders.items()}
+
+    def stats(self):
+        """
+        Number of symbol polls, of pending order, query_order and price requests sent, and of orders resolved.
+        """
+        with self.__lock:
+            return dict(self.__counts, tracked=sum(len(orders) for orders in self.__orders.values()))
+
+    def __count(self, name, number=1):
+        with self.__lock:
+            self.__counts[name] += number
+
+    # Updates
+
+    def __update(self, tracked, order):
+        """
+        Records the latest order and returns whether it changed.
+        """
+        state = (_field(order, "status", "status"), _number(_field(order, "executed_quantity", "executedQty")))
+        if tracked.order_id is None:
+            tracked.order_id = str(_field(order, "order_id", "orderId"))
+        tracked.order = order
+        tracked.price = _number(_field(order, "price", "price")) or tracked.price
+        changed = state != tracked.state
+        tracked.state = state
+        if changed and tracked.callback is not None:
+            try:
+                tracked.callback(order)
+            except Exception as e:
+                # A failing callback must neither stop the poller nor keep the order from being resolved.
+                self.__report(e)
+        if state[0] in FINAL_ORDER_STATUSES:
+            self.__finish(tracked, order)
+        return changed
+
+    def __finish(self, tracked, order=None, error=None):
+        with self.__lock:
+            self.__remove(tracked.pair, [tracked])
+            self.__counts["resolved"] += 1
+        try:
+            if error is not None:
+                tracked.future.set_exception(error)
+            else:
+                tracked.future.set_result(order)
+        except InvalidStateError:
+            # Cancelled by its owner in the meantime.
+            pass
+
+    def __match(self, pair, response):
+        """
+        Updates the tracked orders of pair listed as pending, returns whether one changed and the ones missing.
+        """
+        by_id = {}
+        by_client_id = {}
+        for row in _data(response).get("orders") or []:
+            row = Order.from_dict(row) if self.api.typed else row
+            by_id[str(_field(row, "order_id", "orderId"))] = row
+            client_order_id = _field(row, "client_order_id", "clientOrderId")
+            if client_order_id:
+                by_client_id[str(client_order_id)] = row
+        with self.__lock:
+            orders = list(self.__orders.get(pair, []))
+        changed = False
+        missing = []
+        for tracked in orders:
+            row = by_id.get(tracked.order_id) if tracked.order_id is not None else None
+            if row is None and tracked.client_order_id is not None:
+                row = by_client_id.get(tracked.client_order_id)
+            if row is None:
+                missing.append(tracked)
+            else:
+                changed = self.__update(tracked, row) or changed
+        return changed, missing
+
+    def __queried(self, tracked, outcome):
+        if isinstance(outcome, Exception):
+            self.__report(outcome)
+            return False
+        try:
+            data = _data(outcome)
+        except BingxAPIError as e:
+            if e.code not in ORDER_NOT_FOUND_CODES:
+                # Throttled or a passing failure, the order is looked up again on the next poll.
+                self.__report(e)
+                return False
+            # The exchange does not know the order, waiting longer will not change that.
+            self.__finish(tracked, error=e)
+            return True
+        order = data.get("order", data)
+        if not order:
+            self.__report(ValueError("[!] ORDER " + str(tracked.order_id or tracked.client_order_id) + " NOT FOUND."))
+            return False
+        return self.__update(tracked, Order.from_dict(order) if self.api.typed else order)
+
+    def __reschedule(self, pair, market, changed):
+        with self.__lock:
+            orders = self.__orders.get(pair)
+            if not orders:
+                return
+            prices = [tracked.price for tracked in orders if tracked.price]
+            if changed or not market or not prices:
+                interval = self.min_interval
+            else:
+                # Polled every min_interval within near_market, proportionally less often further away.
+                distance = min(abs(price - market) for price in prices) / market
+                interval = self.min_interval * distance / self.near_market if self.near_market > 0 else 0
+                interval = min(self.max_interval, max(self.min_interval, interval))
+            self.__due[pair] = self.clock() + interval
+
+    def __due_pairs(self):
+        now = self.clock()
+        with self.__lock:
+            return [pair for pair, due in self.__due.items() if due <= now]
+
+    def __quoted_prices(self, pairs):
+        # Prices of the last get_all_prices request are reused for max_interval, the longest any symbol waits anyway.
+        fresh = self.__prices_at is not None and self.clock() - self.__prices_at < self.max_interval
+        prices = {pair: self.__prices[pair] for pair in pairs if fresh and pair in self.__prices}
+        source = getattr(self.api, "price_source", None)
+        if source is not None:
+            for pair in pairs:
+                quote = source.quote(pair)
+                if quote is not None:
+                    prices[pair] = (quote.bid + quote.ask) / 2
+        return prices
+
+    def __snapshot_prices(self, pairs, prices, snapshot):
+        self.__prices = {symbol: price for symbol, price in zip(snapshot.symbols, snapshot.column("price"))
+                         if price == price}
+        self.__prices_at = self.clock()
+        for pair in pairs:
+            if pair not in prices and pair in self.__prices:
+                prices[pair] = self.__prices[pair]
+
+    def __report(self, error):
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            _logger.error("[!] ORDER TRACKER ERROR: %r", error)
+
+    # Polling
+
+    def __poll_pair(self, pair, market):
+        self.__count("pending_requests")
+        try:
+            changed, missing = self.__match(pair, self.api.request("open_orders", symbol=pair))
+        except Exception as e:
+            self.__report(e)
+            self.__reschedule(pair, None, False)
+            return
+
+        def query(tracked):
+            try:
+                return self.api.request("query_order", clientOrderID=tracked.client_order_id or "NULL",
+                                        orderId=tracked.order_id or "NULL", symbol=pair)
+            except Exception as e:
+                return e
+
+        self.__count("order_requests", len(missing))
+        for tracked, outcome in zip(missing, self.api.map_concurrently(query, missing, self.max_workers)):
+            changed = self.__queried(tracked, outcome) or changed
+        self.__reschedule(pair, market, changed)
+
+    def __market_prices(self, pairs):
+        prices = self.__quoted_prices(pairs)
+        if len(prices) < len(pairs):
+            self.__count("price_requests")
+            try:
+                self.__snapshot_prices(pairs, prices, self.api.get_all_prices())
+            except Exception as e:
+                self.__report(e)
+        return prices
+
+    def poll(self, pairs=None):
+        """
+        Polls the given symbols, or every tracked symbol, now.
+        """
+        with self.__lock:
+            pairs = list(self.__orders) if pairs is None else [pair for pair in pairs if pair in self.__orders]
+        if not pairs:
+            return
+        self.__count("polls", len(pairs))
+        prices = self.__market_prices(pairs)
+        self.api.map_concurrently(lambda pair: self.__poll_pair(pair, prices.get(pair)), pairs, self.max_workers)
+
+    async def __poll_pair_async(self, pair, market):
+        self.__count("pending_requests")
+        try:
+            changed, missing = self.__match(pair, await self.api.request("open_orders", symbol=pair))
+        except Exception as e:
+            self.__report(e)
+            self.__reschedule(pair, None, False)
+            return
+
+        async def query(tracked):
+            try:
+                return await self.api.request("query_order", clientOrderID=tracked.client_order_id or "NULL",
+                                              orderId=tracked.order_id or "NULL", symbol=pair)
+            except Exception as e:
+                return e
+
+        self.__count("order_requests", len(missing))
+        for tracked, outcome in zip(missing, await self.api.map_concurrently(query, missing, self.max_workers)):
+            changed = self.__queried(tracked, outcome) or changed
+        self.__reschedule(pair, market, changed)
+
+    async def poll_async(self, pairs=None):
+        """
+        Coroutine version of poll().
+        """
+        with self.__lock:
+            pairs = list(self.__orders) if pairs is None else [pair for pair in pairs if pair in self.__orders]
+        if not pairs:
+            return
+        self.__count("polls", len(pairs))
+        prices = self.__quoted_prices(pairs)
+        if len(prices) < len(pairs):
+            self.__count("price_requests")
+            try:
+                self.__snapshot_prices(pairs, prices, await self.api.get_all_prices())
+            except Exception as e:
+                self.__report(e)
+
+        async def poll_pair(pair):
+            await self.__poll_pair_async(pair, prices.get(pair))
+
+        await self.api.map_concurrently(poll_pair, pairs, self.max_workers)
+
+    def __wait_time(self):
+        with self.__lock:
+            due = min(self.__due.values(), default=None)
+        if due is None:
+            return self.max_interval
+        return max(0.0, due - self.clock())
+
+    def __run(self):
+        while not self.__stop.is_set():
+            self.__wake.wait(self.__wait_time())
+            self.__wake.clear()
+            if self.__stop.is_set():
+                break
+            pairs = self.__due_pairs()
+            if pairs:
+                self.poll(pairs)
+
+    def start(self):
+        """
+        Keeps polling the due symbols in a background thread.
+        """
+        if self.__thread is None:
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__run, name="bingx-order-tracker", daemon=True)
+            self.__thread.start()
+        return self
+
+    async def __run_async(self):
+        while True:
+            # Woken up at least every min_interval so orders tracked in the meantime are not missed.
+            await asyncio.sleep(min(self.__wait_time(), self.min_interval))
+            pairs = self.__due_pairs()
+            if pairs:
+                await self.poll_async(pairs)
+
+    async def start_async(self):
+        """
+        Keeps polling the due symbols in a task of the running event loop.
+        """
+        if self.__task is None:
+            self.__task = asyncio.get_running_loop().create_task(self.__run_async())
+        return self
+
+    def stop(self):
+        self.__stop.set()
+        self.__wake.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
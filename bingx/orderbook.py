@@ -0,0 +1,177 @@
+from array import array
+from bisect import bisect_left
+
+SIDES = {"BUY": "asks", "LONG": "asks", "SELL": "bids", "SHORT": "bids"}
+
+
+class _BookSide(object):
+    """
+    One side of the book, best price first, with running totals of quantity and notional so that fills of any size
+    can be priced with a binary search instead of a walk over the levels.
+    """
+
+    def __init__(self, levels):
+        self.prices = array("d")
+        self.quantities = array("d")
+        self.cumulative_quantity = array("d")
+        self.cumulative_notional = array("d")
+        quantity = notional = 0.0
+        for price, size in levels:
+            quantity += size
+            notional += price * size
+            self.prices.append(price)
+            self.quantities.append(size)
+            self.cumulative_quantity.append(quantity)
+            self.cumulative_notional.append(notional)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def level_for(self, volume):
+        index = bisect_left(self.cumulative_quantity, volume)
+        if index == len(self.prices):
+            raise ValueError("[!] NOT ENOUGH DEPTH IN THE BOOK TO FILL %s." % volume)
+        return index
+
+    def notional_for(self, volume):
+        index = self.level_for(volume)
+        if index == 0:
+            return volume * self.prices[0]
+        filled = self.cumulative_quantity[index - 1]
+        return self.cumulative_notional[index - 1] + (volume - filled) * self.prices[index]
+
+
+class OrderBook(object):
+    """
+    Order book snapshot with bids and asks stored as contiguous float arrays (bid_prices, bid_quantities, ask_prices,
+    ask_quantities), best level first.
+
+    Queries that depend on a volume take the side of the order that would be sent: "BUY"/"LONG" fills against the
+    asks and "SELL"/"SHORT" against the bids.
+
+    :param bids: (price, quantity) pairs, numbers or strings, in any order
+    :param asks: (price, quantity) pairs, numbers or strings, in any order
+    :param timestamp: Time of the snapshot in epoch milliseconds
+    """
+
+    def __init__(self, bids, asks, timestamp=None):
+        self.timestamp = timestamp
+        self.bids = _BookSide(sorted(((float(price), float(size)) for price, size in bids), reverse=True))
+        self.asks = _BookSide(sorted((float(price), float(size)) for price, size in asks))
+        self.bid_prices = self.bids.prices
+        self.bid_quantities = self.bids.quantities
+        self.ask_prices = self.asks.prices
+        self.ask_quantities = self.asks.quantities
+
+    @classmethod
+    def from_depth(cls, data):
+        """
+        Builds a book from the data returned by get_market_depth.
+        """
+        return cls(data.get("bids") or [], data.get("asks") or [], data.get("T"))
+
+    def __repr__(self):
+        return "OrderBook(%d bids, %d asks, best %s/%s)" % (len(self.bids), len(self.asks), self.best_bid,
+                                                           self.best_ask)
+
+    def __side(self, side):
+        try:
+            return getattr(self, SIDES[side])
+        except KeyError:
+            raise ValueError("[!] INVALID VALUE FOR SIDE. Side should be BUY, SELL, LONG or SHORT")
+
+    @property
+    def best_bid(self):
+        return self.bid_prices[0] if len(self.bid_prices) else None
+
+    @property
+    def best_ask(self):
+        return self.ask_prices[0] if len(self.ask_prices) else None
+
+    @property
+    def spread(self):
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return self.best_ask - self.best_bid
+
+    @property
+    def mid_price(self):
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return (self.best_ask + self.best_bid) / 2
+
+    def cumulative_depth(self, side):
+        """
+        Total quantity available up to and including each level of the side an order of the given side fills against.
+        """
+        return self.__side(side).cumulative_quantity
+
+    def price_at_depth(self, side, volume):
+        """
+        Price of the last level an order of the given side and volume would reach.
+        """
+        book_side = self.__side(side)
+        return book_side.prices[book_side.level_for(volume)]
+
+    def vwap(self, side, volume):
+        """
+        Average fill price of a market order of the given side and volume.
+        """
+        if volume <= 0:
+            raise ValueError("[!] VOLUME MUST BE POSITIVE.")
+        return self.__side(side).notional_for(volume) / volume
+
+    def slippage(self, side, volume):
+        """
+        Expected cost of a market order relative to the best price, i.e. 0.001 means the average fill is 0.1% worse
+        than the top of the book.
+        """
+        book_side = self.__side(side)
+        vwap = self.vwap(side, volume)
+        best = book_side.prices[0]
+        return (vwap - best) / best if book_side is self.asks else (best - vwap) / best
+
+    def max_volume(self, side, max_slippage):
+        """
+        Largest market order of the given side whose slippage stays within max_slippage.
+        """
+        book_side = self.__side(side)
+        if not len(book_side):
+            return 0.0
+        best = book_side.prices[0]
+        buying = book_side is self.asks
+        target = best * (1 + max_slippage) if buying else best * (1 - max_slippage)
+        # Average price after fully taking levels 0..k only gets worse as k grows, so binary search the last level
+        # that keeps it within the target.
+        low, high = 0, len(book_side)
+        while low < high:
+            middle = (low + high) // 2
+            average = book_side.cumulative_notional[middle] / book_side.cumulative_quantity[middle]
+            if (average <= target) if buying else (average >= target):
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(book_side):
+            return book_side.cumulative_quantity[-1]
+        quantity = book_side.cumulative_quantity[low - 1] if low else 0.0
+        notional = book_side.cumulative_notional[low - 1] if low else 0.0
+        price = book_side.prices[low]
+        if price == target:
+            return book_side.cumulative_quantity[low]
+        # Solve (notional + (volume - quantity) * price) / volume == target for volume inside level low.
+        return (notional - quantity * price) / (target - price)
+
+    @staticmethod
+    def __depth_quantity(book_side, levels):
+        count = len(book_side) if levels is None else min(levels, len(book_side))
+        return book_side.cumulative_quantity[count - 1] if count > 0 else 0.0
+
+    def imbalance(self, levels=None):
+        """
+        (bid quantity - ask quantity) / (bid quantity + ask quantity) over the top levels of both sides, between -1
+        (only asks) and 1 (only bids).
+        """
+        bid_quantity = self.__depth_quantity(self.bids, levels)
+        ask_quantity = self.__depth_quantity(self.asks, levels)
+        total = bid_quantity + ask_quantity
+        return (bid_quantity - ask_quantity) / total if total else 0.0
@@ -0,0 +1,263 @@
+import asyncio
+import http.client
+import random
+import socket
+import threading
+import time
+import urllib.error
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# HTTP statuses worth another try: throttling and server side failures.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_RETRYABLE_ERRORS = (urllib.error.URLError, ConnectionError, TimeoutError, socket.timeout, asyncio.TimeoutError,
+                     http.client.HTTPException)
+
+
+class RequestPolicy(object):
+    """
+    Deadlines, retries and hedged requests.
+
+    Every call gets a deadline: all attempts together must finish within it, including the waits for the rate limiter
+    and for a free connection. An attempt that may still be retried gets try_fraction of the time that is left as
+    its timeout, so a single stalled attempt cannot use up the budget of the retries; the last one gets all of it.
+    Failed attempts are retried after a jittered exponential backoff when the error
+    is transient (connection errors, timeouts, 429 and 5xx) and replaying the request is safe, that is the endpoint
+    is idempotent or the order carries a clientOrderID, which the exchange refuses to accept twice. Other orders are
+    never sent twice.
+
+    With hedge_percentile, a GET that has not answered after that percentile of its recent latencies is sent a
+    second time and whichever answer comes first is used. This trades a few extra requests for a much shorter tail.
+
+    :param deadline: Seconds a call may take including retries
+    :param deadlines: Mapping of endpoint path to a deadline overriding the default one
+    :param retries: Attempts after the first one
+    :param backoff: Upper bound of the first backoff in seconds, doubled on every retry
+    :param max_backoff: Upper bound of any backoff in seconds
+    :param try_fraction: Share of the remaining deadline an attempt that may be retried is given as its timeout
+    :param hedge_percentile: i.e. 0.95 to hedge GETs slower than 95% of their recent latencies, None to never hedge
+    :param hedge_min_samples: Latencies an endpoint needs before it is hedged
+    :param window: Number of recent latencies kept per endpoint
+    """
+
+    def __init__(self, deadline=10.0, deadlines=None, retries=2, backoff=0.1, max_backoff=2.0, try_fraction=0.5,
+                 hedge_percentile=None, hedge_min_samples=20, window=256, clock=time.monotonic, sleep=time.sleep):
+        if hedge_percentile is not None and not 0 < hedge_percentile < 1:
+            raise ValueError("[!] HEDGE_PERCENTILE MUST BE BETWEEN 0 AND 1.")
+        if not 0 < try_fraction <= 1:
+            raise ValueError("[!] TRY_FRACTION MUST BE BETWEEN 0 AND 1.")
+        self.deadline = deadline
+        self.deadlines = dict(deadlines or {})
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.try_fraction = try_fraction
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+        self.counters = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+        self.__latencies = {}
+        self.__lock = threading.Lock()
+        self.__executor = None
+
+    @staticmethod
+    def replay_safe(endpoint, query):
+        return endpoint.idempotent or "clientOrderID=" in query
+
+    @staticmethod
+    def retryable(error):
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code in RETRY_STATUSES
+        return isinstance(error, _RETRYABLE_ERRORS)
+
+    def deadline_for(self, endpoint):
+        return self.deadlines.get(endpoint.path, self.deadline)
+
+    def backoff_for(self, retry):
+        # Full jitter: a random delay up to the exponential bound, so clients that failed together retry apart.
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+
+    def record(self, endpoint, latency):
+        with self.__lock:
+            latencies = self.__latencies.get(endpoint.path)
+            if latencies is None:
+                latencies = self.__latencies[endpoint.path] = deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def hedge_delay(self, endpoint):
+        """
+        Seconds after which a GET to endpoint is hedged, None if it is not.
+        """
+        if self.hedge_percentile is None or endpoint.method != "GET":
+            return None
+        with self.__lock:
+            latencies = sorted(self.__latencies.get(endpoint.path) or ())
+        if len(latencies) < self.hedge_min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile))]
+
+    def latency_percentiles(self, endpoint_path, percentiles=(0.5, 0.9, 0.99)):
+        with self.__lock:
+            latencies = sorted(self.__latencies.get(endpoint_path) or ())
+        if not latencies:
+            return {}
+        return {p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] for p in percentiles}
+
+    def try_timeout(self, remaining, last):
+        """
+        Timeout of an attempt with remaining seconds left before the deadline, last telling whether it can not be
+        retried.
+        """
+        return remaining if last else remaining * self.try_fraction
+
+    def __count(self, name):
+        with self.__lock:
+            self.counters[name] += 1
+
+    def __deadline_exceeded(self, endpoint):
+        self.__count("deadline_exceeded")
+        return TimeoutError("[!] DEADLINE OF %ss EXCEEDED FOR %s" % (self.deadline_for(endpoint), endpoint.path))
+
+    def __timed_out(self, endpoint, timeout, last):
+        if last:
+            return self.__deadline_exceeded(endpoint)
+        # Retried like any other timeout, the deadline is checked before every attempt.
+        return TimeoutError("[!] ATTEMPT TIMED OUT AFTER %.3fs FOR %s" % (timeout, endpoint.path))
+
+    def run(self, endpoint, query, attempt):
+        """
+        Calls attempt(timeout) until it returns, following the policy. attempt sends the request once and has to
+        give up after timeout seconds.
+        """
+        self.__count("calls")
+        deadline = self.clock() + self.deadline_for(endpoint)
+        replay = self.replay_safe(endpoint, query)
+        retry = 0
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                raise self.__deadline_exceeded(endpoint)
+            last = not replay or retry >= self.retries
+            timeout = self.try_timeout(remaining, last)
+            try:
+                return self.__attempt(endpoint, attempt, timeout, last)
+            except Exception as e:
+                if last or not self.retryable(e):
+                    raise
+                delay = self.backoff_for(retry)
+                if self.clock() + delay >= deadline:
+                    raise
+                retry += 1
+                self.__count("retries")
+                self.sleep(delay)
+
+    def __attempt(self, endpoint, attempt, timeout, last):
+        hedge_after = self.hedge_delay(endpoint)
+        start = self.clock()
+        if hedge_after is None or hedge_after >= timeout:
+            response = attempt(timeout)
+            self.record(endpoint, self.clock() - start)
+            return response
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="bingx-hedge")
+            executor = self.__executor
+        first = executor.submit(attempt, timeout)
+        first.add_done_callback(lambda f: f.exception() is None and self.record(endpoint, self.clock() - start))
+        if wait([first], timeout=hedge_after).done:
+            return first.result()
+        self.__count("hedges")
+        end = start + timeout
+        second = executor.submit(attempt, end - self.clock())
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, end - self.clock()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise self.__timed_out(endpoint, timeout, last)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self.__count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def run_async(self, endpoint, query, attempt):
+        """
+        Coroutine version of run(), attempt being a coroutine function.
+        """
+        self.__count("calls")
+        deadline = self.clock() + self.deadline_for(endpoint)
+        replay = self.replay_safe(endpoint, query)
+        retry = 0
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                raise self.__deadline_exceeded(endpoint)
+            last = not replay or retry >= self.retries
+            timeout = self.try_timeout(remaining, last)
+            try:
+                return await self.__attempt_async(endpoint, attempt, timeout, last)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if last or not self.retryable(e):
+                    raise
+                delay = self.backoff_for(retry)
+                if self.clock() + delay >= deadline:
+                    raise
+                retry += 1
+                self.__count("retries")
+                await asyncio.sleep(delay)
+
+    async def __attempt_async(self, endpoint, attempt, timeout, last):
+        hedge_after = self.hedge_delay(endpoint)
+        start = self.clock()
+        if hedge_after is None or hedge_after >= timeout:
+            try:
+                response = await asyncio.wait_for(attempt(timeout), timeout)
+            except asyncio.TimeoutError:
+                raise self.__timed_out(endpoint, timeout, last)
+            self.record(endpoint, self.clock() - start)
+            return response
+        first = asyncio.ensure_future(attempt(timeout))
+        first.add_done_callback(lambda f: not f.cancelled() and f.exception() is None and
+                                self.record(endpoint, self.clock() - start))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return first.result()
+            self.__count("hedges")
+            end = start + timeout
+            second = asyncio.ensure_future(attempt(end - self.clock()))
+            pending = {first, second}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, end - self.clock()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise self.__timed_out(endpoint, timeout, last)
+                for future in done:
+                    if future.exception() is None:
+                        if future is second:
+                            self.__count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def stats(self):
+        with self.__lock:
+            return dict(self.counters)
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False)
+            self.__executor = None
@@ -0,0 +1,262 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .api import BingxAPI
+from .async_api import AsyncBingxAPI
+from .ratelimit import RateLimiter
+from .transport import AsyncHTTPTransport, HTTPTransport
+
+
+class FlattenResult(dict):
+    """
+    What flatten() did on one account: {"close_all_positions": ..., "cancel_all_orders": [...]}, one cancel per pair.
+    Every slot holds the result of its request or the exception it raised, so a failed cancel does not hide that the
+    positions were closed, or the other way around.
+    """
+
+    @property
+    def errors(self):
+        outcomes = [self["close_all_positions"]] + list(self["cancel_all_orders"])
+        return [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+
+
+def _failed(result):
+    return isinstance(result, Exception) or (isinstance(result, FlattenResult) and bool(result.errors))
+
+
+class PoolResults(dict):
+    """
+    Results of an operation run across a pool, keyed by account name. Accounts where the operation raised map to the
+    exception instead of a result, so one failing account never hides the others. After flatten() every account maps
+    to a FlattenResult, failed when any of its requests did.
+    """
+
+    @property
+    def succeeded(self):
+        return {name: result for name, result in self.items() if not _failed(result)}
+
+    @property
+    def failed(self):
+        return {name: result for name, result in self.items() if _failed(result)}
+
+    @property
+    def ok(self):
+        return not self.failed
+
+
+def _accounts(accounts):
+    # A mapping of name to (api_key, secret_key), or a list of (api_key, secret_key) named by their API key.
+    if isinstance(accounts, dict):
+        return list(accounts.items())
+    return [(api_key, (api_key, secret_key)) for api_key, secret_key in accounts]
+
+
+class AccountPool(object):
+    """
+    Many accounts driven as one: every account gets its own BingxAPI and RateLimiter, since the exchange limits
+    each API key separately, but they all send through one keep-alive connection pool and run() fans an operation
+    out to all of them at the same time. With connections warmed up by warm() and max_workers covering every request,
+    flatten() across every account takes about one round trip.
+
+        pool = AccountPool({"main": (API_KEY, SECRET_KEY), "sub1": (SUB_KEY, SUB_SECRET)})
+        pool.warm()
+        results = pool.flatten()
+        print(results.failed)
+
+    :param accounts: Mapping of account name to (api_key, secret_key), or a list of (api_key, secret_key)
+    :param transport: The shared bingx.transport.HTTPTransport. Defaults to one with max_workers connections.
+    :param rate_limits: Limits of every account's RateLimiter, merged into the default ones, see RateLimiter. False
+        disables rate limiting.
+    :param max_workers: Maximum number of requests in flight at the same time. Defaults to four per account, enough
+        to flatten with three pairs in a single round trip.
+    :param options: Further BingxAPI parameters (timestamp, policy, instrumentation, decoder, typed...) used for
+        every account
+    """
+    API = BingxAPI
+
+    def __init__(self, accounts, transport=None, rate_limits=None, max_workers=None, **options):
+        accounts = _accounts(accounts)
+        if not accounts:
+            raise ValueError("[!] AT LEAST ONE ACCOUNT IS REQUIRED.")
+        self.max_workers = max_workers or 4 * len(accounts)
+        self.transport = transport if transport is not None else self._default_transport(self.max_workers)
+        self.apis = {}
+        for name, (api_key, secret_key) in accounts:
+            limiter = RateLimiter(rate_limits or None) if rate_limits is not False else None
+            self.apis[name] = self.API(api_key, secret_key, transport=self.transport, rate_limiter=limiter, **options)
+        # The server clock offset does not depend on the account, one estimate serves them all.
+        clock = next(iter(self.apis.values())).clock
+        for api in self.apis.values():
+            api.clock = clock
+        self.__executor = None
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def _default_transport(connections):
+        return HTTPTransport(pool_size=connections)
+
+    def __getitem__(self, name):
+        return self.apis[name]
+
+    def __len__(self):
+        return len(self.apis)
+
+    def __iter__(self):
+        return iter(self.apis)
+
+    @staticmethod
+    def _operation(operation, args, kwargs):
+        if callable(operation):
+            return lambda api: operation(api, *args, **kwargs)
+        return lambda api: getattr(api, operation)(*args, **kwargs)
+
+    def __get_executor(self):
+        if self.__executor is None:
+            with self.__lock:
+                if self.__executor is None:
+                    self.__executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                         thread_name_prefix="bingx-pool")
+        return self.__executor
+
+    def _run_tasks(self, tasks):
+        """
+        Runs (name, function) tasks concurrently and returns their results or exceptions in order.
+        """
+        def call(task):
+            name, function = task
+            try:
+                return function(self.apis[name])
+            except Exception as e:
+                return e
+
+        return list(self.__get_executor().map(call, tasks))
+
+    def run(self, operation, *args, accounts=None, **kwargs):
+        """
+        Runs operation on every account (or the named accounts) at the same time.
+
+        :param operation: Name of a BingxAPI method, i.e. "get_perpetual_balance", or a function taking the account's
+            BingxAPI. args and kwargs are passed on to it.
+        :param accounts: Names of the accounts to run on, all of them if None
+        :return: PoolResults of account name to result or exception
+        """
+        names = list(self.apis) if accounts is None else list(accounts)
+        function = self._operation(operation, args, kwargs)
+        return PoolResults(zip(names, self._run_tasks([(name, function) for name in names])))
+
+    def _flatten_tasks(self, pairs, accounts):
+        names = list(self.apis) if accounts is None else list(accounts)
+        cancels = [lambda api, pair=pair: api.cancel_all_orders_of_symbol(pair) for pair in pairs or []]
+        return names, [(name, function) for name in names
+                       for function in [lambda api: api.close_all_positions()] + cancels]
+
+    @staticmethod
+    def _flatten_results(names, tasks, outcomes):
+        parts = {name: [] for name in names}
+        for (name, _), outcome in zip(tasks, outcomes):
+            parts[name].append(outcome)
+        return PoolResults((name, FlattenResult(close_all_positions=outcomes[0], cancel_all_orders=outcomes[1:]))
+                           for name, outcomes in parts.items())
+
+    def flatten(self, pairs=None, accounts=None):
+        """
+        Emergency exit: closes every position of every account and cancels their pending orders on pairs, all
+        requests at the same time.
+
+        :param pairs: Symbols whose pending orders are cancelled, none if None
+        :param accounts: Names of the accounts to flatten, all of them if None
+        :return: PoolResults of account name to FlattenResult, {"close_all_positions": ..., "cancel_all_orders":
+            [...]} with the result or exception of every request
+        """
+        names, tasks = self._flatten_tasks(pairs, accounts)
+        return self._flatten_results(names, tasks, self._run_tasks(tasks))
+
+    def close_all_positions(self, accounts=None):
+        return self.run("close_all_positions", accounts=accounts)
+
+    def cancel_all_orders_of_symbol(self, pair, accounts=None):
+        return self.run("cancel_all_orders_of_symbol", pair, accounts=accounts)
+
+    def get_perpetual_balance(self, accounts=None):
+        return self.run("get_perpetual_balance", accounts=accounts)
+
+    def get_my_perpetual_swap_positions(self, pair="NULL", accounts=None):
+        return self.run("get_my_perpetual_swap_positions", pair, accounts=accounts)
+
+    def _warm_tasks(self, connections):
+        # Spread over the accounts so no single rate limiter holds the requests back.
+        names = list(self.apis)
+        return [(names[i % len(names)], lambda api: api._get_server_time())
+                for i in range(connections or self.max_workers)]
+
+    def warm(self, connections=None):
+        """
+        Opens connections (max_workers by default) ahead of time with server time requests, so the next fan-out
+        does not pay for TCP and TLS handshakes.
+        """
+        return self._run_tasks(self._warm_tasks(connections))
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+        for api in self.apis.values():
+            if api.clock is not None:
+                api.clock.stop()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncAccountPool(AccountPool):
+    """
+    asyncio version of AccountPool: accounts are AsyncBingxAPI sharing one AsyncHTTPTransport, and run(), flatten()
+    and the shortcuts are coroutines gathering the requests of every account on the event loop.
+    """
+    API = AsyncBingxAPI
+
+    @staticmethod
+    def _default_transport(connections):
+        return AsyncHTTPTransport(pool_size=connections)
+
+    async def _run_tasks(self, tasks):
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def call(task):
+            name, function = task
+            async with semaphore:
+                try:
+                    return await function(self.apis[name])
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(call(task) for task in tasks))
+
+    async def run(self, operation, *args, accounts=None, **kwargs):
+        names = list(self.apis) if accounts is None else list(accounts)
+        function = self._operation(operation, args, kwargs)
+        return PoolResults(zip(names, await self._run_tasks([(name, function) for name in names])))
+
+    async def flatten(self, pairs=None, accounts=None):
+        names, tasks = self._flatten_tasks(pairs, accounts)
+        return self._flatten_results(names, tasks, await self._run_tasks(tasks))
+
+    async def warm(self, connections=None):
+        return await self._run_tasks(self._warm_tasks(connections))
+
+    async def close(self):
+        for api in self.apis.values():
+            if api.clock is not None:
+                api.clock.stop()
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import namedtuple
+
+Quote = namedtuple("Quote", ["bid", "ask", "source", "age"])
+Quote.__doc__ = """
+Best bid and offer of a symbol.
+
+bid     Best bid price, the price to sell at
+ask     Best offer price, the price to buy at
+source  Where the quote came from: "stream", "local" or "rest"
+age     Seconds since the quote was received, 0 for quotes just requested
+"""
+
+SOURCES = ("stream", "local", "rest")
+
+
+def _stream_prices(data):
+    # Book ticker stream updates carry the best bid as "b" and the best offer as "a".
+    return float(data["b"]), float(data["a"])
+
+
+class BookTickerSource(object):
+    """
+    Best bid and offer for "BBO" limit orders read from memory instead of a request before every order.
+
+    Quotes come from the book tickers of a bingx.stream.MarketDataStream and from update(), which can be fed from any
+    other source. A quote older than max_staleness seconds is never used: BingxAPI then requests the book ticker
+    like it does without a price source. stats() and last_source() report which source the quotes were served from.
+
+        stream = MarketDataStream().start()
+        prices = BookTickerSource(stream, max_staleness=0.5, pairs=["BTC-USDT"])
+        bingx = BingxAPI(API_KEY, SECRET_KEY, price_source=prices)
+
+    :param stream: A bingx.stream.MarketDataStream whose book tickers are used, None to rely on update() only
+    :param max_staleness: Age in seconds from which a quote is too old to price an order
+    :param pairs: Symbols whose book tickers are subscribed on stream right away
+    """
+
+    def __init__(self, stream=None, max_staleness=0.5, pairs=(), clock=time.monotonic):
+        if max_staleness <= 0:
+            raise ValueError("[!] MAX_STALENESS MUST BE POSITIVE.")
+        self.stream = stream
+        self.max_staleness = max_staleness
+        self.clock = clock
+        self.__quotes = {}
+        self.__last = {}
+        self.__counts = dict.fromkeys(SOURCES + ("stale",), 0)
+        self.__lock = threading.Lock()
+        for pair in pairs:
+            self.watch(pair)
+
+    def watch(self, pair):
+        """
+        Subscribes to the book ticker of pair on the stream.
+        """
+        if self.stream is None:
+            raise ValueError("[!] A STREAM IS REQUIRED TO WATCH A SYMBOL.")
+        self.stream.subscribe_book_ticker(pair)
+
+    def update(self, pair, bid, ask, received_at=None):
+        """
+        Stores the best bid and offer of pair, received at received_at (now when it is None) on the clock of the
+        source.
+        """
+        self.__quotes[pair] = (float(bid), float(ask), self.clock() if received_at is None else received_at)
+
+    def __stream_quote(self, pair):
+        if self.stream is None:
+            return None
+        age = self.stream.get_book_ticker_age(pair)
+        data = self.stream.get_book_ticker(pair)
+        if age is None or data is None:
+            return None
+        bid, ask = _stream_prices(data)
+        return Quote(bid, ask, "stream", age)
+
+    def __local_quote(self, pair):
+        quote = self.__quotes.get(pair)
+        if quote is None:
+            return None
+        return Quote(quote[0], quote[1], "local", self.clock() - quote[2])
+
+    def quote(self, pair):
+        """
+        The freshest quote of pair that is younger than max_staleness, None if there is none. Never touches the
+        network.
+        """
+        best = None
+        for quote in (self.__stream_quote(pair), self.__local_quote(pair)):
+            if quote is not None and quote.age < self.max_staleness and (best is None or quote.age < best.age):
+                best = quote
+        if best is None:
+            with self.__lock:
+                self.__counts["stale"] += 1
+            return None
+        self.record(pair, best.source)
+        return best
+
+    def record(self, pair, source):
+        """
+        Counts a quote of pair served from source.
+        """
+        with self.__lock:
+            self.__counts[source] += 1
+            self.__last[pair] = source
+
+    def last_source(self, pair):
+        """
+        Source of the last quote served for pair: "stream", "local" or "rest", None before the first one.
+        """
+        return self.__last.get(pair)
+
+    def stats(self):
+        """
+        Number of quotes served by every source, and how many times no fresh quote was found.
+        """
+        with self.__lock:
+            return dict(self.__counts)
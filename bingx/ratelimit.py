@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+# Requests per second and burst size of each endpoint group.
+DEFAULT_LIMITS = {"market": (20.0, 40), "account": (5.0, 10), "trade": (10.0, 10)}
+
+# Response code BingX answers with while an endpoint is disabled for calling it too often.
+THROTTLE_CODES = (100410,)
+
+
+class _Bucket(object):
+    """
+    Token bucket of one endpoint group. After a throttling signal the rate is cut and nothing is handed out until
+    the pause is over; the rate then grows back to the configured one over recovery seconds.
+    """
+
+    def __init__(self, rate, capacity, now):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = now
+        self.paused_until = now
+        self.queue = []
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_queued = 0
+
+    def refill(self, now, recovery):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * elapsed / recovery)
+            self.updated = now
+
+    def delay(self, weight, now):
+        """
+        Seconds until weight tokens are available, 0 if they are now.
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= weight:
+            return 0.0
+        return (min(weight, self.capacity) - self.tokens) / self.rate
+
+
+class _Ticket(object):
+    __slots__ = ("weight", "enqueued", "wake")
+
+    def __init__(self, weight, enqueued, wake):
+        self.weight = weight
+        self.enqueued = enqueued
+        self.wake = wake
+
+
+class RateLimiter(object):
+    """
+    Client side rate limiting with one token bucket per endpoint group (market, account, trade).
+
+    Requests that have to wait are queued per group by priority, then by arrival, so an order or cancel
+    (PRIORITY_HIGH) is always sent before polls that queued up earlier. When the server signals throttling with
+    HTTP 429 or a rate limit code, the group pauses for Retry-After (or pause) seconds and continues at a reduced rate
+    that recovers over recovery seconds.
+
+    :param limits: Mapping of group to (requests per second, burst size), merged into DEFAULT_LIMITS
+    :param pause: Seconds a group stops after a throttling signal without Retry-After
+    :param slowdown: Factor the rate is multiplied with after a throttling signal
+    :param recovery: Seconds the rate takes to grow back to the configured rate
+    """
+
+    def __init__(self, limits=None, pause=1.0, slowdown=0.5, recovery=30.0, clock=time.monotonic):
+        self.clock = clock
+        self.pause = pause
+        self.slowdown = slowdown
+        self.recovery = recovery
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        now = clock()
+        self.__buckets = {group: _Bucket(rate, capacity, now) for group, (rate, capacity) in self.limits.items()}
+        self.__lock = threading.Lock()
+        self.__sequence = itertools.count()
+
+    def __enqueue(self, bucket, priority, weight, wake):
+        ticket = _Ticket(weight, self.clock(), wake)
+        with self.__lock:
+            heapq.heappush(bucket.queue, (priority, next(self.__sequence), ticket))
+            bucket.max_queued = max(bucket.max_queued, len(bucket.queue))
+        return ticket
+
+    def __try_acquire(self, bucket, ticket):
+        """
+        Takes the tokens if ticket is first in line and they are available. Returns None on success, otherwise the
+        seconds to wait before trying again, or -1 to wait until woken.
+        """
+        with self.__lock:
+            if bucket.queue[0][2] is not ticket:
+                return -1
+            now = self.clock()
+            bucket.refill(now, self.recovery)
+            delay = bucket.delay(ticket.weight, now)
+            if delay > 0:
+                return delay
+            bucket.tokens -= ticket.weight
+            heapq.heappop(bucket.queue)
+            waited = now - ticket.enqueued
+            bucket.acquired += 1
+            bucket.total_wait += waited
+            bucket.max_wait = max(bucket.max_wait, waited)
+            if bucket.queue:
+                bucket.queue[0][2].wake()
+            return None
+
+    def __bucket(self, group):
+        try:
+            return self.__buckets[group]
+        except KeyError:
+            raise ValueError("[!] UNKNOWN RATE LIMIT GROUP " + str(group) + ".")
+
+    def acquire(self, group, priority, weight=1, timeout=None):
+        """
+        Blocks until a request of the given group, priority and weight may be sent. Raises TimeoutError, and gives
+        up its place in the queue, when that takes longer than timeout seconds.
+        """
+        bucket = self.__bucket(group)
+        event = threading.Event()
+        ticket = self.__enqueue(bucket, priority, weight, event.set)
+        deadline = None if timeout is None else ticket.enqueued + timeout
+        try:
+            while True:
+                event.clear()
+                delay = self.__try_acquire(bucket, ticket)
+                if delay is None:
+                    return
+                if deadline is not None:
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        raise TimeoutError("[!] RATE LIMIT WAIT OF " + str(group) + " EXCEEDED " + str(timeout) + "s.")
+                    delay = remaining if delay < 0 else min(delay, remaining)
+                event.wait(None if delay < 0 else delay)
+        except BaseException:
+            self.__abandon(bucket, ticket)
+            raise
+
+    async def acquire_async(self, group, priority, weight=1):
+        """
+        Coroutine version of acquire().
+        """
+        bucket = self.__bucket(group)
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        ticket = self.__enqueue(bucket, priority, weight, lambda: loop.call_soon_threadsafe(event.set))
+        try:
+            while True:
+                event.clear()
+                delay = self.__try_acquire(bucket, ticket)
+                if delay is None:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), None if delay < 0 else delay)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            self.__abandon(bucket, ticket)
+            raise
+
+    def __abandon(self, bucket, ticket):
+        with self.__lock:
+            entries = [entry for entry in bucket.queue if entry[2] is not ticket]
+            if len(entries) != len(bucket.queue):
+                bucket.queue[:] = entries
+                heapq.heapify(bucket.queue)
+                if bucket.queue:
+                    bucket.queue[0][2].wake()
+
+    def throttled(self, group, retry_after=None):
+        """
+        Reports that the server throttled a request of group.
+        """
+        bucket = self.__bucket(group)
+        try:
+            pause = float(retry_after) if retry_after is not None else self.pause
+        except ValueError:
+            pause = self.pause
+        with self.__lock:
+            now = self.clock()
+            bucket.refill(now, self.recovery)
+            bucket.throttled += 1
+            bucket.rate = max(bucket.base_rate * 0.1, bucket.rate * self.slowdown)
+            bucket.tokens = 0.0
+            bucket.paused_until = max(bucket.paused_until, now + pause)
+
+    def stats(self):
+        """
+        Per group: requests waiting now, most requests ever waiting, requests let through, seconds they waited in
+        total and at most, throttling signals received and the current rate.
+        """
+        with self.__lock:
+            return {group: {"queued": len(bucket.queue), "max_queued": bucket.max_queued, "acquired": bucket.acquired,
+                            "total_wait": bucket.total_wait, "max_wait": bucket.max_wait,
+                            "throttled": bucket.throttled, "rate": bucket.rate}
+                    for group, bucket in self.__buckets.items()}
@@ -0,0 +1,105 @@
+import heapq
+from array import array
+
+PRICE_FIELDS = ("price", "time")
+TICKER_FIELDS = ("priceChange", "priceChangePercent", "lastPrice", "lastQty", "highPrice", "lowPrice", "volume",
+                 "quoteVolume", "openPrice", "openTime", "closeTime")
+FUNDING_FIELDS = ("markPrice", "indexPrice", "lastFundingRate", "nextFundingTime")
+
+# Fields holding epoch milliseconds are stored as int64, everything else as float64.
+TIME_FIELDS = ("time", "openTime", "closeTime", "nextFundingTime")
+
+
+def _number(value):
+    try:
+        return float(str(value).rstrip("%"))
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _time(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class Snapshot(object):
+    """
+    One value per symbol and field for the whole market, stored column by column: symbols is the list of symbols,
+    index maps a symbol to its row and every field is an array with one entry per row. Numbers the exchange sent as
+    strings are parsed once; missing or unparsable values are NaN (0 for time fields).
+
+    Columns support the buffer protocol, so numpy.frombuffer() can wrap them without copying; to_numpy() does that
+    for you when NumPy is installed.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.symbols = []
+        self.index = {}
+        self.columns = {name: array("q" if name in TIME_FIELDS else "d") for name in self.fields}
+
+    @classmethod
+    def from_rows(cls, rows, fields):
+        """
+        Builds a snapshot from the list of per-symbol dicts returned when symbol is left out of a request.
+        """
+        snapshot = cls(fields)
+        if isinstance(rows, dict):
+            rows = [rows]
+        for row in rows or []:
+            symbol = row.get("symbol")
+            if symbol is None or symbol in snapshot.index:
+                continue
+            snapshot.index[symbol] = len(snapshot.symbols)
+            snapshot.symbols.append(symbol)
+            for name in snapshot.fields:
+                value = row.get(name)
+                if name in TIME_FIELDS:
+                    snapshot.columns[name].append(_time(value))
+                else:
+                    snapshot.columns[name].append(_number(value))
+        return snapshot
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __repr__(self):
+        return "Snapshot(%d symbols, fields %s)" % (len(self), ", ".join(self.fields))
+
+    def column(self, name):
+        if name not in self.columns:
+            raise ValueError("[!] INVALID COLUMN. Valid columns are: " + str(self.fields))
+        return self.columns[name]
+
+    def get(self, symbol, name):
+        return self.column(name)[self.index[symbol]]
+
+    def row(self, symbol):
+        """
+        All fields of symbol as a dict.
+        """
+        position = self.index[symbol]
+        return dict({name: self.columns[name][position] for name in self.fields}, symbol=symbol)
+
+    def top(self, name, n=10, lowest=False):
+        """
+        The n symbols with the highest (or lowest) value of name as (symbol, value) pairs, best first. NaN values are
+        skipped.
+        """
+        values = self.column(name)
+        rows = (i for i in range(len(values)) if values[i] == values[i])
+        select = heapq.nsmallest if lowest else heapq.nlargest
+        return [(self.symbols[i], values[i]) for i in select(n, rows, key=values.__getitem__)]
+
+    def to_numpy(self):
+        """
+        Returns a dict of NumPy arrays sharing memory with the columns. Requires NumPy.
+        """
+        import numpy
+        return {name: numpy.frombuffer(values, dtype=numpy.int64 if values.typecode == "q" else numpy.float64)
+                for name, values in self.columns.items()}
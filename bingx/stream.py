@@ -0,0 +1,251 @@
+import gzip
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+from .decoding import loads
+from .klines import VALID_INTERVALS
+from .orderbook import OrderBook
+from .websocket import OP_BINARY, WebSocket
+
+MARKET_STREAM_URL = "wss://open-api-swap.bingx.com/swap-market"
+
+VALID_DEPTH_LEVELS = [5, 10, 20, 50, 100]
+
+
+def _levels(raw):
+    # Levels come either as [price, quantity] pairs or as {"p": price, "v": quantity} objects.
+    return [(level["p"], level["v"]) if isinstance(level, dict) else level for level in raw or []]
+
+
+class MarketDataStream(object):
+    """
+    Streams BingX swap market data over a WebSocket and keeps the latest state of every subscribed symbol in memory.
+
+    The connection runs on a background thread started by start(). It answers the server's heartbeats, decompresses
+    the gzip frames and, when the connection drops or goes silent for read_timeout seconds, reconnects with
+    exponential backoff and subscribes again to everything that was subscribed. The get_* methods only read local
+    state and never touch the network; they return None until the first update arrived.
+
+    :param url: Stream URL
+    :param on_message: Optional function called on the stream thread with every decoded data message
+    :param on_error: Optional function called on the stream thread with every exception that caused a reconnect
+        and with every rejected subscription
+    :param trade_history: Number of recent trades kept per symbol
+    :param read_timeout: Seconds without any message after which the connection is considered dead
+    :param reconnect_delay: Seconds to wait before the first reconnect, doubled after every failed attempt
+    :param max_reconnect_delay: Upper bound of the reconnect delay
+    :param clock: Function returning the time book ticker updates are stamped with on arrival
+    """
+
+    def __init__(self, url=MARKET_STREAM_URL, on_message=None, on_error=None, trade_history=100, read_timeout=30,
+                 reconnect_delay=1.0, max_reconnect_delay=30.0, clock=time.monotonic):
+        self.url = url
+        self.on_message = on_message
+        self.on_error = on_error
+        self.trade_history = trade_history
+        self.read_timeout = read_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.clock = clock
+        self.reconnects = 0
+        self.books = {}
+        self.trades = {}
+        self.klines = {}
+        self.book_tickers = {}
+        self.book_ticker_times = {}
+        self.__subscriptions = {}
+        self.__lock = threading.Lock()
+        self.__socket = None
+        self.__stop = threading.Event()
+        self.__connected = threading.Event()
+        self.__healthy = False
+        self.__thread = None
+
+    @property
+    def connected(self):
+        return self.__connected.is_set()
+
+    @property
+    def subscriptions(self):
+        return list(self.__subscriptions)
+
+    def wait_connected(self, timeout=None):
+        return self.__connected.wait(timeout)
+
+    def __send(self, request_type, data_type, request_id):
+        message = json.dumps({"id": request_id, "reqType": request_type, "dataType": data_type})
+        with self.__lock:
+            websocket = self.__socket
+        if websocket is not None:
+            try:
+                websocket.send(message)
+            except OSError:
+                # The stream thread notices the broken connection and subscribes again after reconnecting.
+                pass
+
+    def subscribe(self, data_type):
+        """
+        Subscribes to a raw data type such as "BTC-USDT@depth20". Subscriptions survive reconnects.
+        """
+        with self.__lock:
+            if data_type in self.__subscriptions:
+                return
+            request_id = str(uuid.uuid4())
+            self.__subscriptions[data_type] = request_id
+        self.__send("sub", data_type, request_id)
+
+    def unsubscribe(self, data_type):
+        with self.__lock:
+            request_id = self.__subscriptions.pop(data_type, None)
+        if request_id is not None:
+            self.__send("unsub", data_type, request_id)
+
+    def subscribe_depth(self, pair, levels=20):
+        if levels not in VALID_DEPTH_LEVELS:
+            raise ValueError("[!] INVALID DEPTH LEVELS. Valid levels are: ", str(VALID_DEPTH_LEVELS))
+        self.subscribe("%s@depth%d" % (pair, levels))
+
+    def subscribe_trades(self, pair):
+        self.subscribe(pair + "@trade")
+
+    def subscribe_klines(self, pair, interval):
+        if str(interval) not in VALID_INTERVALS:
+            raise ValueError("[!] INVALID INTERVAL VALUE. Valid Intervals are: ", str(VALID_INTERVALS))
+        self.subscribe("%s@kline_%s" % (pair, interval))
+
+    def subscribe_book_ticker(self, pair):
+        self.subscribe(pair + "@bookTicker")
+
+    def get_order_book(self, pair):
+        """
+        The latest depth snapshot of pair as an OrderBook.
+        """
+        return self.books.get(pair)
+
+    def get_last_trades(self, pair):
+        """
+        The most recent trades of pair, oldest first.
+        """
+        trades = self.trades.get(pair)
+        return None if trades is None else list(trades)
+
+    def get_kline(self, pair, interval):
+        """
+        The latest candle of pair and interval, still forming, with the same keys as the rows of get_kline_data.
+        """
+        return self.klines.get((pair, interval))
+
+    def get_book_ticker(self, pair):
+        return self.book_tickers.get(pair)
+
+    def get_book_ticker_age(self, pair):
+        """
+        Seconds since the last book ticker update of pair arrived, None if none did.
+        """
+        received_at = self.book_ticker_times.get(pair)
+        return None if received_at is None else self.clock() - received_at
+
+    def __handle(self, message):
+        if "ping" in message:
+            self.__socket.send(json.dumps({"pong": message["ping"], "time": message.get("time")}))
+            return
+        data_type = message.get("dataType") or ""
+        if message.get("code", 0) != 0:
+            if self.on_error is not None:
+                self.on_error(ValueError("[!] STREAM ERROR " + str(message.get("code")) + ": " +
+                                         str(message.get("msg"))))
+            return
+        data = message.get("data")
+        if data is None or "@" not in data_type:
+            # Subscription acknowledgements carry no data.
+            return
+        pair, _, channel = data_type.partition("@")
+        if channel.startswith("depth"):
+            # The snapshot is replaced as a whole, so readers always see a consistent book.
+            self.books[pair] = OrderBook(_levels(data.get("bids")), _levels(data.get("asks")), data.get("T"))
+        elif channel == "trade":
+            trades = self.trades.get(pair)
+            if trades is None:
+                trades = self.trades[pair] = deque(maxlen=self.trade_history)
+            trades.extend(data if isinstance(data, list) else [data])
+        elif channel.startswith("kline_"):
+            for candle in data if isinstance(data, list) else [data]:
+                self.klines[(pair, channel[6:])] = {"open": candle["o"], "close": candle["c"], "high": candle["h"],
+                                                    "low": candle["l"], "volume": candle["v"], "time": candle["T"]}
+        elif channel == "bookTicker":
+            self.book_tickers[pair] = data
+            self.book_ticker_times[pair] = self.clock()
+        if self.on_message is not None:
+            self.on_message(message)
+
+    def __run_connection(self):
+        websocket = WebSocket(self.url, timeout=self.read_timeout).connect()
+        with self.__lock:
+            self.__socket = websocket
+            subscriptions = list(self.__subscriptions.items())
+        try:
+            self.__connected.set()
+            for data_type, request_id in subscriptions:
+                websocket.send(json.dumps({"id": request_id, "reqType": "sub", "dataType": data_type}))
+            while not self.__stop.is_set():
+                opcode, payload = websocket.recv()
+                if opcode == OP_BINARY:
+                    payload = gzip.decompress(payload)
+                self.__healthy = True
+                if payload == b"Ping":
+                    websocket.send("Pong")
+                    continue
+                self.__handle(loads(payload))
+        finally:
+            self.__connected.clear()
+            with self.__lock:
+                self.__socket = None
+            websocket.close()
+
+    def __run(self):
+        delay = self.reconnect_delay
+        while not self.__stop.is_set():
+            self.__healthy = False
+            try:
+                self.__run_connection()
+            except Exception as e:
+                if self.__stop.is_set():
+                    break
+                if self.on_error is not None:
+                    self.on_error(e)
+            if self.__stop.is_set():
+                break
+            if self.__healthy:
+                delay = self.reconnect_delay
+            # Full jitter keeps many clients from reconnecting in lockstep after an outage.
+            self.__stop.wait(random.uniform(0, delay))
+            delay = min(delay * 2, self.max_reconnect_delay)
+            self.reconnects += 1
+
+    def start(self):
+        if self.__thread is not None:
+            return self
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="bingx-stream", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__stop.set()
+        with self.__lock:
+            websocket = self.__socket
+        if websocket is not None:
+            websocket.close()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,430 @@
+import asyncio
+import gzip
+import http.client
+import io
+import select
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from collections import deque
+
+from .metrics import current_timings
+
+
+def _decode_body(encoding, body):
+    encoding = encoding.lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+def _dropped(sock):
+    # An idle keep-alive socket only becomes readable when the server closed it. poll() takes any descriptor, select()
+    # only ones below FD_SETSIZE (1024), and is only used where poll() is missing (Windows, where that limit does not
+    # apply to descriptor values).
+    if sock is None:
+        return True
+    try:
+        if hasattr(select, "poll"):
+            poller = select.poll()
+            poller.register(sock, select.POLLIN)
+            return bool(poller.poll(0))
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+class Transport(object):
+    """
+    Base class for the HTTP layer used by BingxAPI.
+
+    A transport sends a single request and returns the raw (already decompressed) response body as bytes.
+    HTTP error statuses are raised as urllib.error.HTTPError so callers see the same exceptions as with urlopen.
+    """
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class UrllibTransport(Transport):
+    """
+    The original transport: every request opens a new connection through urllib.request.urlopen.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        if body is not None and isinstance(body, str):
+            body = body.encode("utf-8")
+        request = urllib.request.Request(url, data=body, headers=headers or {}, method=method)
+        if timeout is None:
+            timeout = self.timeout
+        timings = current_timings()
+        if timings is None:
+            if timeout is None:
+                return urllib.request.urlopen(request).read()
+            return urllib.request.urlopen(request, timeout=timeout).read()
+        # urlopen connects and waits for the response headers in one call, so connect is part of ttfb here.
+        response = urllib.request.urlopen(request) if timeout is None else urllib.request.urlopen(request, timeout=timeout)
+        timings.mark("ttfb")
+        data = response.read()
+        timings.mark("read")
+        return data
+
+
+class _HostPool(object):
+    """
+    Idle keep-alive connections for one (scheme, host, port) plus a semaphore capping how many can be open at once.
+    """
+
+    def __init__(self, scheme, host, port, size):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+
+
+class HTTPTransport(Transport):
+    """
+    Thread-safe HTTP/1.1 transport that keeps connections alive and reuses them across requests.
+
+    :param pool_size: Maximum number of connections opened per host. Callers block when all of them are busy, for
+        at most the timeout of their request.
+    :param timeout: Default timeout in seconds, can be overridden per request. It bounds the whole request: waiting
+        for a connection, connecting, sending and reading the response.
+    :param gzip: Ask the server for gzip encoded responses and decode them transparently.
+    """
+    RETRYABLE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError,
+                        ConnectionResetError, ConnectionAbortedError)
+    # Only these are sent again on a fresh connection after a reused one failed. The server may already have
+    # processed the request, so resending an order could place it twice.
+    IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+    def __init__(self, pool_size=10, timeout=10, gzip=True):
+        if pool_size < 1:
+            raise ValueError("[!] POOL_SIZE MUST BE AT LEAST 1.")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.gzip = gzip
+        self.__pools = {}
+        self.__lock = threading.Lock()
+
+    def __get_pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        pool = self.__pools.get(key)
+        if pool is None:
+            with self.__lock:
+                pool = self.__pools.get(key)
+                if pool is None:
+                    pool = _HostPool(scheme, host, port, self.pool_size)
+                    self.__pools[key] = pool
+        return pool
+
+    @staticmethod
+    def __new_connection(pool, timeout):
+        if pool.scheme == "https":
+            return http.client.HTTPSConnection(pool.host, pool.port, timeout=timeout)
+        return http.client.HTTPConnection(pool.host, pool.port, timeout=timeout)
+
+    @staticmethod
+    def __remaining(deadline):
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("[!] REQUEST TIMED OUT.")
+        return remaining
+
+    def __send(self, connection, method, target, body, headers, deadline):
+        # Every socket operation gets the time left until deadline, so a server sending slowly cannot stretch the
+        # request past it.
+        def limit(sock):
+            timeout = self.__remaining(deadline)
+            connection.timeout = timeout
+            if sock is not None:
+                sock.settimeout(timeout)
+
+        timings = current_timings()
+        limit(connection.sock)
+        if connection.sock is None and timings is not None:
+            # request() would connect lazily, connecting first keeps the handshake out of the time to first byte.
+            connection.connect()
+            timings.mark("connect")
+        connection.request(method, target, body=body, headers=headers)
+        sock = connection.sock
+        limit(sock)
+        response = connection.getresponse()
+        if timings is not None:
+            timings.mark("ttfb")
+        chunks = []
+        while True:
+            limit(sock)
+            chunk = response.read1(65536)
+            if not chunk:
+                # read1() leaves a response whose length was reached open, read() marks it done.
+                chunks.append(response.read())
+                return response, b"".join(chunks)
+            chunks.append(chunk)
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        if timeout is None:
+            timeout = self.timeout
+
+        request_headers = {"Host": parts.netloc, "Connection": "keep-alive"}
+        if self.gzip:
+            request_headers["Accept-Encoding"] = "gzip, deflate"
+        if headers:
+            request_headers.update(headers)
+        if body is not None:
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            request_headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+
+        timings = current_timings()
+        pool = self.__get_pool(scheme, parts.hostname, port)
+        # timeout bounds the whole request, waiting for a connection included.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not pool.slots.acquire(timeout=timeout):
+            raise TimeoutError("[!] NO CONNECTION TO " + parts.netloc + " FREED UP WITHIN " + str(timeout) + "s.")
+        if timings is not None:
+            timings.mark("queue")
+        try:
+            with pool.lock:
+                connection = pool.idle.pop() if pool.idle else None
+            while connection is not None and _dropped(connection.sock):
+                # Closed by the server while idle, found before anything was written to it.
+                connection.close()
+                with pool.lock:
+                    connection = pool.idle.pop() if pool.idle else None
+            reused = connection is not None
+            if connection is None:
+                connection = self.__new_connection(pool, self.__remaining(deadline))
+            try:
+                try:
+                    response, data = self.__send(connection, method, target, body, request_headers, deadline)
+                except self.RETRYABLE_ERRORS:
+                    # The server may drop an idle keep-alive connection at any time, try once more on a fresh one.
+                    # Other requests are left to RequestPolicy, which knows whether replaying them is safe.
+                    connection.close()
+                    if not reused or method not in self.IDEMPOTENT_METHODS:
+                        raise
+                    connection = self.__new_connection(pool, self.__remaining(deadline))
+                    response, data = self.__send(connection, method, target, body, request_headers, deadline)
+            except BaseException:
+                connection.close()
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                with pool.lock:
+                    pool.idle.append(connection)
+        finally:
+            pool.slots.release()
+
+        data = _decode_body(response.getheader("Content-Encoding", ""), data)
+        if timings is not None:
+            timings.mark("read")
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(data))
+        return data
+
+    def close(self):
+        with self.__lock:
+            pools = list(self.__pools.values())
+            self.__pools = {}
+        for pool in pools:
+            with pool.lock:
+                while pool.idle:
+                    pool.idle.pop().close()
+
+
+class _AsyncHostPool(object):
+    def __init__(self, scheme, host, port, size):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+
+
+class AsyncHTTPTransport(object):
+    """
+    Non-blocking HTTP/1.1 keep-alive transport built on asyncio streams, used by AsyncBingxAPI.
+
+    Its request() is a coroutine with the same signature and return value as Transport.request(). A transport instance
+    belongs to the event loop it is first used in.
+
+    :param pool_size: Maximum number of connections opened per host. Extra requests wait for a free connection.
+    :param timeout: Default timeout in seconds for a whole request, can be overridden per request.
+    :param gzip: Ask the server for gzip encoded responses and decode them transparently.
+    """
+    RETRYABLE_ERRORS = (asyncio.IncompleteReadError, BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
+    IDEMPOTENT_METHODS = HTTPTransport.IDEMPOTENT_METHODS
+
+    def __init__(self, pool_size=100, timeout=10, gzip=True):
+        if pool_size < 1:
+            raise ValueError("[!] POOL_SIZE MUST BE AT LEAST 1.")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.gzip = gzip
+        self.__pools = {}
+        self.__ssl_context = None
+
+    def __get_pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        pool = self.__pools.get(key)
+        if pool is None:
+            pool = _AsyncHostPool(scheme, host, port, self.pool_size)
+            self.__pools[key] = pool
+        return pool
+
+    async def __new_connection(self, pool):
+        ssl_context = None
+        if pool.scheme == "https":
+            if self.__ssl_context is None:
+                import ssl
+                self.__ssl_context = ssl.create_default_context()
+            ssl_context = self.__ssl_context
+        connection = await asyncio.open_connection(pool.host, pool.port, ssl=ssl_context)
+        timings = current_timings()
+        if timings is not None:
+            timings.mark("connect")
+        return connection
+
+    @staticmethod
+    async def __read_body(reader, status, headers, method):
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return b""
+        if headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(chunks)
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+        length = headers.get("Content-Length")
+        if length is not None:
+            return await reader.readexactly(int(length))
+        return await reader.read()
+
+    async def __exchange(self, connection, method, request_bytes):
+        reader, writer = connection
+        writer.write(request_bytes)
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        timings = current_timings()
+        if timings is not None:
+            timings.mark("ttfb")
+        status_line, _, raw_headers = head.partition(b"\r\n")
+        version, status, reason = (status_line.decode("latin-1").split(" ", 2) + [""])[:3]
+        headers = http.client.parse_headers(io.BytesIO(raw_headers))
+        status = int(status)
+        body = await self.__read_body(reader, status, headers, method)
+        will_close = (version == "HTTP/1.0" or headers.get("Connection", "").lower() == "close"
+                      or ("Content-Length" not in headers and
+                          headers.get("Transfer-Encoding", "").lower() != "chunked"))
+        return status, reason, headers, body, will_close
+
+    async def __request(self, pool, method, request_bytes):
+        async with pool.slots:
+            timings = current_timings()
+            if timings is not None:
+                timings.mark("queue")
+            connection = pool.idle.pop() if pool.idle else None
+            while connection is not None and (connection[0].at_eof() or connection[1].is_closing()):
+                # Closed by the server while idle, found before anything was written to it.
+                connection[1].close()
+                connection = pool.idle.pop() if pool.idle else None
+            reused = connection is not None
+            if connection is None:
+                connection = await self.__new_connection(pool)
+            try:
+                try:
+                    result = await self.__exchange(connection, method, request_bytes)
+                except self.RETRYABLE_ERRORS:
+                    # The server may drop an idle keep-alive connection at any time, try once more on a fresh one.
+                    connection[1].close()
+                    if not reused or method not in self.IDEMPOTENT_METHODS:
+                        raise
+                    connection = await self.__new_connection(pool)
+                    result = await self.__exchange(connection, method, request_bytes)
+            except BaseException:
+                connection[1].close()
+                raise
+            if result[4]:
+                connection[1].close()
+            else:
+                pool.idle.append(connection)
+            return result
+
+    async def request(self, method, url, body=None, headers=None, timeout=None):
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        if timeout is None:
+            timeout = self.timeout
+
+        request_headers = {"Host": parts.netloc, "Connection": "keep-alive"}
+        if self.gzip:
+            request_headers["Accept-Encoding"] = "gzip, deflate"
+        if headers:
+            request_headers.update(headers)
+        if body is not None:
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            request_headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+            request_headers["Content-Length"] = str(len(body))
+        elif method in ("POST", "PUT"):
+            request_headers["Content-Length"] = "0"
+        request_bytes = ("%s %s HTTP/1.1\r\n" % (method, target) +
+                         "".join("%s: %s\r\n" % item for item in request_headers.items()) +
+                         "\r\n").encode("latin-1")
+        if body:
+            request_bytes += body
+
+        pool = self.__get_pool(scheme, parts.hostname, port)
+        status, reason, response_headers, data, _ = await asyncio.wait_for(
+            self.__request(pool, method, request_bytes), timeout)
+        data = _decode_body(response_headers.get("Content-Encoding", ""), data)
+        timings = current_timings()
+        if timings is not None:
+            timings.mark("read")
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, reason, response_headers, io.BytesIO(data))
+        return data
+
+    async def close(self):
+        pools = list(self.__pools.values())
+        self.__pools = {}
+        for pool in pools:
+            while pool.idle:
+                writer = pool.idle.pop()[1]
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
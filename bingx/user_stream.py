@@ -0,0 +1,355 @@
+import asyncio
+import gzip
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .decoding import loads
+from .websocket import OP_BINARY, WebSocket
+
+USER_STREAM_URL = "wss://open-api-swap.bingx.com/swap-market"
+
+# Order statuses after which an order never changes again.
+FINAL_ORDER_STATUSES = ("FILLED", "CANCELED", "CANCELLED", "EXPIRED", "REJECTED", "FAILED")
+
+
+class UserDataStream(object):
+    """
+    Streams the account's own events, order updates (ORDER_TRADE_UPDATE) and balance and position updates
+    (ACCOUNT_UPDATE), over a WebSocket authenticated with a listen key, so fills are known as they happen instead of
+    by polling query_order.
+
+    The connection runs on a background thread started by start(). The listen key is created on connect, extended
+    every keepalive_interval seconds by a second thread, whether messages arrive or not, and replaced when the
+    exchange reports it expired, refuses it or an extension fails. Like MarketDataStream the stream answers
+    heartbeats and reconnects with exponential backoff. Events are passed to the callbacks on the stream thread and
+    to every asyncio queue returned by queue(); wait_for_order() returns a future that is resolved when an order is
+    filled, cancelled, expired or rejected.
+
+    With an AsyncBingxAPI, start the stream from the event loop and stop it with await stop_async() or use it with
+    async with: the listen key requests are then run on that loop, so stop() and with would block it and raise.
+
+    :param api: BingxAPI or AsyncBingxAPI the listen key is managed with
+    :param url: Stream URL, the listen key is added as a query parameter
+    :param on_event: Optional function called with every event
+    :param on_order: Optional function called with every ORDER_TRADE_UPDATE event
+    :param on_account: Optional function called with every ACCOUNT_UPDATE event
+    :param on_error: Optional function called with every exception that caused a reconnect or a listen key renewal
+    :param keepalive_interval: Seconds between listen key extensions. Keys expire after 60 minutes.
+    :param read_timeout: Seconds without any message after which the connection is considered dead
+    :param reconnect_delay: Seconds to wait before the first reconnect, doubled after every failed attempt
+    :param max_reconnect_delay: Upper bound of the reconnect delay
+    :param order_history: Number of finished orders remembered, so wait_for_order() also resolves for orders that
+        finished before it was called
+    """
+
+    def __init__(self, api, url=USER_STREAM_URL, on_event=None, on_order=None, on_account=None, on_error=None,
+                 keepalive_interval=1800, read_timeout=30, reconnect_delay=1.0, max_reconnect_delay=30.0,
+                 order_history=1000, clock=time.monotonic):
+        self.api = api
+        self.url = url
+        self.on_event = on_event
+        self.on_order = on_order
+        self.on_account = on_account
+        self.on_error = on_error
+        self.keepalive_interval = keepalive_interval
+        self.read_timeout = read_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.order_history = order_history
+        self.clock = clock
+        self.listen_key = None
+        self.reconnects = 0
+        self.renewals = 0
+        self.orders = {}
+        self.account = None
+        self.__finished = OrderedDict()
+        self.__waiters = {}
+        self.__queues = []
+        self.__expired = False
+        self.__keepalive_at = None
+        self.__loop = None
+        self.__lock = threading.Lock()
+        self.__socket = None
+        self.__stop = threading.Event()
+        self.__connected = threading.Event()
+        self.__healthy = False
+        self.__thread = None
+        self.__keepalive_thread = None
+
+    @property
+    def connected(self):
+        return self.__connected.is_set()
+
+    def wait_connected(self, timeout=None):
+        return self.__connected.wait(timeout)
+
+    def __blocks_loop(self):
+        # Waiting for the loop's own coroutines from the thread running it would never return.
+        if self.__loop is None or not asyncio.iscoroutinefunction(self.api.delete_listen_key):
+            return False
+        try:
+            return asyncio.get_running_loop() is self.__loop
+        except RuntimeError:
+            return False
+
+    def __call(self, name, *args):
+        result = getattr(self.api, name)(*args)
+        if asyncio.iscoroutine(result):
+            if self.__loop is None:
+                result.close()
+                raise ValueError("[!] START THE STREAM FROM THE EVENT LOOP TO USE IT WITH AN ASYNC API.")
+            result = asyncio.run_coroutine_threadsafe(result, self.__loop).result()
+        return result
+
+    # Events
+
+    def queue(self, maxsize=0):
+        """
+        An asyncio.Queue of the running event loop that receives every event from now on. When it is full, new
+        events are dropped for it.
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue(maxsize)
+        with self.__lock:
+            self.__queues.append((loop, events))
+        return events
+
+    def remove_queue(self, events):
+        with self.__lock:
+            self.__queues = [(loop, queue) for loop, queue in self.__queues if queue is not events]
+
+    @staticmethod
+    def __offer(events, event):
+        try:
+            events.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    @staticmethod
+    def __order_keys(order_id=None, client_order_id=None):
+        keys = []
+        if order_id not in (None, "", "NULL"):
+            keys.append(("id", str(order_id)))
+        if client_order_id not in (None, "", "NULL"):
+            keys.append(("client", str(client_order_id)))
+        return keys
+
+    def wait_for_order(self, order_id=None, client_order_id=None):
+        """
+        A concurrent.futures.Future resolved with the last update of the order (the "o" object of its
+        ORDER_TRADE_UPDATE event) once its status is one of FINAL_ORDER_STATUSES. Check the "X" field of the result
+        to tell fills from cancels. From asyncio use wait_for_order_async().
+        """
+        keys = self.__order_keys(order_id, client_order_id)
+        if not keys:
+            raise ValueError("[!] ORDER ID OR CLIENT ORDER ID IS REQUIRED.")
+        future = Future()
+        with self.__lock:
+            for key in keys:
+                if key in self.__finished:
+                    future.set_result(self.__finished[key])
+                    return future
+            for key in keys:
+                self.__waiters.setdefault(key, []).append(future)
+        return future
+
+    async def wait_for_order_async(self, order_id=None, client_order_id=None, timeout=None):
+        return await asyncio.wait_for(asyncio.wrap_future(self.wait_for_order(order_id, client_order_id)), timeout)
+
+    def __order_update(self, order):
+        keys = self.__order_keys(order.get("i"), order.get("c"))
+        waiters = []
+        with self.__lock:
+            if order.get("X") not in FINAL_ORDER_STATUSES:
+                self.orders[str(order.get("i"))] = order
+                return
+            self.orders.pop(str(order.get("i")), None)
+            for key in keys:
+                self.__finished[key] = order
+                self.__finished.move_to_end(key)
+                waiters += self.__waiters.pop(key, [])
+            while len(self.__finished) > self.order_history * 2:
+                self.__finished.popitem(last=False)
+        for future in waiters:
+            if not future.done():
+                future.set_result(order)
+
+    def __dispatch(self, event):
+        kind = event.get("e")
+        if kind == "ORDER_TRADE_UPDATE":
+            self.__order_update(event.get("o") or {})
+            if self.on_order is not None:
+                self.on_order(event)
+        elif kind == "ACCOUNT_UPDATE":
+            self.account = event
+            if self.on_account is not None:
+                self.on_account(event)
+        elif kind == "listenKeyExpired":
+            self.__expired = True
+        if self.on_event is not None:
+            self.on_event(event)
+        with self.__lock:
+            queues = list(self.__queues)
+        for loop, events in queues:
+            loop.call_soon_threadsafe(self.__offer, events, event)
+
+    # Listen key
+
+    def __renew(self):
+        if self.listen_key is not None:
+            self.renewals += 1
+        self.listen_key = self.__call("create_listen_key")
+        self.__expired = False
+        self.__keepalive_at = self.clock() + self.keepalive_interval
+
+    def __keepalive(self):
+        if self.__keepalive_at is None or self.clock() < self.__keepalive_at:
+            return
+        try:
+            self.__call("extend_listen_key", self.listen_key)
+            self.__keepalive_at = self.clock() + self.keepalive_interval
+        except Exception as e:
+            if self.on_error is not None:
+                self.on_error(e)
+            self.__expired = True
+            # Wake the stream thread up, it reconnects with a new key.
+            with self.__lock:
+                websocket = self.__socket
+            if websocket is not None:
+                websocket.close()
+
+    def __run_keepalive(self):
+        # Checked at least every second, so a silent connection does not hold extensions back.
+        while not self.__stop.wait(min(self.keepalive_interval, 1.0)):
+            self.__keepalive()
+
+    # Connection
+
+    def __run_connection(self):
+        if self.listen_key is None or self.__expired:
+            self.__renew()
+        separator = "&" if "?" in self.url else "?"
+        try:
+            websocket = WebSocket(self.url + separator + "listenKey=" + self.listen_key,
+                                  timeout=self.read_timeout).connect()
+        except ConnectionError:
+            # The handshake is refused for unknown or expired keys.
+            self.__expired = True
+            raise
+        with self.__lock:
+            self.__socket = websocket
+        try:
+            self.__connected.set()
+            while not self.__stop.is_set() and not self.__expired:
+                opcode, payload = websocket.recv()
+                if opcode == OP_BINARY:
+                    payload = gzip.decompress(payload)
+                self.__healthy = True
+                if payload == b"Ping":
+                    websocket.send("Pong")
+                else:
+                    message = loads(payload)
+                    if "ping" in message:
+                        websocket.send(json.dumps({"pong": message["ping"], "time": message.get("time")}))
+                    elif "e" in message:
+                        self.__dispatch(message)
+        finally:
+            self.__connected.clear()
+            with self.__lock:
+                self.__socket = None
+            websocket.close()
+
+    def __run(self):
+        delay = self.reconnect_delay
+        while not self.__stop.is_set():
+            self.__healthy = False
+            try:
+                self.__run_connection()
+            except Exception as e:
+                if self.__stop.is_set():
+                    break
+                if self.on_error is not None:
+                    self.on_error(e)
+            if self.__stop.is_set():
+                break
+            if self.__expired and self.__healthy:
+                # Renewing the key is not a failure, reconnect right away.
+                continue
+            if self.__healthy:
+                delay = self.reconnect_delay
+            self.__stop.wait(random.uniform(0, delay))
+            delay = min(delay * 2, self.max_reconnect_delay)
+            self.reconnects += 1
+
+    def start(self):
+        if self.__thread is not None:
+            return self
+        try:
+            self.__loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.__loop = None
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="bingx-user-stream", daemon=True)
+        self.__thread.start()
+        self.__keepalive_thread = threading.Thread(target=self.__run_keepalive, name="bingx-user-stream-keepalive",
+                                                   daemon=True)
+        self.__keepalive_thread.start()
+        return self
+
+    def __stop_thread(self):
+        self.__stop.set()
+        with self.__lock:
+            websocket = self.__socket
+        if websocket is not None:
+            websocket.close()
+        for thread in (self.__thread, self.__keepalive_thread):
+            if thread is not None:
+                thread.join()
+        self.__thread = self.__keepalive_thread = None
+        self.__keepalive_at = None
+        listen_key, self.listen_key = self.listen_key, None
+        return listen_key
+
+    def stop(self):
+        """
+        Closes the connection and deletes the listen key. Streams of an AsyncBingxAPI have to be stopped with
+        stop_async() from their event loop.
+        """
+        if self.__blocks_loop():
+            raise RuntimeError("[!] USE await stop_async() TO STOP THE STREAM FROM ITS EVENT LOOP.")
+        listen_key = self.__stop_thread()
+        if listen_key is not None:
+            try:
+                self.__call("delete_listen_key", listen_key)
+            except Exception:
+                # The key expires by itself within the hour.
+                pass
+
+    async def stop_async(self):
+        """
+        stop() for streams started from an event loop.
+        """
+        listen_key = await asyncio.get_running_loop().run_in_executor(None, self.__stop_thread)
+        if listen_key is not None:
+            try:
+                result = self.api.delete_listen_key(listen_key)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop_async()
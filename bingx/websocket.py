@@ -0,0 +1,188 @@
+import base64
+import hashlib
+import os
+import socket
+import ssl
+import struct
+import threading
+import urllib.parse
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class WebSocketClosed(Exception):
+    pass
+
+
+def accept_key(key):
+    """
+    The Sec-WebSocket-Accept value a server answers to the Sec-WebSocket-Key key.
+    """
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def encode_frame(opcode, payload, mask=True):
+    """
+    A single final frame. Clients have to mask what they send, servers must not.
+    """
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", length)
+    if not mask:
+        return bytes(header) + payload
+    key = os.urandom(4)
+    # XOR with the repeated key as one big integer instead of byte by byte.
+    repeated = (key * (length // 4 + 1))[:length]
+    masked = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+    return bytes(header) + key + masked
+
+
+def read_frame(read):
+    """
+    Reads one frame with read(n), which has to return exactly n bytes. Returns (final, opcode, payload).
+    """
+    first, second = read(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", read(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", read(8))[0]
+    key = read(4) if second & 0x80 else None
+    payload = read(length) if length else b""
+    if key is not None and length:
+        repeated = (key * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+class WebSocket(object):
+    """
+    A minimal blocking RFC 6455 client: no extensions, no subprotocols. Pings from the server are answered from
+    recv(), fragmented messages are reassembled. send() may be called from other threads than recv().
+
+    :param url: ws:// or wss:// URL
+    :param timeout: Seconds to wait for the connection and for every read. A silent connection raises socket.timeout.
+    """
+
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+        self.__socket = None
+        self.__reader = None
+        self.__send_lock = threading.Lock()
+
+    @property
+    def connected(self):
+        return self.__socket is not None
+
+    def connect(self):
+        parts = urllib.parse.urlsplit(self.url)
+        secure = parts.scheme == "wss"
+        port = parts.port or (443 if secure else 80)
+        sock = socket.create_connection((parts.hostname, port), timeout=self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if secure:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+            key = base64.b64encode(os.urandom(16)).decode("ascii")
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            host = parts.hostname if parts.port is None else "%s:%d" % (parts.hostname, port)
+            request = ("GET %s HTTP/1.1\r\nHost: %s\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                       "Sec-WebSocket-Key: %s\r\nSec-WebSocket-Version: 13\r\n\r\n" % (path, host, key))
+            sock.sendall(request.encode("ascii"))
+            reader = sock.makefile("rb")
+            status = reader.readline().decode("latin-1")
+            headers = {}
+            while True:
+                line = reader.readline().decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if status.split(" ")[1:2] != ["101"]:
+                raise ConnectionError("[!] WEBSOCKET HANDSHAKE FAILED: " + status.strip())
+            if headers.get("sec-websocket-accept") != accept_key(key):
+                raise ConnectionError("[!] WEBSOCKET HANDSHAKE FAILED: invalid Sec-WebSocket-Accept")
+        except BaseException:
+            sock.close()
+            raise
+        self.__socket = sock
+        self.__reader = reader
+        return self
+
+    def __read(self, length):
+        data = self.__reader.read(length)
+        if len(data) != length:
+            raise WebSocketClosed("[!] CONNECTION CLOSED BY THE SERVER.")
+        return data
+
+    def __send_frame(self, opcode, payload):
+        frame = encode_frame(opcode, payload)
+        with self.__send_lock:
+            if self.__socket is None:
+                raise WebSocketClosed("[!] WEBSOCKET IS NOT CONNECTED.")
+            self.__socket.sendall(frame)
+
+    def send(self, message):
+        if isinstance(message, str):
+            self.__send_frame(OP_TEXT, message.encode("utf-8"))
+        else:
+            self.__send_frame(OP_BINARY, bytes(message))
+
+    def recv(self):
+        """
+        The next data message as (opcode, payload), opcode being OP_TEXT or OP_BINARY.
+        Raises WebSocketClosed when the server closes the connection.
+        """
+        if self.__socket is None:
+            raise WebSocketClosed("[!] WEBSOCKET IS NOT CONNECTED.")
+        opcode = None
+        fragments = []
+        while True:
+            final, frame_opcode, payload = read_frame(self.__read)
+            if frame_opcode == OP_PING:
+                self.__send_frame(OP_PONG, payload)
+                continue
+            if frame_opcode == OP_PONG:
+                continue
+            if frame_opcode == OP_CLOSE:
+                self.close()
+                raise WebSocketClosed("[!] CONNECTION CLOSED BY THE SERVER.")
+            if frame_opcode != OP_CONTINUATION:
+                opcode = frame_opcode
+            fragments.append(payload)
+            if final:
+                return opcode, b"".join(fragments)
+
+    def close(self):
+        with self.__send_lock:
+            sock, self.__socket = self.__socket, None
+        if sock is None:
+            return
+        try:
+            sock.sendall(encode_frame(OP_CLOSE, struct.pack("!H", 1000)))
+        except OSError:
+            pass
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+        self.__reader.close()
@@ -0,0 +1,19 @@
+import time
+
+import pytest
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met within %.1fs" % timeout)
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def wait_until():
+    """
+    Polls condition() until it is true, failing the test after timeout seconds.
+    """
+    return _wait_until
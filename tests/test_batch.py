@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from benchmarks.mock_server import MockBingxServer
+from bingx.api import BingxAPI
+from bingx.batch import order_results, with_client_ids
+from bingx.exceptions import BingxAPIError, OrderOutcomeUnknown
+
+ORDERS = [{"symbol": "BTC-USDT", "type": "LIMIT", "side": "BUY", "positionSide": "LONG", "price": 100 + i,
+           "quantity": 1, "clientOrderID": "c%d" % i} for i in range(3)]
+
+
+def ok(orders):
+    return {"code": 0, "msg": "", "data": {"orders": orders}}
+
+
+def test_full_answer_is_matched():
+    placed = [{"orderId": i, "clientOrderID": "c%d" % i} for i in range(3)]
+    placed[1] = {"code": 101204, "msg": "Insufficient margin", "clientOrderID": "c1"}
+    results = order_results(ORDERS, ok(placed))
+    assert results[0] == placed[0] and results[2] == placed[2]
+    assert isinstance(results[1], BingxAPIError) and results[1].code == 101204
+
+
+def test_full_answer_without_ids_is_matched_in_order():
+    placed = [{"orderId": i} for i in range(3)]
+    assert order_results([dict(order, clientOrderID="NULL") for order in ORDERS], ok(placed)) == placed
+
+
+def test_partial_answer_leaves_the_rest_unknown():
+    results = order_results(ORDERS, ok([{"orderId": 2, "clientOrderID": "c2"}]))
+    assert results[2] == {"orderId": 2, "clientOrderID": "c2"}
+    assert [type(result) for result in results[:2]] == [OrderOutcomeUnknown, OrderOutcomeUnknown]
+    assert results[0].client_order_id == "c0"
+
+
+def test_rejected_and_failed_batches():
+    rejected = order_results(ORDERS, {"code": 80014, "msg": "Invalid parameters"})
+    assert all(isinstance(result, BingxAPIError) and result.code == 80014 for result in rejected)
+    error = TimeoutError("timed out")
+    assert order_results(ORDERS, error) == [error] * 3
+
+
+def test_orders_without_client_ids_get_one():
+    orders = with_client_ids([{"symbol": "BTC-USDT"}, {"symbol": "BTC-USDT", "clientOrderID": "NULL"}, ORDERS[0]])
+    assert orders[2] is ORDERS[0]
+    ids = [order["clientOrderID"] for order in orders[:2]]
+    assert all(ids) and ids[0] != ids[1]
+
+
+@pytest.fixture
+def server():
+    def batch(params):
+        # Answers only the first order of every batch.
+        first = json.loads(params["batchOrders"])[0]
+        return {"orders": [{"orderId": 1, "clientOrderID": first["clientOrderID"]}]}
+
+    with MockBingxServer({"/openApi/swap/v2/trade/batchOrders": batch}) as server:
+        yield server
+
+
+def test_bulk_orders_are_matched_by_generated_ids(server):
+    api = BingxAPI("api-key", "secret-key")
+    api.ROOT_URL = server.url
+    orders = [dict(order, clientOrderID="NULL") for order in ORDERS] * 2
+    results = api.place_bulk_order(orders)
+    assert len(results) == 6
+    assert [result["orderId"] for result in (results[0], results[5])] == [1, 1]
+    assert all(isinstance(result, OrderOutcomeUnknown) for result in results[1:5])
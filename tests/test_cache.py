@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+import pytest
+
+from bingx.cache import MarketDataCache
+
+PATH = "/openApi/swap/v2/quote/ticker"
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting(response):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return response
+
+    return fetch, calls
+
+
+def test_responses_are_served_until_they_expire():
+    clock = FakeClock()
+    cache = MarketDataCache(ttls={PATH: 1.0}, clock=clock)
+    fetch, calls = counting({"code": 0, "data": 1})
+    assert cache.get(PATH, "symbol=BTC-USDT", fetch) == {"code": 0, "data": 1}
+    clock.now = 0.9
+    cache.get(PATH, "symbol=BTC-USDT", fetch)
+    assert len(calls) == 1
+    clock.now = 1.0
+    cache.get(PATH, "symbol=BTC-USDT", fetch)
+    assert len(calls) == 2
+    assert cache.stats() == {"hits": 1, "misses": 2, "coalesced": 0, "entries": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MarketDataCache(max_entries=2, clock=FakeClock())
+    fetch, calls = counting({"code": 0})
+    for params in ("a", "b", "a", "c"):
+        cache.get(PATH, params, fetch)
+    assert len(calls) == 3
+    cache.get(PATH, "a", fetch)
+    assert len(calls) == 3
+    cache.get(PATH, "b", fetch)
+    assert len(calls) == 4
+
+
+def test_exchange_errors_are_not_stored():
+    cache = MarketDataCache(clock=FakeClock())
+    fetch, calls = counting({"code": 100410, "msg": "throttled"})
+    assert cache.get(PATH, "", fetch)["code"] == 100410
+    assert cache.get(PATH, "", fetch)["code"] == 100410
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_concurrent_callers_share_one_fetch():
+    cache = MarketDataCache()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"code": 100410}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(PATH, "", fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced"] < 4:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    # The error is shared with the callers that waited for it, but not kept.
+    assert len(calls) == 1 and results == [{"code": 100410}] * 5
+    assert cache.stats()["entries"] == 0
+
+
+def test_failed_fetch_is_raised_to_every_waiter():
+    cache = MarketDataCache()
+
+    def fetch():
+        raise TimeoutError("timed out")
+
+    with pytest.raises(TimeoutError):
+        cache.get(PATH, "", fetch)
+    assert cache.stats()["entries"] == 0
+
+
+def test_async_callers_share_one_fetch():
+    cache = MarketDataCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"code": 0, "data": 1}
+
+    async def main():
+        return await asyncio.gather(*[cache.get_async(PATH, "", fetch) for _ in range(5)])
+
+    assert asyncio.run(main()) == [{"code": 0, "data": 1}] * 5
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 0, "misses": 1, "coalesced": 4, "entries": 1}
+
+
+def test_async_errors_are_not_stored():
+    cache = MarketDataCache()
+
+    async def fetch():
+        return {"code": 100410}
+
+    async def main():
+        await cache.get_async(PATH, "", fetch)
+        await cache.get_async(PATH, "", fetch)
+
+    asyncio.run(main())
+    assert cache.stats()["misses"] == 2 and cache.stats()["entries"] == 0
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import urllib.parse
+
+import pytest
+
+from benchmarks.mock_server import MockBingxServer
+from bingx.api import BingxAPI
+from bingx.contracts import ContractCatalog
+
+CONTRACTS = [{"symbol": "BTC-USDT", "quantityPrecision": 4, "pricePrecision": 1, "tradeMinQuantity": 0.0001,
+              "tradeMinUSDT": 2, "status": 1}]
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting_fetch():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return CONTRACTS
+
+    return fetch, calls
+
+
+def test_unknown_symbol_is_not_refetched_every_time():
+    clock = FakeClock()
+    fetch, calls = counting_fetch()
+    catalog = ContractCatalog(fetch, missing_ttl=60, clock=clock)
+    catalog.ensure_fresh("BTC-USDT")
+    for _ in range(10):
+        catalog.ensure_fresh("BTC-USTD")
+    assert len(calls) == 2
+    with pytest.raises(ValueError):
+        catalog.validate_order("BTC-USTD", 1)
+    clock.now += 60
+    catalog.ensure_fresh("BTC-USTD")
+    assert len(calls) == 3
+    # Known symbols are served from the list until it expires.
+    catalog.ensure_fresh("BTC-USDT")
+    assert len(calls) == 3
+
+
+def test_concurrent_async_callers_share_one_refresh():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return CONTRACTS
+
+    catalog = ContractCatalog(fetch)
+
+    async def main():
+        await asyncio.gather(*[catalog.ensure_fresh_async("BTC-USDT") for _ in range(5)])
+        await asyncio.gather(*[catalog.ensure_fresh_async("BTC-USTD") for _ in range(5)])
+        await catalog.ensure_fresh_async("BTC-USTD")
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_async_refresh_failure_is_raised_without_a_list():
+    async def fetch():
+        raise TimeoutError("timed out")
+
+    catalog = ContractCatalog(fetch)
+    with pytest.raises(TimeoutError):
+        asyncio.run(catalog.ensure_fresh_async("BTC-USDT"))
+
+
+@pytest.fixture
+def server():
+    def batch(params):
+        return {"orders": [{"orderId": i, "clientOrderID": order["clientOrderID"]}
+                           for i, order in enumerate(json.loads(params["batchOrders"]))]}
+
+    with MockBingxServer({"/openApi/swap/v2/trade/batchOrders": batch}) as server:
+        yield server
+
+
+def bulk_api(server):
+    api = BingxAPI("api-key", "secret-key", contracts=ContractCatalog(lambda: CONTRACTS))
+    api.ROOT_URL = server.url
+    return api
+
+
+def test_bulk_orders_are_rounded(server):
+    api = bulk_api(server)
+    api.place_bulk_order([{"symbol": "BTC-USDT", "type": "LIMIT", "side": "BUY", "positionSide": "LONG",
+                           "price": 27000.04, "quantity": 0.012345, "stopPrice": 26000.06},
+                          {"symbol": "BTC-USDT", "type": "MARKET", "side": "BUY", "positionSide": "LONG",
+                           "quantity": "0.01"}])
+    (_, _, body), = server.requests
+    sent = json.loads(dict(urllib.parse.parse_qsl(body))["batchOrders"])
+    assert [(order["quantity"], order.get("price"), order.get("stopPrice")) for order in sent] == [
+        ("0.0123", "27000.0", "26000.1"), ("0.0100", None, None)]
+
+
+def test_invalid_bulk_order_sends_nothing(server):
+    api = bulk_api(server)
+    orders = [{"symbol": "BTC-USDT", "type": "LIMIT", "side": "BUY", "positionSide": "LONG", "price": 27000,
+               "quantity": 0.01}, {"symbol": "BTC-USTD", "type": "MARKET", "side": "BUY", "positionSide": "LONG",
+                                   "quantity": 1}]
+    with pytest.raises(ValueError):
+        api.place_bulk_order(orders)
+    assert server.requests == []
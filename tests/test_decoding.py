@@ -0,0 +1,51 @@
+import json
+import threading
+
+import pytest
+
+from bingx.decoding import BACKENDS, LazyResponse, get_decoder
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_fields_and_payload(backend):
+    body = b'{"code": 0, "msg": "", "data": {"price": "27000.5", "list": [1, 2]}}'
+    response = LazyResponse(body, get_decoder(backend))
+    assert response["code"] == 0
+    assert response["data"] == {"price": "27000.5", "list": [1, 2]}
+    assert dict(response) == json.loads(body)
+
+
+def test_payload_followed_by_fields():
+    response = LazyResponse(b'{"data": [1, 2], "code": 5, "msg": "x"}')
+    assert response["code"] == 5
+    assert response["data"] == [1, 2]
+    assert len(response) == 3
+
+
+def test_escaped_keys_and_other_shapes():
+    assert LazyResponse(b'{"c\\u006fde": 1}')["code"] == 1
+    with pytest.raises(ValueError):
+        LazyResponse(b'[1, 2]')["code"]
+    with pytest.raises(KeyError):
+        LazyResponse(b'{"code": 0}')["data"]
+
+
+def test_shared_between_threads():
+    rows = [{"symbol": "S%d" % i, "price": str(i)} for i in range(2000)]
+    body = json.dumps({"code": 0, "msg": "", "data": rows}).encode("utf-8")
+    for _ in range(20):
+        response = LazyResponse(body)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def read(key):
+            barrier.wait()
+            results.append((key, response[key]))
+
+        threads = [threading.Thread(target=read, args=("data" if i % 2 else "code",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(results, key=lambda item: item[0]) == [("code", 0)] * 4 + [("data", rows)] * 4
+        assert response.materialize() == {"code": 0, "msg": "", "data": rows}
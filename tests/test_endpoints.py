@@ -0,0 +1,119 @@
+import hashlib
+import hmac
+
+import pytest
+
+import bingx.api
+from benchmarks.mock_server import MockBingxServer
+from bingx.api import BingxAPI
+from bingx.endpoints import ENDPOINTS, RequestSigner, build_query
+
+API_KEY = "api-key"
+SECRET_KEY = "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
+TIMESTAMP = "1696118400000"
+
+
+def legacy_generate_params(**kwargs):
+    # BingxAPI.__generate_params before the endpoint registry.
+    params = ""
+    if 'params' in kwargs:
+        params = kwargs['params'] + "&"
+        del kwargs['params']
+    params += ''.join(str(kwarg) + "=" + str(kwargs[kwarg]) + "&" for kwarg in kwargs if kwargs[kwarg] != "NULL")[
+              :-1]
+    return params
+
+
+def legacy_sign_hex(params):
+    # BingxAPI.__sign_hex before the endpoint registry.
+    return hmac.new(SECRET_KEY.encode("utf-8"), params.encode("utf-8"), digestmod="sha256").digest().hex()
+
+
+def legacy_signed(**kwargs):
+    parameters = legacy_generate_params(**kwargs)
+    return legacy_generate_params(params=parameters, signature=legacy_sign_hex(parameters))
+
+
+@pytest.fixture
+def server():
+    payloads = {
+        "/openApi/swap/v2/quote/bookTicker": {"book_ticker": {"bid_price": 27000.0, "ask_price": 27000.5}},
+        "/openApi/swap/v2/trade/order": {"order": {"orderId": 1}},
+        "/openApi/swap/v3/quote/klines": [],
+    }
+    with MockBingxServer(payloads) as server:
+        yield server
+
+
+@pytest.fixture
+def api(server, monkeypatch):
+    monkeypatch.setattr(bingx.api, "get_system_time", lambda: TIMESTAMP)
+    api = BingxAPI(API_KEY, SECRET_KEY)
+    api.ROOT_URL = server.url
+    return api
+
+
+def test_unsigned_query_matches_baseline():
+    endpoint = ENDPOINTS["klines"]
+    params = dict(symbol="BTC-USDT", interval="1m", startTime=1, endTime="NULL", limit=500)
+    assert build_query(endpoint, params) == legacy_generate_params(**params)
+
+
+def test_signed_query_matches_baseline():
+    signer = RequestSigner(SECRET_KEY)
+    assert signer.sign_query(ENDPOINTS["balance"], "", TIMESTAMP) == legacy_signed(timestamp=TIMESTAMP)
+    query = build_query(ENDPOINTS["book_ticker"], {"symbol": "BTC-USDT"})
+    assert signer.sign_query(ENDPOINTS["book_ticker"], query, TIMESTAMP) == legacy_signed(symbol="BTC-USDT",
+                                                                                          timestamp=TIMESTAMP)
+
+
+def test_order_query_matches_baseline_with_recv_window():
+    endpoint = ENDPOINTS["place_order"]
+    params = dict(symbol="BTC-USDT", type="LIMIT", side="BUY", positionSide="LONG", price="27000.5", quantity="0.01",
+                  clientOrderID="NULL")
+    query = RequestSigner(SECRET_KEY).sign_query(endpoint, build_query(endpoint, params), TIMESTAMP)
+    assert query == legacy_signed(**params, timestamp=TIMESTAMP, recvWindow="10000")
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        build_query(ENDPOINTS["price"], {"symbol": "BTC-USDT", "limit": 5})
+
+
+@pytest.mark.parametrize("name", sorted(ENDPOINTS))
+def test_registry_entries_are_consistent(name):
+    endpoint = ENDPOINTS[name]
+    assert endpoint.method in ("GET", "POST", "PUT", "DELETE")
+    assert endpoint.path.startswith("/openApi/")
+    assert endpoint.group in ("market", "account", "trade")
+    assert len(set(endpoint.params)) == len(endpoint.params)
+    assert not endpoint.recv_window or endpoint.signed
+
+
+def test_signed_get_is_sent_like_baseline(server, api):
+    assert api.get_current_optimal_price("BTC-USDT") == [27000.5, 27000.0]
+    assert server.requests == [("GET", "/openApi/swap/v2/quote/bookTicker",
+                                legacy_signed(symbol="BTC-USDT", timestamp=TIMESTAMP))]
+
+
+def test_unsigned_get_is_sent_like_baseline(server, api):
+    api.get_kline_data("BTC-USDT", "1h", start_timestamp=1, end_timestamp=2)
+    assert server.requests == [("GET", "/openApi/swap/v3/quote/klines",
+                                legacy_generate_params(symbol="BTC-USDT", interval="1h", startTime=1, endTime=2))]
+
+
+def test_order_is_posted_with_a_valid_signature(server, api):
+    assert api.open_limit_order("BTC-USDT", "LONG", "27000.5", "0.01") == {"orderId": 1}
+    (method, path, body), = server.requests
+    assert (method, path) == ("POST", "/openApi/swap/v2/trade/order")
+    payload, _, signature = body.rpartition("&signature=")
+    assert payload == ("symbol=BTC-USDT&type=LIMIT&side=BUY&positionSide=LONG&price=27000.5&quantity=0.01"
+                       "&timestamp=" + TIMESTAMP + "&recvWindow=10000")
+    assert signature == hmac.new(SECRET_KEY.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def test_delete_sends_the_registry_path_and_method(server, api):
+    api.cancel_order("BTC-USDT", order_id=7)
+    (method, path, query), = server.requests
+    assert (method, path) == ("DELETE", ENDPOINTS["cancel_order"].path)
+    assert query.startswith("orderId=7&symbol=BTC-USDT&timestamp=" + TIMESTAMP + "&signature=")
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.mock_server import MockBingxServer
+from bingx.api import BingxAPI
+from bingx.history import TimeCursor, fill_identity, fill_time
+from bingx.order_store import DEFAULT_LOOKBACK, OrderHistoryStore
+
+DAY = 24 * 3600 * 1000
+START = 1696118400000
+
+
+def iso(milliseconds):
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S") + ".%03dZ" % milliseconds
+
+
+class Fills(object):
+    """
+    /trade/allFillOrders answering at most limit fills from startTs on, oldest first.
+    """
+
+    def __init__(self, fills, limit):
+        self.fills = fills
+        self.limit = limit
+
+    def __call__(self, params):
+        start, end = int(params["startTs"]), int(params["endTs"])
+        rows = [fill for fill in self.fills if start <= fill_time(fill["filledTm"]) <= end]
+        return {"fill_orders": rows[:self.limit]}
+
+
+@pytest.fixture
+def api():
+    return BingxAPI("api-key", "secret-key")
+
+
+def test_fill_time():
+    assert fill_time("2023-10-01T00:00:00Z") == START
+    assert fill_time("2023-10-01T00:00:00.250Z") == START + 250
+    assert fill_time("2023-10-01T08:00:00+08:00") == START
+    assert fill_time(str(START)) == START
+
+
+def test_time_cursor_skips_rows_already_returned():
+    rows = [{"time": 1, "id": "a"}, {"time": 2, "id": "b"}, {"time": 2, "id": "c"}]
+    cursor = TimeCursor(0, 10, 3, "id")
+    assert cursor.feed(rows) == rows
+    assert (cursor.start, cursor.done) == (2, False)
+    assert cursor.feed(rows[1:] + [{"time": 3, "id": "d"}]) == [{"time": 3, "id": "d"}]
+    assert cursor.start == 3
+    assert cursor.feed([{"time": 3, "id": "d"}]) == []
+    assert cursor.done
+
+
+def test_fills_of_busy_windows_are_paged(api):
+    # 2500 fills in the first window, every 10 of them in the same second, and a few in the second one.
+    fills = [{"filledTm": iso(START + i // 10 * 1000), "orderId": str(i), "price": "1", "volume": "1"}
+             for i in range(2500)]
+    fills += [{"filledTm": iso(START + 8 * DAY + i), "orderId": "x%d" % i, "price": "1", "volume": "1"}
+              for i in range(3)]
+    with MockBingxServer({"/openApi/swap/v2/trade/allFillOrders": Fills(fills, 1000)}) as server:
+        api.ROOT_URL = server.url
+        result = list(api.query_transactional_order_history("BTC-USDT", START, START + 14 * DAY))
+        requests = len(server.requests)
+    assert result == fills
+    assert len(set(map(fill_identity, result))) == len(fills)
+    # 1000, 1000 and 500 fills in the first window, then one page to see that the second one has no more.
+    assert requests == 5
+
+
+def test_fills_are_not_lost_when_pages_are_smaller_than_assumed(api):
+    fills = [{"filledTm": iso(START + i * 7), "orderId": str(i), "price": "1", "volume": "1"} for i in range(1000)]
+    with MockBingxServer({"/openApi/swap/v2/trade/allFillOrders": Fills(fills, 300)}) as server:
+        api.ROOT_URL = server.url
+        result = list(api.query_transactional_order_history("BTC-USDT", START, START + DAY, limit=1000))
+    assert result == fills
+
+
+def test_time_cursor_without_exact_limit_pages_until_a_shorter_page():
+    cursor = TimeCursor(0, 100, 10, "id", exact_limit=False)
+    assert len(cursor.feed([{"time": i, "id": i} for i in range(4)])) == 4
+    assert not cursor.done and cursor.start == 3
+    assert cursor.feed([{"time": i, "id": i} for i in range(3, 7)]) == [{"time": i, "id": i} for i in range(4, 7)]
+    assert not cursor.done
+    assert cursor.feed([{"time": 6, "id": 6}]) == []
+    assert cursor.done
+
+
+class Orders(object):
+    def __init__(self, orders):
+        self.orders = orders
+        self.starts = []
+
+    def __call__(self, params):
+        self.starts.append(int(params["startTime"]))
+        return {"orders": [order for order in self.orders
+                           if int(params["startTime"]) <= order["time"] <= int(params["endTime"])]}
+
+
+def test_order_store_syncs_again_from_before_the_high_water_mark(api):
+    orders = Orders([{"orderId": 1, "time": START + DAY, "status": "NEW"}])
+    with MockBingxServer({"/openApi/swap/v2/trade/allOrders": orders}) as server:
+        api.ROOT_URL = server.url
+        store = OrderHistoryStore(":memory:", api, clock=lambda: (START + 2 * DAY) / 1000)
+        assert store.sync("BTC-USDT", START) == 1
+        assert store.high_water("BTC-USDT") == START + 2 * DAY
+        orders.orders[0]["status"] = "FILLED"
+        store.clock = lambda: (START + 3 * DAY) / 1000
+        assert store.sync("BTC-USDT") == 1
+    assert orders.starts == [START, START + 2 * DAY - DEFAULT_LOOKBACK]
+    assert [order["status"] for order in store.read("BTC-USDT")] == ["FILLED"]
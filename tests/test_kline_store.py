@@ -0,0 +1,109 @@
+import json
+import os
+
+import pytest
+
+from bingx.kline_store import KlineStore
+from bingx.klines import Klines
+
+MINUTE = 60000
+START = 1696118400000
+
+
+def candles(times, close=1.0):
+    return Klines.from_rows([{"time": time, "open": 1.0, "high": 2.0, "low": 0.5, "close": close,
+                              "volume": float(time // MINUTE % 1000)} for time in times])
+
+
+def minutes(first, last):
+    return [START + index * MINUTE for index in range(first, last)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KlineStore(str(tmp_path))
+
+
+def directory(store):
+    return os.path.join(store.root, "BTC-USDT", "1m")
+
+
+def manifest(store):
+    with open(os.path.join(directory(store), "manifest.json")) as file:
+        return json.load(file)
+
+
+def stored(store):
+    klines = store.read("BTC-USDT", "1m", 0, 2 ** 62)
+    return {name: list(klines.column(name)) for name in Klines.COLUMNS}
+
+
+def test_append_then_read(store):
+    store.write("BTC-USDT", "1m", candles(minutes(0, 10)), START, START + 10 * MINUTE)
+    store.write("BTC-USDT", "1m", candles(minutes(10, 20)), START + 10 * MINUTE, START + 20 * MINUTE)
+    assert list(store.read("BTC-USDT", "1m", START, START + 20 * MINUTE).time) == minutes(0, 20)
+    assert list(store.read("BTC-USDT", "1m", START + 5 * MINUTE, START + 7 * MINUTE).time) == minutes(5, 7)
+    assert store.coverage("BTC-USDT", "1m") == [(START, START + 20 * MINUTE)]
+
+
+def test_merge_inserts_in_the_middle(store):
+    store.write("BTC-USDT", "1m", candles(minutes(0, 5) + minutes(15, 20)), START, START)
+    store.write("BTC-USDT", "1m", candles(minutes(5, 15)), START, START)
+    assert stored(store)["time"] == minutes(0, 20)
+    assert stored(store)["volume"] == [float(time // MINUTE % 1000) for time in minutes(0, 20)]
+    assert set(manifest(store)["generations"].values()) == {1}
+    assert sorted(os.listdir(directory(store))) == sorted(["manifest.json"] + [name + "-1.bin"
+                                                                              for name in Klines.COLUMNS])
+
+
+def test_merge_keeps_stored_candles_between_new_ones(store):
+    store.write("BTC-USDT", "1m", candles(minutes(0, 10)), START, START)
+    store.write("BTC-USDT", "1m", candles(minutes(2, 3) + minutes(6, 7), close=9.0), START, START)
+    result = stored(store)
+    assert result["time"] == minutes(0, 10)
+    assert result["close"] == [9.0 if index in (2, 6) else 1.0 for index in range(10)]
+
+
+def test_merge_before_everything_stored(store):
+    store.write("BTC-USDT", "1m", candles(minutes(10, 20)), START, START)
+    store.write("BTC-USDT", "1m", candles(minutes(0, 10)), START, START)
+    assert stored(store)["time"] == minutes(0, 20)
+
+
+def test_merge_rewrites_only_changed_columns(store):
+    store.write("BTC-USDT", "1m", candles(minutes(0, 10)), START, START)
+    store.write("BTC-USDT", "1m", candles(minutes(8, 10), close=3.0), START, START)
+    generations = manifest(store)["generations"]
+    assert generations == {"time": 0, "open": 0, "high": 0, "low": 0, "close": 1, "volume": 0}
+    assert os.path.exists(os.path.join(directory(store), "time.bin"))
+    assert not os.path.exists(os.path.join(directory(store), "close.bin"))
+    assert stored(store)["close"] == [1.0] * 8 + [3.0] * 2
+    # Appending after a merge goes to each column's current file.
+    store.write("BTC-USDT", "1m", candles(minutes(10, 12)), START, START)
+    assert stored(store)["time"] == minutes(0, 12)
+    assert stored(store)["close"] == [1.0] * 8 + [3.0] * 2 + [1.0] * 2
+
+
+def test_merge_of_identical_candles_writes_nothing(store):
+    store.write("BTC-USDT", "1m", candles(minutes(0, 10)), START, START)
+    before = manifest(store)
+    store.write("BTC-USDT", "1m", candles(minutes(3, 7)), START, START)
+    assert manifest(store) == before
+    assert stored(store)["time"] == minutes(0, 10)
+
+
+def test_readers_keep_their_view_across_a_merge(store):
+    store.write("BTC-USDT", "1m", candles(minutes(0, 10)), START, START)
+    before = store.read("BTC-USDT", "1m", START, START + 10 * MINUTE)
+    store.write("BTC-USDT", "1m", candles(minutes(4, 5), close=5.0), START, START)
+    assert list(before.close) == [1.0] * 10
+    assert stored(store)["close"][4] == 5.0
+
+
+def test_single_generation_manifest_is_read(store):
+    store.write("BTC-USDT", "1m", candles(minutes(0, 5)), START, START)
+    path = os.path.join(directory(store), "manifest.json")
+    with open(path, "w") as file:
+        json.dump({"generation": 0, "length": 5}, file)
+    reopened = KlineStore(store.root)
+    assert list(reopened.read("BTC-USDT", "1m", START, START + 5 * MINUTE).time) == minutes(0, 5)
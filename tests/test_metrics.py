@@ -0,0 +1,24 @@
+from benchmarks.mock_server import MockBingxServer
+from bingx.account import AccountMirror
+from bingx.api import BingxAPI
+from bingx.metrics import Instrumentation
+
+
+def test_failing_hook_does_not_fail_the_request(caplog):
+    def hook(timings):
+        raise RuntimeError("broken hook")
+
+    seen = []
+    instrumentation = Instrumentation(hooks=[hook, seen.append])
+    account = AccountMirror(fetch_state=lambda: None, settle_delay=None)
+    payloads = {"/openApi/swap/v2/trade/order": {"order": {"orderId": 7, "symbol": "BTC-USDT", "status": "NEW"}}}
+    with MockBingxServer(payloads) as server:
+        api = BingxAPI("api-key", "secret-key", instrumentation=instrumentation, account=account)
+        api.ROOT_URL = server.url
+        assert api.open_limit_order("BTC-USDT", "LONG", "100", "0.01") == {"orderId": 7, "symbol": "BTC-USDT",
+                                                                            "status": "NEW"}
+    assert "broken hook" in caplog.text
+    # The hooks after the broken one still run, and the account mirror still saw the order.
+    assert [timings.path for timings in seen] == ["/openApi/swap/v2/trade/order"]
+    assert len(account.snapshot().orders) == 1
+    assert instrumentation.snapshot()["/openApi/swap/v2/trade/order"]["count"] == 1
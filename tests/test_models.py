@@ -0,0 +1,83 @@
+import math
+from array import array
+
+import pytest
+
+from bingx.models import Order, Orders, Position, Positions, Trade, Trades
+
+ROW = {"symbol": "BTC-USDT", "orderId": 1700000000000000001, "side": "BUY", "positionSide": "LONG", "type": "LIMIT",
+       "origQty": "0.0100", "price": "27000.5", "executedQty": "0.0050", "avgPrice": "27000.5", "cumQuote": "135",
+       "stopPrice": "", "profit": "0.0000", "commission": "-0.0675", "status": "PARTIALLY_FILLED",
+       "time": 1696118400000, "updateTime": "1696118400001", "clientOrderId": "my-order", "workingType": "MARK_PRICE"}
+
+
+def test_from_dict_parses_numbers_once():
+    order = Order.from_dict(ROW)
+    assert order.order_id == 1700000000000000001
+    assert order.price == 27000.5 and order.quantity == 0.01 and order.commission == -0.0675
+    assert order.update_time == 1696118400001
+    assert order.client_order_id == "my-order"
+    assert math.isnan(order.stop_price)
+
+
+def test_missing_and_empty_values():
+    order = Order.from_dict({"orderId": None, "price": None, "time": "", "quantity": "abc", "symbol": None,
+                             "clientOrderID": 42})
+    assert order.order_id == 0 and order.time == 0
+    assert math.isnan(order.price) and math.isnan(order.quantity)
+    assert order.symbol == "" and order.status == ""
+    # Some endpoints spell it clientOrderID, and not every ID is a string.
+    assert order.client_order_id == "42"
+    assert Order.from_dict({"time": "1696118400000.0"}).time == 1696118400000
+
+
+def test_bools_and_keyword_construction():
+    assert Position.from_dict({"isolated": True}).isolated is True
+    assert Position.from_dict({"isolated": "true"}).isolated is True
+    assert Position.from_dict({"isolated": "false"}).isolated is False
+    trade = Trade(price=1.5)
+    assert trade.price == 1.5 and math.isnan(trade.quantity) and trade.time == 0 and trade.is_buyer_maker is False
+    with pytest.raises(AttributeError):
+        trade.notional = 1
+
+
+def test_collection_columns():
+    rows = [dict(ROW, orderId=i, price=str(100 + i), stopPrice="" if i % 2 else "99") for i in range(5)]
+    orders = Orders.from_rows(rows)
+    assert len(orders) == 5 and repr(orders) == "Orders(5 orders)"
+    assert isinstance(orders.column("price"), array) and list(orders.column("price")) == [100, 101, 102, 103, 104]
+    assert [math.isnan(value) for value in orders.column("stop_price")] == [False, True, False, True, False]
+    # Repeated strings are stored once.
+    assert orders.column("symbol")[0] is orders.column("symbol")[4]
+    with pytest.raises(ValueError):
+        orders.column("orderId")
+
+
+def test_collection_access_builds_models():
+    rows = [dict(ROW, orderId=i, clientOrderId="" if i == 2 else "c%d" % i, clientOrderID="fallback")
+            for i in range(2500)]
+    orders = Orders.from_rows(iter(rows))
+    assert orders[0].order_id == 0 and orders[-1].order_id == 2499
+    assert orders[2].client_order_id == "fallback" and orders[3].client_order_id == "c3"
+    assert [order.order_id for order in orders[10:20:3]] == [10, 13, 16, 19]
+    assert [order.order_id for order in orders] == list(range(2500))
+    assert all(type(order) is Order for order in orders[:5])
+    with pytest.raises(IndexError):
+        orders[2500]
+
+
+def test_empty_and_bool_collections():
+    assert len(Orders.from_rows(None)) == 0 and list(Positions.from_rows([])) == []
+    trades = Trades.from_rows([{"time": 1, "isBuyerMaker": True, "price": "1", "qty": "2", "quoteQty": "2"},
+                               {"time": 2, "isBuyerMaker": False, "price": "1", "qty": "3", "quoteQty": "3"}])
+    assert [trade.is_buyer_maker for trade in trades] == [True, False]
+    assert trades[0].is_buyer_maker is True
+
+
+def test_to_numpy_shares_memory():
+    numpy = pytest.importorskip("numpy")
+    orders = Orders.from_rows([ROW, ROW])
+    columns = orders.to_numpy()
+    assert "symbol" not in columns and columns["price"].dtype == numpy.float64
+    orders.column("price")[0] = 1.0
+    assert columns["price"][0] == 1.0
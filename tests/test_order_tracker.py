@@ -0,0 +1,111 @@
+import pytest
+
+from benchmarks.mock_server import ExchangeError, MockBingxServer
+from bingx.api import BingxAPI
+from bingx.order_tracker import OrderTracker
+
+
+class Orders(object):
+    """
+    Pending orders and query_order answers of the mock exchange.
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self.errors = []
+
+    def pending(self, params):
+        return {"orders": [order for order in self.orders.values() if order["status"] == "NEW"]}
+
+    def query(self, params):
+        if self.errors:
+            raise ExchangeError(self.errors.pop(0))
+        return {"order": self.orders[params["orderId"]]}
+
+
+@pytest.fixture
+def orders():
+    return Orders()
+
+
+@pytest.fixture
+def api(orders):
+    payloads = {"/openApi/swap/v2/trade/openOrders": orders.pending,
+                "/openApi/swap/v2/trade/order": orders.query,
+                "/openApi/swap/v2/quote/price": [{"symbol": "BTC-USDT", "price": "100", "time": 1}]}
+    with MockBingxServer(payloads) as server:
+        api = BingxAPI("api-key", "secret-key")
+        api.ROOT_URL = server.url
+        yield api
+
+
+def test_fill_is_resolved(api, orders):
+    orders.orders["1"] = {"orderId": 1, "status": "NEW", "executedQty": "0", "price": "99"}
+    updates = []
+    tracker = OrderTracker(api)
+    future = tracker.track("BTC-USDT", order_id=1, callback=updates.append)
+    tracker.poll()
+    assert not future.done()
+    orders.orders["1"] = dict(orders.orders["1"], status="FILLED", executedQty="0.01")
+    tracker.poll()
+    assert future.result(0)["status"] == "FILLED"
+    assert [update["status"] for update in updates] == ["NEW", "FILLED"]
+    assert tracker.tracked() == {}
+
+
+def test_failing_callback_is_reported(api, orders):
+    orders.orders["1"] = {"orderId": 1, "status": "FILLED", "executedQty": "0.01", "price": "99"}
+    errors = []
+
+    def callback(order):
+        raise RuntimeError("broken callback")
+
+    tracker = OrderTracker(api, on_error=errors.append)
+    future = tracker.track("BTC-USDT", order_id=1, callback=callback)
+    tracker.poll()
+    assert future.result(0)["status"] == "FILLED"
+    assert [str(error) for error in errors] == ["broken callback"]
+
+
+def test_failing_callback_is_logged_without_on_error(api, orders, caplog):
+    orders.orders["1"] = {"orderId": 1, "status": "FILLED", "executedQty": "0.01", "price": "99"}
+    tracker = OrderTracker(api)
+    future = tracker.track("BTC-USDT", order_id=1, callback=lambda order: 1 / 0)
+    tracker.poll()
+    assert future.result(0)["status"] == "FILLED"
+    assert "ZeroDivisionError" in caplog.text
+
+
+def test_future_cancelled_while_resolving(api, orders):
+    orders.orders["1"] = {"orderId": 1, "status": "CANCELLED", "executedQty": "0", "price": "99"}
+    errors = []
+    tracker = OrderTracker(api, on_error=errors.append)
+    future = tracker.track("BTC-USDT", order_id=1, callback=lambda order: future.cancel())
+    tracker.poll()
+    assert future.cancelled()
+    assert errors == []
+    assert tracker.tracked() == {}
+
+
+def test_throttled_lookup_keeps_tracking(api, orders):
+    orders.orders["1"] = {"orderId": 1, "status": "FILLED", "executedQty": "0.01", "price": "99"}
+    orders.errors = [100410]
+    errors = []
+    tracker = OrderTracker(api, on_error=errors.append)
+    future = tracker.track("BTC-USDT", order_id=1)
+    tracker.poll()
+    assert not future.done()
+    assert tracker.tracked() == {"BTC-USDT": 1}
+    assert [error.code for error in errors] == [100410]
+    tracker.poll()
+    assert future.result(0)["status"] == "FILLED"
+    assert tracker.tracked() == {}
+
+
+def test_unknown_order_fails_its_future(api, orders):
+    orders.errors = [80016]
+    tracker = OrderTracker(api, on_error=lambda error: None)
+    future = tracker.track("BTC-USDT", order_id=1)
+    tracker.poll()
+    assert future.exception(0).code == 80016
+    assert tracker.tracked() == {}
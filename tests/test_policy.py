@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockBingxServer
+from bingx.api import BingxAPI
+from bingx.endpoints import ENDPOINTS
+from bingx.policy import RequestPolicy
+from bingx.ratelimit import RateLimiter
+from bingx.transport import HTTPTransport
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def failing_attempts(clock, failures, duration):
+    timeouts = []
+
+    def attempt(timeout):
+        timeouts.append(timeout)
+        clock.now += min(duration, timeout)
+        if len(timeouts) <= failures:
+            raise TimeoutError("timed out")
+        return {"code": 0}
+
+    return attempt, timeouts
+
+
+def test_retried_attempts_get_a_fraction_of_the_budget():
+    clock = FakeClock()
+    policy = RequestPolicy(deadline=8.0, retries=2, backoff=0.0, try_fraction=0.5, clock=clock, sleep=clock.sleep)
+    attempt, timeouts = failing_attempts(clock, 2, 100.0)
+    assert policy.run(ENDPOINTS["price"], "symbol=BTC-USDT", attempt) == {"code": 0}
+    # 4s of 8, 2s of the 4 left, then the last attempt gets the remaining 2s.
+    assert timeouts == [4.0, 2.0, 2.0]
+    assert policy.stats()["retries"] == 2
+
+
+def test_orders_that_cannot_be_replayed_get_the_whole_budget():
+    clock = FakeClock()
+    policy = RequestPolicy(deadline=8.0, retries=2, clock=clock, sleep=clock.sleep)
+    attempt, timeouts = failing_attempts(clock, 0, 1.0)
+    policy.run(ENDPOINTS["place_order"], "symbol=BTC-USDT&type=MARKET", attempt)
+    assert timeouts == [8.0]
+
+
+def test_async_attempt_timeouts_are_retried():
+    calls = []
+
+    async def attempt(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        return {"code": 0}
+
+    policy = RequestPolicy(deadline=0.4, retries=1, backoff=0.0)
+    assert asyncio.run(policy.run_async(ENDPOINTS["price"], "", attempt)) == {"code": 0}
+    assert calls[0] == pytest.approx(0.2, abs=0.05)
+    assert calls[1] == pytest.approx(0.2, abs=0.05)
+
+
+def test_rate_limiter_wait_times_out():
+    limiter = RateLimiter({"market": (1.0, 1)})
+    limiter.acquire("market", 1)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        limiter.acquire("market", 1, timeout=0.1)
+    assert time.monotonic() - start < 0.5
+    # The abandoned request no longer holds the queue.
+    limiter.acquire("market", 1, timeout=2)
+
+
+def test_connection_slot_wait_times_out():
+    with MockBingxServer(latency=0.5) as server:
+        transport = HTTPTransport(pool_size=1)
+        busy = threading.Thread(target=transport.request, args=("GET", server.url + "/slow"))
+        busy.start()
+        time.sleep(0.1)
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            transport.request("GET", server.url + "/fast", timeout=0.1)
+        assert time.monotonic() - start < 0.3
+        busy.join()
+        transport.close()
+
+
+def test_deadline_covers_the_rate_limiter():
+    with MockBingxServer({"/openApi/swap/v2/quote/price": {"price": "1"}}) as server:
+        api = BingxAPI("api-key", "secret-key", rate_limiter=RateLimiter({"market": (0.1, 1)}),
+                       policy=RequestPolicy(deadline=0.3, retries=0))
+        api.ROOT_URL = server.url
+        assert api.get_latest_price("BTC-USDT") == "1"
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            api.get_latest_price("BTC-USDT")
+        assert time.monotonic() - start < 1.0
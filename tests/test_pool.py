@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from benchmarks.mock_server import MockBingxServer
+from bingx.exceptions import BingxAPIError
+from bingx.pool import AccountPool, AsyncAccountPool, FlattenResult
+
+ACCOUNTS = {"main": ("key-1", "secret-1"), "sub": ("key-2", "secret-2")}
+PAYLOADS = {"/openApi/swap/v2/trade/closeAllPositions": {"success": [1], "failed": None},
+            "/openApi/swap/v2/trade/allOpenOrders": {"success": [2], "failed": None}}
+
+
+def pool_on(server, pool_class=AccountPool, **options):
+    pool = pool_class(ACCOUNTS, **options)
+    for api in pool.apis.values():
+        api.ROOT_URL = server.url
+    return pool
+
+
+def test_accounts_are_rate_limited_by_default():
+    with AccountPool(ACCOUNTS) as pool:
+        assert all(api.rate_limiter is not None for api in pool.apis.values())
+        assert pool["main"].rate_limiter is not pool["sub"].rate_limiter
+    with AccountPool(ACCOUNTS, rate_limits={"trade": (1.0, 1)}) as pool:
+        assert pool["main"].rate_limiter.limits["trade"] == (1.0, 1)
+    with AccountPool(ACCOUNTS, rate_limits=False) as pool:
+        assert all(api.rate_limiter is None for api in pool.apis.values())
+
+
+def test_flatten_keeps_every_outcome():
+    with MockBingxServer(PAYLOADS) as server, pool_on(server) as pool:
+        def failing_cancel(pair):
+            raise BingxAPIError(80012, "cancel failed")
+
+        pool["sub"].cancel_all_orders_of_symbol = failing_cancel
+        results = pool.flatten(pairs=["BTC-USDT", "ETH-USDT"])
+    assert results["main"] == {"close_all_positions": PAYLOADS["/openApi/swap/v2/trade/closeAllPositions"],
+                               "cancel_all_orders": [PAYLOADS["/openApi/swap/v2/trade/allOpenOrders"]] * 2}
+    sub = results["sub"]
+    assert isinstance(sub, FlattenResult)
+    assert sub["close_all_positions"] == PAYLOADS["/openApi/swap/v2/trade/closeAllPositions"]
+    assert all(isinstance(outcome, BingxAPIError) for outcome in sub["cancel_all_orders"])
+    assert len(sub.errors) == 2
+    assert list(results.failed) == ["sub"]
+    assert list(results.succeeded) == ["main"]
+    assert not results.ok
+
+
+def test_rejected_requests_raise():
+    with MockBingxServer(PAYLOADS, error_rate=1.0, error_code=80012) as server, pool_on(server) as pool:
+        with pytest.raises(BingxAPIError):
+            pool["main"].close_all_positions()
+        with pytest.raises(BingxAPIError):
+            pool["main"].cancel_all_orders_of_symbol("BTC-USDT")
+        results = pool.flatten(pairs=["BTC-USDT"])
+    assert set(results.failed) == {"main", "sub"}
+    assert all(len(result.errors) == 2 for result in results.values())
+
+
+def test_async_flatten():
+    async def main():
+        async with pool_on(server, AsyncAccountPool) as pool:
+            return await pool.flatten(pairs=["BTC-USDT"])
+
+    with MockBingxServer(PAYLOADS) as server:
+        results = asyncio.run(main())
+    assert results.ok
+    assert results["sub"]["cancel_all_orders"] == [PAYLOADS["/openApi/swap/v2/trade/allOpenOrders"]]
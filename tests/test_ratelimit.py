@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockBingxServer
+from bingx.api import BingxAPI
+from bingx.endpoints import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from bingx.ratelimit import RateLimiter
+
+
+def wait_queued(limiter, group, count):
+    deadline = time.monotonic() + 5
+    while limiter.stats()[group]["queued"] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_high_priority_goes_ahead_of_earlier_requests():
+    limiter = RateLimiter({"market": (5.0, 1)})
+    limiter.acquire("market", PRIORITY_LOW)
+    order = []
+
+    def send(name, priority):
+        limiter.acquire("market", priority)
+        order.append(name)
+
+    threads = []
+    for name, priority in (("poll 1", PRIORITY_LOW), ("poll 2", PRIORITY_LOW), ("account", PRIORITY_NORMAL),
+                           ("order", PRIORITY_HIGH)):
+        threads.append(threading.Thread(target=send, args=(name, priority)))
+        threads[-1].start()
+        wait_queued(limiter, "market", len(threads))
+    for thread in threads:
+        thread.join()
+    assert order == ["order", "account", "poll 1", "poll 2"]
+    assert limiter.stats()["market"]["max_queued"] == 4
+
+
+def test_throttling_pauses_and_slows_down():
+    limiter = RateLimiter({"market": (100.0, 100)}, slowdown=0.5, recovery=1000.0)
+    limiter.throttled("market", retry_after="0.2")
+    start = time.monotonic()
+    limiter.acquire("market", PRIORITY_HIGH)
+    assert time.monotonic() - start >= 0.19
+    stats = limiter.stats()["market"]
+    assert stats["throttled"] == 1
+    assert stats["rate"] == pytest.approx(50.0, rel=0.01)
+
+
+def test_rate_recovers():
+    now = [0.0]
+    limiter = RateLimiter({"market": (10.0, 10)}, slowdown=0.5, recovery=10.0, clock=lambda: now[0])
+    limiter.throttled("market")
+    assert limiter.stats()["market"]["rate"] == 5.0
+    now[0] = 5.0
+    limiter.acquire("market", PRIORITY_LOW)
+    assert limiter.stats()["market"]["rate"] == 10.0
+
+
+def test_timed_out_request_leaves_the_queue():
+    limiter = RateLimiter({"trade": (5.0, 1)})
+    limiter.acquire("trade", PRIORITY_NORMAL)
+    with pytest.raises(TimeoutError):
+        limiter.acquire("trade", PRIORITY_HIGH, timeout=0.05)
+    assert limiter.stats()["trade"]["queued"] == 0
+    # The next request is not held up by the abandoned one.
+    start = time.monotonic()
+    limiter.acquire("trade", PRIORITY_LOW)
+    assert time.monotonic() - start < 0.3
+
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__()
+        self.acquired = []
+
+    def acquire(self, group, priority, weight=1, timeout=None):
+        self.acquired.append((group, priority))
+        return super().acquire(group, priority, weight, timeout)
+
+
+def test_server_time_for_an_order_has_the_order_priority():
+    payloads = {"/openApi/swap/v2/server/time": {"serverTime": 1696118400000},
+                "/openApi/swap/v2/trade/order": {"order": {"orderId": 1}}}
+    limiter = RecordingLimiter()
+    with MockBingxServer(payloads) as server:
+        api = BingxAPI("api-key", "secret-key", timestamp="server", rate_limiter=limiter)
+        api.ROOT_URL = server.url
+        api.open_market_order("BTC-USDT", "LONG", "0.01")
+        assert api.get_timestamp() == "1696118400000"
+    assert limiter.acquired == [("trade", PRIORITY_HIGH), ("market", PRIORITY_HIGH), ("market", PRIORITY_LOW)]
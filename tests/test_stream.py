@@ -0,0 +1,131 @@
+import gzip
+import json
+import struct
+
+import pytest
+
+from benchmarks.mock_server import MockBingxStreamServer
+from bingx.stream import MarketDataStream
+from bingx.websocket import OP_BINARY, OP_TEXT, encode_frame, read_frame
+
+
+@pytest.fixture
+def server():
+    with MockBingxStreamServer() as server:
+        yield server
+
+
+@pytest.fixture
+def stream(server, wait_until):
+    errors = []
+    stream = MarketDataStream(server.url, on_error=errors.append, read_timeout=5, reconnect_delay=0.01)
+    stream.errors = errors
+    stream.start()
+    # The server only sends to clients it has registered, which happens after the client sees the handshake.
+    wait_until(lambda: server.connections)
+    yield stream
+    stream.stop()
+
+
+def reader(data):
+    def read(length):
+        chunk = data[:length]
+        del data[:length]
+        return bytes(chunk)
+    return read
+
+
+@pytest.mark.parametrize("length", [0, 5, 125, 126, 65535, 65536])
+@pytest.mark.parametrize("mask", [True, False])
+def test_frames_round_trip(length, mask):
+    payload = bytes(range(256)) * (length // 256 + 1)
+    payload = payload[:length]
+    frame = bytearray(encode_frame(OP_BINARY, payload, mask=mask))
+    assert read_frame(reader(frame)) == (True, OP_BINARY, payload)
+    assert not frame
+
+
+def test_masked_frame_header():
+    frame = encode_frame(OP_TEXT, b"x" * 200)
+    assert frame[0] == 0x80 | OP_TEXT
+    assert frame[1] == 0x80 | 126
+    assert struct.unpack("!H", frame[2:4])[0] == 200
+
+
+def test_subscribe_and_decode_gzip_frames(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    stream.subscribe_book_ticker("BTC-USDT")
+    wait_until(lambda: server.subscribers("BTC-USDT@bookTicker"))
+    assert server.publish("BTC-USDT@bookTicker", {"b": "27000.0", "a": "27000.5"}) == 1
+    wait_until(lambda: stream.get_book_ticker("BTC-USDT") is not None)
+    assert stream.get_book_ticker("BTC-USDT") == {"b": "27000.0", "a": "27000.5"}
+    assert stream.get_book_ticker_age("BTC-USDT") >= 0
+
+
+def test_depth_and_klines_are_decoded(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    stream.subscribe_depth("BTC-USDT", 5)
+    stream.subscribe_klines("BTC-USDT", "1m")
+    wait_until(lambda: server.subscribers("BTC-USDT@depth5") and server.subscribers("BTC-USDT@kline_1m"))
+    server.publish("BTC-USDT@depth5", {"bids": [["27000.0", "1"]], "asks": [{"p": "27000.5", "v": "2"}], "T": 1})
+    server.publish("BTC-USDT@kline_1m", [{"o": "1", "c": "2", "h": "3", "l": "0.5", "v": "10", "T": 60000}])
+    wait_until(lambda: stream.get_order_book("BTC-USDT") is not None and stream.get_kline("BTC-USDT", "1m"))
+    assert stream.get_kline("BTC-USDT", "1m") == {"open": "1", "close": "2", "high": "3", "low": "0.5",
+                                                  "volume": "10", "time": 60000}
+
+
+def test_unsubscribe(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    stream.subscribe_trades("BTC-USDT")
+    wait_until(lambda: server.subscribers("BTC-USDT@trade"))
+    stream.unsubscribe("BTC-USDT@trade")
+    wait_until(lambda: not server.subscribers("BTC-USDT@trade"))
+    assert stream.subscriptions == []
+
+
+def test_reconnect_resubscribes(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    stream.subscribe_trades("BTC-USDT")
+    stream.subscribe_book_ticker("ETH-USDT")
+    wait_until(lambda: server.subscribers("BTC-USDT@trade") and server.subscribers("ETH-USDT@bookTicker"))
+    server.drop_connections()
+    wait_until(lambda: server.connections == 2 and stream.connected)
+    wait_until(lambda: server.subscribers("BTC-USDT@trade") and server.subscribers("ETH-USDT@bookTicker"))
+    assert stream.reconnects == 1
+    server.publish("BTC-USDT@trade", [{"p": "27000.0", "q": "1"}])
+    wait_until(lambda: stream.get_last_trades("BTC-USDT"))
+
+
+def test_gzip_ping_is_answered(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    server.ping()
+    wait_until(lambda: server.pongs == 1)
+
+
+def test_control_ping_is_answered(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    server.ping(control=True)
+    wait_until(lambda: server.pongs == 1)
+
+
+def test_json_ping_is_answered(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    server.push({"ping": "abc", "time": "2023-10-01T00:00:00"})
+    wait_until(lambda: server.messages)
+    assert server.messages == [{"pong": "abc", "time": "2023-10-01T00:00:00"}]
+
+
+def test_rejected_subscription_is_reported(server, stream, wait_until):
+    assert stream.wait_connected(5)
+    stream.subscribe_trades("BTC-USDT")
+    wait_until(lambda: server.subscribers("BTC-USDT@trade"))
+    client, = server.subscribers("BTC-USDT@trade")
+    client.send(OP_BINARY, gzip.compress(json.dumps({"code": 80015, "msg": "invalid dataType"}).encode("utf-8")))
+    wait_until(lambda: stream.errors)
+    assert "80015" in str(stream.errors[0])
+
+
+def test_stop_without_connection():
+    stream = MarketDataStream("ws://127.0.0.1:9/swap-market", reconnect_delay=0.01).start()
+    stream.stop()
+    assert not stream.connected
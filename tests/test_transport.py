@@ -0,0 +1,90 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from bingx.transport import HTTPTransport, _dropped
+
+
+def high_socketpair(fd):
+    # A healthy socket with a descriptor above FD_SETSIZE, as in processes with many open connections.
+    left, right = socket.socketpair()
+    os.dup2(left.fileno(), fd)
+    left.close()
+    return socket.socket(fileno=fd), right
+
+
+def test_idle_socket_is_not_dropped():
+    left, right = socket.socketpair()
+    with left, right:
+        assert not _dropped(left)
+
+
+def test_closed_peer_is_dropped():
+    left, right = socket.socketpair()
+    right.close()
+    with left:
+        assert _dropped(left)
+    assert _dropped(None)
+
+
+@pytest.mark.skipif(not hasattr(os, "dup2") or os.name != "posix", reason="needs POSIX descriptors")
+def test_high_descriptor_is_not_dropped():
+    resource = pytest.importorskip("resource")
+    if resource.getrlimit(resource.RLIMIT_NOFILE)[0] <= 1100:
+        pytest.skip("open file limit too low")
+    left, right = high_socketpair(1100)
+    with left, right:
+        assert left.fileno() >= 1024
+        assert not _dropped(left)
+        right.close()
+        assert _dropped(left)
+
+
+@pytest.fixture
+def trickling_server():
+    # Answers every request with a 40 byte body sent one byte every 50 ms.
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(4)
+    listener.settimeout(0.05)
+    stop = threading.Event()
+
+    def trickle(client):
+        with client:
+            client.recv(65536)
+            client.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 40\r\n\r\n")
+            for _ in range(40):
+                if stop.wait(0.05):
+                    return
+                try:
+                    client.sendall(b"x")
+                except OSError:
+                    return
+
+    def serve():
+        while not stop.is_set():
+            try:
+                client, _ = listener.accept()
+            except socket.timeout:
+                continue
+            client.settimeout(None)
+            threading.Thread(target=trickle, args=(client,), daemon=True).start()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d/" % listener.getsockname()[1]
+    stop.set()
+    thread.join()
+    listener.close()
+
+
+def test_timeout_bounds_a_slowly_sent_response(trickling_server):
+    transport = HTTPTransport()
+    start = time.monotonic()
+    with pytest.raises((TimeoutError, socket.timeout)):
+        transport.request("GET", trickling_server, timeout=0.5)
+    assert time.monotonic() - start < 0.9
+    assert transport.request("GET", trickling_server, timeout=5) == b"x" * 40
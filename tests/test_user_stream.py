@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+
+import pytest
+
+from benchmarks.mock_server import MockBingxServer, MockBingxStreamServer
+from bingx.api import BingxAPI
+from bingx.async_api import AsyncBingxAPI
+from bingx.exceptions import BingxAPIError
+from bingx.user_stream import UserDataStream
+
+LISTEN_KEY_PATH = "/openApi/user/auth/userDataStream"
+
+
+class ListenKeys(object):
+    """
+    Listen key endpoint of the mock server: every creation returns a new key, extensions and deletions are counted.
+    """
+
+    def __init__(self):
+        self.counter = itertools.count(1)
+        self.created = []
+
+    def __call__(self, params):
+        if "listenKey" in params:
+            return {}
+        self.created.append("key-%d" % next(self.counter))
+        return {"listenKey": self.created[-1]}
+
+
+@pytest.fixture
+def keys():
+    return ListenKeys()
+
+
+@pytest.fixture
+def http(keys):
+    with MockBingxServer({LISTEN_KEY_PATH: keys}) as server:
+        yield server
+
+
+@pytest.fixture
+def ws():
+    with MockBingxStreamServer() as server:
+        yield server
+
+
+@pytest.fixture
+def api(http):
+    api = BingxAPI("api-key", "secret-key")
+    api.ROOT_URL = http.url
+    return api
+
+
+def methods(http):
+    return [method for method, path, _ in http.requests if path == LISTEN_KEY_PATH]
+
+
+def test_listen_key_is_created_and_deleted(http, ws, api, keys, wait_until):
+    stream = UserDataStream(api, ws.url, reconnect_delay=0.01).start()
+    assert stream.wait_connected(5)
+    assert stream.listen_key == "key-1"
+    wait_until(lambda: ws.listen_keys() == ["key-1"])
+    stream.stop()
+    assert methods(http) == ["POST", "DELETE"]
+    assert http.requests[-1][2] == "listenKey=key-1"
+    assert stream.listen_key is None
+
+
+def test_events_are_dispatched(ws, api, wait_until):
+    orders = []
+    with UserDataStream(api, ws.url, on_order=orders.append, reconnect_delay=0.01) as stream:
+        wait_until(lambda: ws.listen_keys() == ["key-1"])
+        future = stream.wait_for_order(order_id=42)
+        ws.push({"e": "ORDER_TRADE_UPDATE", "o": {"i": 42, "c": "mine", "X": "NEW"}})
+        ws.push({"e": "ACCOUNT_UPDATE", "a": {"B": []}})
+        ws.push({"e": "ORDER_TRADE_UPDATE", "o": {"i": 42, "c": "mine", "X": "FILLED"}})
+        assert future.result(5)["X"] == "FILLED"
+        wait_until(lambda: stream.account is not None)
+        assert len(orders) == 2
+        assert stream.wait_for_order(client_order_id="mine").result(0)["i"] == 42
+
+
+def test_keepalive_runs_without_messages(http, ws, api, wait_until):
+    with UserDataStream(api, ws.url, keepalive_interval=0.05, read_timeout=30) as stream:
+        assert stream.wait_connected(5)
+        wait_until(lambda: methods(http).count("PUT") >= 2)
+        assert all(query == "listenKey=key-1" for method, _, query in http.requests if method == "PUT")
+        assert stream.renewals == 0
+
+
+def test_reconnect_with_new_key_after_expiry(http, ws, api, wait_until):
+    with UserDataStream(api, ws.url, reconnect_delay=0.01) as stream:
+        assert stream.wait_connected(5)
+        wait_until(lambda: ws.listen_keys() == ["key-1"])
+        ws.push({"e": "listenKeyExpired"}, "key-1")
+        wait_until(lambda: ws.listen_keys() == ["key-2"])
+        assert stream.listen_key == "key-2"
+        assert stream.renewals == 1
+        assert methods(http)[:2] == ["POST", "POST"]
+
+
+def test_reconnect_after_drop_keeps_key(ws, api, wait_until):
+    with UserDataStream(api, ws.url, reconnect_delay=0.01) as stream:
+        assert stream.wait_connected(5)
+        wait_until(lambda: ws.listen_keys() == ["key-1"])
+        ws.drop_connections()
+        wait_until(lambda: ws.connections == 2 and ws.listen_keys() == ["key-1"])
+        assert stream.reconnects == 1
+
+
+def test_failed_keepalive_renews_the_key(ws, wait_until):
+    class FailingExtensions(object):
+        def __init__(self):
+            self.counter = itertools.count(1)
+
+        def create_listen_key(self):
+            return "key-%d" % next(self.counter)
+
+        def extend_listen_key(self, listen_key):
+            raise BingxAPIError(100400, "listen key does not exist")
+
+        def delete_listen_key(self, listen_key):
+            pass
+
+    errors = []
+    with UserDataStream(FailingExtensions(), ws.url, on_error=errors.append, keepalive_interval=0.05,
+                        reconnect_delay=0.01) as stream:
+        wait_until(lambda: "key-2" in ws.listen_keys())
+        assert isinstance(errors[0], BingxAPIError)
+
+
+def test_async_api(http, ws, keys, wait_until):
+    async def main():
+        api = AsyncBingxAPI("api-key", "secret-key")
+        api.ROOT_URL = http.url
+        async with api:
+            stream = UserDataStream(api, ws.url, reconnect_delay=0.01).start()
+            events = stream.queue()
+            while not ws.listen_keys():
+                await asyncio.sleep(0.01)
+            with pytest.raises(RuntimeError):
+                stream.stop()
+            ws.push({"e": "ACCOUNT_UPDATE"})
+            assert (await asyncio.wait_for(events.get(), 5))["e"] == "ACCOUNT_UPDATE"
+            await stream.stop_async()
+            assert stream.listen_key is None
+
+    asyncio.run(main())
+    assert methods(http) == ["POST", "DELETE"]
+
+
+def test_async_context_manager(http, ws):
+    async def main():
+        api = AsyncBingxAPI("api-key", "secret-key")
+        api.ROOT_URL = http.url
+        async with api:
+            async with UserDataStream(api, ws.url, reconnect_delay=0.01) as stream:
+                while not stream.connected:
+                    await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert methods(http) == ["POST", "DELETE"]